@@ -0,0 +1,67 @@
+from pathlib import Path
+
+import numpy as np
+
+from manager.market_recorder import read_records
+
+# 백테스트에 사용하는 분봉 필드
+CANDLE_COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+
+
+def load_candle_file(path):
+    """
+    코인 1개의 1분봉 파일을 읽어서 {필드명: 배열} 딕셔너리로 반환합니다.
+
+    지원 형식:
+      - .npz: timestamp, open, high, low, close, volume 배열
+      - .csv: 헤더에 timestamp, open, high, low, close, volume 열이 있는 파일
+    timestamp는 분봉 시작 시각(epoch 초, UTC)입니다.
+    """
+    path = Path(path)
+    if path.suffix == ".npz":
+        with np.load(path) as data:
+            candles = {column: np.asarray(data[column]) for column in CANDLE_COLUMNS}
+    elif path.suffix == ".csv":
+        data = np.loadtxt(path, delimiter=",", skiprows=1, ndmin=2,
+                          usecols=_csv_columns(path))
+        candles = {column: data[:, i] for i, column in enumerate(CANDLE_COLUMNS)}
+    else:
+        raise ValueError(f"지원하지 않는 분봉 파일 형식입니다: {path}")
+
+    candles["timestamp"] = candles["timestamp"].astype(np.int64)
+    order = np.argsort(candles["timestamp"], kind="stable")
+    return {column: values[order] for column, values in candles.items()}
+
+
+def _csv_columns(path):
+    with open(path, "r", encoding="utf-8") as f:
+        header = [name.strip() for name in f.readline().split(",")]
+    return [header.index(column) for column in CANDLE_COLUMNS]
+
+
+def load_candle_dir(data_dir):
+    """
+    디렉터리의 분봉 파일({코인명}.csv / {코인명}.npz)을 모두 읽습니다.
+    :return: {코인명: {필드명: 배열}}
+    """
+    files = sorted(p for p in Path(data_dir).iterdir() if p.suffix in (".csv", ".npz"))
+    return {p.stem: load_candle_file(p) for p in files}
+
+
+def load_recorded_dir(root):
+    """
+    MarketRecorder가 기록한 분봉 파일({root}/{YYYY-MM-DD}/{코인명}.candles.bin)을 모두 읽습니다.
+    각 파일은 파싱 없이 메모리 매핑됩니다.
+    :return: {코인명: {필드명: 배열}}
+    """
+    days_by_coin = {}
+    for path in sorted(Path(root).glob("*/*.candles.bin")):
+        coin = path.name[:-len(".candles.bin")]
+        days_by_coin.setdefault(coin, []).append(path.parent.name)
+
+    candles_by_coin = {}
+    for coin, days in days_by_coin.items():
+        records = np.concatenate([read_records(root, day, coin, "candles") for day in days])
+        candles_by_coin[coin] = {column: records[column] for column in CANDLE_COLUMNS}
+    return candles_by_coin
+
@@ -0,0 +1,394 @@
+import argparse
+import ast
+import json
+from dataclasses import dataclass, asdict, replace
+
+import numpy as np
+
+from backtest.candle_loader import load_candle_dir, load_recorded_dir
+from calculator.indicator_store import INDICATOR_FIELDS
+from calculator.market_matrix import rolling_sma, rolling_vwma
+from calculator.strategy import BUY_PRICE_FIELD, Strategy, StrategyEngine, load_strategies
+from calculator.target_calculator import DEFAULT_STRATEGY
+
+KST_OFFSET = 9 * 3600
+DAY = 86400
+# 업비트 KRW 마켓 거래 수수료
+UPBIT_FEE_RATE = 0.0005
+# 코인별 지표를 한 번에 계산하는 분봉 개수 (구간마다 앞 구간의 지표 계산에 필요한 분봉만 다시 읽음)
+CHUNK_CANDLES = 50_000
+# 매수 이후 익절/청산 분봉을 찾을 때 처음 확인하는 분봉 개수 (이후 두 배씩 늘림)
+SCAN_CANDLES = 1_440
+
+
+@dataclass
+class BacktestConfig:
+    purchase_volume: float = 5_000       # 개별 거래 구매 금액 (원)
+    take_profit: float = 1.03            # 기본 전략의 익절 배수 (매수가 x 1.03, 전략 파일 사용 시 전략 값)
+    fee_rate: float = UPBIT_FEE_RATE     # 매수/매도 각각 적용되는 수수료율
+    max_positions: int = 5               # 동시에 거래하는 최대 코인 수 (trading_dict 크기)
+    seed: int = 0                        # target_dict 에서 랜덤으로 고를 때 사용하는 시드
+
+
+@dataclass
+class Trade:
+    coin: str
+    entry_time: int
+    entry_price: float
+    exit_time: int | None
+    exit_price: float
+    closed: bool
+    pnl: float
+
+
+def _rolling_end(values, period):
+    """
+    rolling 결과를 원본 길이로 맞춤. k번째 값은 [k - period + 1, k] 구간의 값입니다. (앞부분은 NaN)
+    """
+    return np.concatenate([np.full(period - 1, np.nan), values])
+
+
+def _shift(values, n):
+    shifted = np.full(len(values), np.nan)
+    if len(values) > n:
+        shifted[n:] = values[:len(values) - n]
+    return shifted
+
+
+def compute_indicator_fields(candles, sma_period=20, vwma_period=100):
+    """
+    코인 1개의 분봉 배열(실제 체결이 있었던 분봉만, 시간 오름차순)로 분봉마다 지표 필드를 계산합니다.
+
+    k번째 값은 실시간 매매에서 k 분봉이 막 시작되었을 때 indicator_store에 저장되는 값과 같습니다.
+      - T-1, T-2: k-1, k-2 분봉 (업비트 분봉 조회와 같이 거래가 없던 분은 건너뜀)
+      - 현재가: k 분봉의 시가
+
+    :return: {INDICATOR_FIELDS 필드명: 배열}
+    """
+    close = np.asarray(candles["close"], dtype=np.float64)
+    volume = np.asarray(candles["volume"], dtype=np.float64)
+
+    # 지표 계산은 실시간 배치 모드와 같은 누적합 함수를 사용
+    ma20 = np.full(len(close), np.nan)
+    vwma100 = np.full(len(close), np.nan)
+    if len(close) >= sma_period:
+        ma20 = _rolling_end(rolling_sma(close[None], sma_period)[0], sma_period)
+    if len(close) >= vwma_period:
+        vwma100 = _rolling_end(rolling_vwma(close[None], volume[None], vwma_period)[0], vwma_period)
+
+    return {
+        "t2_close": _shift(close, 2),
+        "t1_close": _shift(close, 1),
+        "t2_volume": _shift(volume, 2),
+        "t1_volume": _shift(volume, 1),
+        "t2_ma20": _shift(ma20, 2),
+        "t1_ma20": _shift(ma20, 1),
+        "t2_vwma100": _shift(vwma100, 2),
+        "t1_vwma100": _shift(vwma100, 1),
+        "current_price": np.asarray(candles["open"], dtype=np.float64),
+    }
+
+
+def field_window(candles, start, stop, sma_period=20, vwma_period=100):
+    """
+    [start, stop) 분봉의 지표 필드.
+    T-2 지표에 필요한 앞쪽 분봉(max(sma_period, vwma_period) + 1개, 기본 101개)만 더 읽어서 계산하므로
+    전체 기간이 아니라 구간 길이에 비례하는 메모리만 사용합니다.
+    """
+    lead = max(0, start - (max(sma_period, vwma_period) + 1))
+    window = {column: candles[column][lead:stop] for column in ("open", "close", "volume")}
+    fields = compute_indicator_fields(window, sma_period, vwma_period)
+    return {name: values[start - lead:] for name, values in fields.items()}
+
+
+def iter_field_chunks(candles, chunk=CHUNK_CANDLES):
+    """코인의 전체 분봉을 chunk개씩 나눠 (시작, 끝, 지표 필드)를 반환합니다."""
+    length = len(candles["close"])
+    for start in range(0, length, chunk):
+        stop = min(start + chunk, length)
+        yield start, stop, field_window(candles, start, stop)
+
+
+def _first_index(predicate, start, stop):
+    """
+    [start, stop) 에서 predicate(lo, hi)가 처음 True인 인덱스 (없으면 None).
+    SCAN_CANDLES개부터 두 배씩 늘려가며 앞에서부터 확인하므로, 비용은 전체 기간이 아니라 보유 기간에 비례합니다.
+    """
+    lo, step = start, SCAN_CANDLES
+    while lo < stop:
+        hi = min(lo + step, stop)
+        hits = np.flatnonzero(predicate(lo, hi))
+        if len(hits):
+            return lo + int(hits[0])
+        lo, step = hi, step * 2
+    return None
+
+
+def _entry_index(timestamps, k, entry_clock):
+    """
+    process_trade 의 매수 시점: KST 매수 시각(entry_clock) 이전이면 당일 매수 시각 이후 첫 분봉,
+    이후라면(또는 None) 즉시 매수.
+    """
+    if entry_clock is None:
+        return k
+    entry_seconds = entry_clock.hour * 3600 + entry_clock.minute * 60
+    kst = int(timestamps[k]) + KST_OFFSET
+    if kst % DAY < entry_seconds:
+        entry_at = (kst // DAY) * DAY + entry_seconds - KST_OFFSET
+        return int(np.searchsorted(timestamps, entry_at))
+    return k
+
+
+def _references(source, name):
+    return any(isinstance(node, ast.Name) and node.id == name for node in ast.walk(ast.parse(source, mode="eval")))
+
+
+class _BacktestStrategies:
+    """
+    백테스트용 전략 묶음.
+
+    - engine: 모든 전략의 진입 조건과, buy_price를 사용하지 않는 청산 조건(조건마다 "{전략}/exit{i}" 전략)을
+      한 엔진에 넣어 구간마다 한 번에 평가합니다. 이 청산 신호는 매수가와 무관하므로 코인별로 한 번만 계산합니다.
+    - price_exits: buy_price를 사용하는 청산 조건만 가진 전략별 엔진 (거래마다 보유 구간만 평가)
+    """
+
+    def __init__(self, strategies):
+        members = []
+        self.static_exits = {}
+        self.price_exits = {}
+        for strategy in strategies:
+            members.append(strategy)
+            self.static_exits[strategy.name] = []
+            by_price = [source for source in strategy.exit if _references(source, BUY_PRICE_FIELD)]
+            for i, source in enumerate(source for source in strategy.exit if source not in by_price):
+                name = f"{strategy.name}/exit{i}"
+                members.append(Strategy(name, entry=[source], take_profit=1.0, params=strategy.params))
+                self.static_exits[strategy.name].append(name)
+            if by_price:
+                self.price_exits[strategy.name] = StrategyEngine([replace(strategy, exit=tuple(by_price))])
+
+        self.engine = StrategyEngine(members)
+        self.strategies = {strategy.name: strategy for strategy in strategies}
+        unsupported = self.engine.names - set(INDICATOR_FIELDS)
+        for engine in self.price_exits.values():
+            unsupported |= engine.names - set(INDICATOR_FIELDS)
+        if unsupported:
+            raise ValueError(f"백테스트는 1분봉 지표만 지원합니다: {sorted(unsupported)}")
+
+    def scan(self, candles):
+        """
+        코인 1개의 분봉 전체를 구간별로 평가합니다.
+        :return: ({전략 이름: 진입 분봉 인덱스 배열}, {전략 이름: 청산 신호 분봉 인덱스 배열})
+        """
+        entries = {name: [] for name in self.strategies}
+        exits = {name: [] for name in self.strategies}
+        for start, _, fields in iter_field_chunks(candles):
+            masks = self.engine.evaluate(fields)
+            for name in self.strategies:
+                entries[name].append(start + np.flatnonzero(masks[name]))
+                if self.static_exits[name]:
+                    signaled = np.logical_or.reduce([masks[sub] for sub in self.static_exits[name]])
+                    exits[name].append(start + np.flatnonzero(signaled))
+        concat = lambda parts: np.concatenate(parts) if parts else np.empty(0, dtype=np.intp)
+        return ({name: concat(parts) for name, parts in entries.items()},
+                {name: concat(parts) for name, parts in exits.items()})
+
+    def first_price_exit(self, name, candles, start, stop, buy_price):
+        """buy_price를 사용하는 청산 조건을 [start, stop) 분봉에서 처음 만족하는 인덱스 (없으면 None)"""
+        engine = self.price_exits.get(name)
+        if engine is None:
+            return None
+
+        def signaled(lo, hi):
+            fields = field_window(candles, lo, hi)
+            fields[BUY_PRICE_FIELD] = buy_price
+            return engine.evaluate_exits(fields, [name])[name]
+        return _first_index(signaled, start, stop)
+
+
+def run_backtest(candles_by_coin, config=None, strategy=None):
+    """
+    전략 하나를 과거 분봉으로 재현합니다. strategy가 없으면 기본 전략(익절 배수: config.take_profit)을 사용합니다.
+    :param candles_by_coin: {코인명: {필드명: 배열}} (load_candle_dir / load_recorded_dir)
+    :return: (Trade 리스트, 요약 dict)
+    """
+    config = config or BacktestConfig()
+    strategy = strategy or replace(DEFAULT_STRATEGY, take_profit=config.take_profit)
+    return run_strategies(candles_by_coin, [strategy], config)[strategy.name]
+
+
+def run_strategies(candles_by_coin, strategies, config=None):
+    """
+    여러 전략을 같은 과거 분봉으로 나란히 재현합니다.
+
+    코인마다 자신의 분봉(거래가 없던 분은 없음)으로 CHUNK_CANDLES개 구간씩 지표를 계산하고,
+    모든 전략의 진입/청산 조건을 전략 엔진으로 한 번에 평가해서 조건을 만족한 분봉 인덱스만 보관합니다.
+    (코인 수 x 전체 시간 행렬을 만들지 않으므로 메모리는 구간 크기에 비례)
+
+    :return: {전략 이름: (Trade 리스트, 요약 dict)}
+    """
+    config = config or BacktestConfig()
+    bundle = _BacktestStrategies(strategies)
+    coins = list(candles_by_coin)
+
+    entries = {name: [] for name in bundle.strategies}
+    exits = {name: {} for name in bundle.strategies}
+    for row, coin in enumerate(coins):
+        coin_entries, coin_exits = bundle.scan(candles_by_coin[coin])
+        for name in bundle.strategies:
+            entries[name].append((row, coin_entries[name]))
+            exits[name][row] = coin_exits[name]
+
+    return {name: _simulate(coins, candles_by_coin, entries[name], exits[name], bundle, strategy, config)
+            for name, strategy in bundle.strategies.items()}
+
+
+def _simulate(coins, candles_by_coin, entries, exits, bundle, strategy, config):
+    """
+      • 스크리닝: 전략의 진입 조건을 만족한 (코인, 분봉)
+      • 매수: 같은 시각의 target 코인 중 최대 max_positions 개를 랜덤 선택,
+              코인별 KST 기준 하루 1회, 전략의 매수 시각 규칙
+      • 매도: 고가 >= 매수가 x take_profit 이 되는 첫 분봉에서 익절가로,
+              또는 그보다 먼저 청산 조건을 만족한 분봉의 시가로 전량 매도
+      • 수수료: 매수/매도 금액에 fee_rate 적용
+    """
+    rng = np.random.default_rng(config.seed)
+    entry_clock = strategy.entry_clock
+
+    # 진입 신호를 (시각, 코인 행, 분봉 인덱스)로 모아서 시각 순으로 정렬
+    times, rows, indices = [], [], []
+    for row, candle_indices in entries:
+        times.append(candles_by_coin[coins[row]]["timestamp"][candle_indices])
+        rows.append(np.full(len(candle_indices), row))
+        indices.append(candle_indices)
+    times, rows, indices = np.concatenate(times), np.concatenate(rows), np.concatenate(indices)
+    if not len(times):
+        return [], summarize([], config)
+    order = np.lexsort((rows, times))
+    times, rows, indices = times[order], rows[order], indices[order]
+    boundaries = np.flatnonzero(np.diff(times)) + 1
+
+    trades = []
+    open_until = {}      # {코인 행: 거래가 끝나서 다시 매수할 수 있는 시각}
+    last_buy_day = {}    # {코인 행: KST 날짜 번호}
+
+    # 조건을 만족하는 코인이 하나라도 있는 시각만 순회
+    for group in np.split(np.arange(len(times)), boundaries):
+        t = int(times[group[0]])
+        for row in [row for row, until in open_until.items() if until <= t]:
+            del open_until[row]
+        free = config.max_positions - len(open_until)
+        if free <= 0:
+            continue
+
+        today = (t + KST_OFFSET) // DAY
+        signal_index = dict(zip(rows[group].tolist(), indices[group].tolist()))
+        candidates = [row for row in signal_index if row not in open_until and last_buy_day.get(row) != today]
+        if not candidates:
+            continue
+        chosen = rng.choice(candidates, size=min(free, len(candidates)), replace=False)
+
+        for row in chosen.tolist():
+            candles = candles_by_coin[coins[row]]
+            timestamps, length = candles["timestamp"], len(candles["timestamp"])
+            entry = _entry_index(timestamps, signal_index[row], entry_clock)
+            if entry >= length:
+                continue
+            last_buy_day[row] = (int(timestamps[entry]) + KST_OFFSET) // DAY
+
+            entry_price = float(candles["open"][entry])
+            quantity = config.purchase_volume * (1 - config.fee_rate) / entry_price
+            take_profit_price = entry_price * strategy.take_profit if strategy.take_profit is not None else np.inf
+
+            high = candles["high"]
+            take_profit_index = _first_index(lambda lo, hi: high[lo:hi] >= take_profit_price, entry, length)
+            # t 분봉 시작 시점의 지표로 평가하고, t 분봉 시가로 매도 (매수 분봉 이후부터)
+            bound = length if take_profit_index is None else take_profit_index + 1
+            static = exits[row]
+            position = int(np.searchsorted(static, entry, side="right"))
+            signal = int(static[position]) if position < len(static) and static[position] < bound else None
+            if signal is not None:
+                bound = signal
+            price_signal = bundle.first_price_exit(strategy.name, candles, entry + 1, bound, entry_price)
+            if price_signal is not None:
+                signal = price_signal
+
+            if signal is not None:
+                exit_index = signal
+                exit_price, closed = float(candles["open"][signal]), True
+                open_until[row] = int(timestamps[exit_index]) + 60
+            elif take_profit_index is not None:
+                exit_index = take_profit_index
+                exit_price, closed = take_profit_price, True
+                open_until[row] = int(timestamps[exit_index]) + 60
+            else:
+                # 기간 내 익절하지 못한 거래는 마지막 종가로 평가
+                exit_index = None
+                exit_price, closed = float(candles["close"][-1]), False
+                open_until[row] = np.inf
+
+            proceeds = quantity * exit_price * (1 - config.fee_rate)
+            trades.append(Trade(
+                coin=coins[row],
+                entry_time=int(timestamps[entry]),
+                entry_price=entry_price,
+                exit_time=int(timestamps[exit_index]) if exit_index is not None else None,
+                exit_price=float(exit_price),
+                closed=closed,
+                pnl=float(proceeds - config.purchase_volume),
+            ))
+
+    return trades, summarize(trades, config)
+
+
+def summarize(trades, config):
+    pnl = np.array([trade.pnl for trade in trades])
+    closed = [trade for trade in trades if trade.closed]
+    return {
+        "trades": len(trades),
+        "closed_trades": len(closed),
+        "open_trades": len(trades) - len(closed),
+        "win_rate": float(np.mean(pnl > 0)) if len(pnl) else 0.0,
+        "total_pnl": float(pnl.sum()) if len(pnl) else 0.0,
+        "total_invested": float(len(trades) * config.purchase_volume),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="분봉 파일로 매매 전략을 백테스트합니다.")
+    parser.add_argument("data_dir", help="코인별 분봉 파일({코인명}.csv / .npz) 디렉터리")
+    parser.add_argument("--recorded", action="store_true",
+                        help="data_dir 을 MarketRecorder 기록 디렉터리(data/market)로 읽음")
+    parser.add_argument("--purchase-volume", type=float, default=BacktestConfig.purchase_volume)
+    parser.add_argument("--take-profit", type=float, default=BacktestConfig.take_profit)
+    parser.add_argument("--fee-rate", type=float, default=BacktestConfig.fee_rate)
+    parser.add_argument("--max-positions", type=int, default=BacktestConfig.max_positions)
+    parser.add_argument("--seed", type=int, default=BacktestConfig.seed)
+    parser.add_argument("--strategy-file",
+                        help="전략 정의 JSON 파일. 파일의 모든 전략을 나란히 백테스트 (없으면 기본 전략)")
+    parser.add_argument("--output", help="거래 내역과 요약을 저장할 JSON 파일")
+    args = parser.parse_args()
+
+    config = BacktestConfig(purchase_volume=args.purchase_volume, take_profit=args.take_profit,
+                            fee_rate=args.fee_rate, max_positions=args.max_positions, seed=args.seed)
+    candles = load_recorded_dir(args.data_dir) if args.recorded else load_candle_dir(args.data_dir)
+    if not args.strategy_file:
+        trades, summary = run_backtest(candles, config)
+
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump({"summary": summary, "trades": [asdict(trade) for trade in trades]},
+                          f, ensure_ascii=False, indent=2)
+        return
+
+    results = run_strategies(candles, load_strategies(args.strategy_file), config)
+    print(json.dumps({name: summary for name, (_, summary) in results.items()}, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({name: {"summary": summary, "trades": [asdict(trade) for trade in trades]}
+                       for name, (trades, summary) in results.items()}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
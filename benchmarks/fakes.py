@@ -0,0 +1,122 @@
+"""
+벤치마크용 로컬 가짜 데이터 / 객체. 네트워크 없이 핫 패스만 측정하기 위해 사용합니다.
+"""
+import asyncio
+import json
+import uuid
+from datetime import datetime, timezone
+
+import numpy as np
+
+from calculator.coins_indicators_calculator import CANDLE_WINDOW
+
+
+def synthetic_coins(count):
+    return [f"KRW-B{i:04d}" for i in range(count)]
+
+
+class SyntheticCandles:
+    """
+    코인별 1분봉을 미리 만들어 두고, minute을 한 칸씩 옮기며 업비트 분봉 응답처럼 돌려줍니다.
+    응답 생성 비용이 측정에 섞이지 않도록 분봉 딕셔너리는 모두 미리 생성합니다.
+    """
+
+    def __init__(self, coins, rounds, seed=0, start=1_735_689_600):
+        rng = np.random.default_rng(seed)
+        length = CANDLE_WINDOW + rounds + 1
+        closes = 1000 * np.exp(np.cumsum(rng.normal(0, 0.002, (len(coins), length)), axis=1))
+        volumes = rng.exponential(1000, (len(coins), length))
+        times = [datetime.fromtimestamp(start + 60 * i, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+                 for i in range(length)]
+
+        self.candles = {
+            coin: [{
+                "market": coin,
+                "candle_date_time_utc": times[i],
+                "opening_price": float(closes[row, i - 1] if i else closes[row, i]),
+                "high_price": float(closes[row, i]),
+                "low_price": float(closes[row, i]),
+                "trade_price": float(closes[row, i]),
+                "candle_acc_trade_volume": float(volumes[row, i]),
+            } for i in range(length)]
+            for row, coin in enumerate(coins)
+        }
+        self.coins = list(coins)
+        # 진행 중인 분봉의 인덱스
+        self.minute = CANDLE_WINDOW - 1
+
+    def advance(self):
+        self.minute += 1
+
+    def get_minute_candles(self, coin, count=CANDLE_WINDOW):
+        """coins_indicators_calculator.get_minute_candles 와 같은 형식 (시간 오름차순)"""
+        return self.candles[coin][self.minute - count + 1:self.minute + 1]
+
+
+class FakeFetcher:
+    """AsyncCandleFetcher 대신 사용하는 가짜 비동기 분봉 조회기"""
+
+    def __init__(self, market):
+        self.market = market
+
+    async def get_all_krw_coins(self):
+        return list(self.market.coins)
+
+    async def get_minute_candles(self, coin, count=CANDLE_WINDOW):
+        return self.market.get_minute_candles(coin, count)
+
+
+class FakeTickerWebsocket:
+    """
+    미리 인코딩한 ticker 메시지를 순서대로 돌려주는 가짜 웹소켓.
+    메시지를 모두 보내면 drained 이벤트를 설정하고, 이후 recv()는 취소될 때까지 대기합니다.
+    """
+
+    def __init__(self, coins, messages, seed=0):
+        rng = np.random.default_rng(seed)
+        prices = 1000 * np.exp(rng.normal(0, 0.01, messages))
+        codes = rng.integers(0, len(coins), messages)
+        self.messages = [json.dumps({
+            "type": "ticker",
+            "code": coins[code],
+            "trade_price": float(price),
+            "trade_volume": 0.1,
+            "trade_timestamp": 1_735_689_600_000 + i,
+            "stream_type": "REALTIME",
+        }).encode() for i, (code, price) in enumerate(zip(codes, prices))]
+        self.position = 0
+        self.drained = asyncio.Event()
+
+    async def send(self, message):
+        pass
+
+    async def recv(self):
+        if self.position == len(self.messages):
+            self.drained.set()
+            await asyncio.Event().wait()
+        message = self.messages[self.position]
+        self.position += 1
+        return message
+
+    async def close(self):
+        pass
+
+
+def fake_order_factory(order_fills, fill_price):
+    """
+    trading.order 대신 사용하는 가짜 주문 함수. 주문 즉시 order_fills에 체결 완료를 알립니다.
+    """
+
+    async def fake_order(ACCESS_KEY, SECRET_KEY, coin, type, volume):
+        order_uuid = str(uuid.uuid4())
+        executed_volume = float(volume) / fill_price if type == "bid" else float(volume)
+        order_fills.resolve(order_uuid, {
+            "code": coin,
+            "side": type,
+            "state": "done",
+            "avg_price": fill_price,
+            "executed_volume": executed_volume,
+        })
+        return {"uuid": order_uuid}
+
+    return fake_order
@@ -0,0 +1,343 @@
+"""
+지표 계산, 타겟 분류, 가격 업데이트, 거래 처리 핫 패스 벤치마크.
+
+네트워크 대신 benchmarks/fakes.py의 가짜 분봉 / 웹소켓 / 주문을 사용하며,
+코인 수별로 실행 시간(wall time), 메모리 할당(tracemalloc), 항목당 비용을 JSON으로 저장합니다.
+
+사용 예:
+    python -m benchmarks.run_benchmarks --sizes 10 100 1000 --repeat 5
+    python -m benchmarks.run_benchmarks --baseline benchmarks/results/before.json --tolerance 1.2
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+os.environ.setdefault("PURCHASE_VOLUME", "5000")
+
+import shared_resources
+import trading
+from benchmarks.fakes import SyntheticCandles, FakeFetcher, FakeTickerWebsocket, fake_order_factory, synthetic_coins
+from calculator import coins_indicators_calculator
+from calculator.async_candle_fetcher import calculate_indicators_async
+from calculator.indicator_store import IndicatorStore, INDICATOR_FIELDS
+from calculator.target_calculator import classify_targets
+from manager.coin_data_manager import update_prices
+from manager.order_fills import OrderFillRegistry
+from manager.purchase_journal import PurchaseJournal
+from manager.trading_state import TradingStateActor
+from manager.trigger_registry import PriceTriggerRegistry
+
+RESULTS_DIR = Path(__file__).parent / "results"
+# 가격 업데이트 벤치마크에서 흘려보낼 ticker 메시지 수
+TICKER_MESSAGES = 20_000
+
+
+def _quiet():
+    """측정 중 print 출력을 버림 (출력 비용은 측정에 포함)"""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def _result(name, coins, item, items, times, alloc):
+    median = statistics.median(times)
+    return {
+        "name": name,
+        "coins": coins,
+        "item": item,
+        "items": items,
+        "repeat": len(times),
+        "wall_ms": {
+            "min": min(times) * 1000,
+            "median": median * 1000,
+            "mean": statistics.fmean(times) * 1000,
+        },
+        "per_item_us": median / items * 1e6,
+        "alloc_peak_kb": alloc[1] / 1024,
+        "alloc_retained_kb": alloc[0] / 1024,
+    }
+
+
+def _measure(run, repeat, before=None):
+    """
+    run()을 repeat번 실행한 시간 목록과, tracemalloc으로 한 번 더 실행한 (남은 할당, 최대 할당) 바이트를 반환합니다.
+    before()는 매 실행 전에 호출되며 측정에 포함되지 않습니다.
+    """
+    times = []
+    for _ in range(repeat):
+        if before is not None:
+            before()
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    if before is not None:
+        before()
+    tracemalloc.start()
+    try:
+        run()
+        alloc = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return times, alloc
+
+
+async def _trading_state(coins, price, start_trades=False):
+    """
+    coins 전체가 거래 대상(trading)으로 선택된 TradingStateActor와 그 run() Task를 만듭니다.
+    start_trades가 True이면 모든 코인을 거래 중(active)으로 표시합니다.
+    """
+    state = TradingStateActor(max_trading=len(coins))
+    task = asyncio.create_task(state.run())
+    await state.replace_targets({coin: price for coin in coins})
+    await state.fill_trading()
+    if start_trades:
+        for coin in coins:
+            await state.start_trade(coin)
+    return state, task
+
+
+async def _stop(task):
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await task
+
+
+# ---------------------------------------------------------------- 지표 계산
+def bench_calculate_indicators(n, repeat, batched):
+    """
+    calculate_indicators(스레드) 의 매 분 갱신 비용. 최초 1회 전체 분봉으로 채운 뒤, 매 실행마다 1분씩 진행합니다.
+    """
+    coins = synthetic_coins(n)
+    market = SyntheticCandles(coins, rounds=repeat + 2)
+    store, buffers, engines = IndicatorStore(), {}, {}
+
+    with mock.patch.object(coins_indicators_calculator, "get_all_krw_coins", lambda: list(coins)), \
+            mock.patch.object(coins_indicators_calculator, "get_minute_candles", market.get_minute_candles), \
+            _quiet():
+        def run():
+            coins_indicators_calculator.calculate_indicators(store, buffers, engines, 2, batched)
+
+        run()
+        times, alloc = _measure(run, repeat, before=market.advance)
+    name = "calculate_indicators_batched" if batched else "calculate_indicators"
+    return _result(name, n, "coin", n, times, alloc)
+
+
+def bench_calculate_indicators_async(n, repeat, batched):
+    """calculate_indicators_async (실시간 경로) 의 매 분 갱신 비용"""
+    coins = synthetic_coins(n)
+    market = SyntheticCandles(coins, rounds=repeat + 2)
+    fetcher = FakeFetcher(market)
+    store, buffers, engines = IndicatorStore(), {}, {}
+    loop = asyncio.new_event_loop()
+
+    def run():
+        loop.run_until_complete(calculate_indicators_async(fetcher, store, buffers, engines, batched))
+
+    try:
+        with _quiet():
+            run()
+            times, alloc = _measure(run, repeat, before=market.advance)
+    finally:
+        loop.close()
+    name = "calculate_indicators_async_batched" if batched else "calculate_indicators_async"
+    return _result(name, n, "coin", n, times, alloc)
+
+
+# ---------------------------------------------------------------- 타겟 분류
+def bench_classify_targets(n, repeat):
+    """
+    classify_targets 비용. 실행 시간이 짧으므로 한 번 측정에 number회 실행한 평균을 사용합니다.
+    """
+    rng = np.random.default_rng(0)
+    store = IndicatorStore()
+    # 일부 코인만 조건을 만족하도록 가격 근처의 값을 채움
+    matrix = 1000 * (1 + rng.normal(0, 0.01, (n, len(INDICATOR_FIELDS))))
+    matrix[:, 2:4] = rng.exponential(1e5, (n, 2))
+    store.update_many(synthetic_coins(n), matrix)
+    target_dict = {}
+    number = max(1, 20_000 // n)
+
+    def run():
+        for _ in range(number):
+            target_dict.clear()
+            classify_targets(store, target_dict)
+
+    times, alloc = _measure(run, repeat)
+    return _result("classify_targets", n, "coin", n, [t / number for t in times], alloc)
+
+
+# ---------------------------------------------------------------- 가격 업데이트
+def bench_update_prices(n, repeat):
+    """
+    update_prices 수신 루프의 메시지 처리량. 거래 대상(trading)에 n개 코인, 코인마다 익절 트리거 1개가 걸린 상태에서
+    TICKER_MESSAGES개의 ticker 메시지를 처리하는 시간을 측정합니다.
+    """
+    coins = synthetic_coins(n)
+
+    async def run_once():
+        websocket = FakeTickerWebsocket(coins, TICKER_MESSAGES)
+        trading_state, state_task = await _trading_state(coins, 0.0)
+        price_cache, price_triggers = {}, PriceTriggerRegistry()
+        # 도달하지 않는 익절가 (트리거 확인 비용만 포함)
+        for coin in coins:
+            price_triggers.register(coin, 1e12)
+
+        with mock.patch.object(shared_resources, "upbit_websocket", websocket):
+            task = asyncio.create_task(update_prices(trading_state, price_cache, price_triggers))
+            await websocket.drained.wait()
+            await _stop(task)
+        await _stop(state_task)
+
+    loop = asyncio.new_event_loop()
+    try:
+        times, alloc = _measure(lambda: loop.run_until_complete(run_once()), repeat)
+    finally:
+        loop.close()
+    return _result("update_prices", n, "message", TICKER_MESSAGES, times, alloc)
+
+
+# ---------------------------------------------------------------- 거래 처리
+def bench_process_trade(n, repeat):
+    """
+    process_trade n건을 동시에 실행해 매수 -> 체결 확인 -> 구매 기록 -> 익절 대기 -> 매도까지의 처리량을 측정합니다.
+    주문은 즉시 체결되는 가짜 주문을 사용하고, 모든 거래가 익절 대기에 들어가면 가격 틱 1개씩으로 익절시킵니다.
+    """
+    coins = synthetic_coins(n)
+    fill_price = 100.0
+
+    async def run_once():
+        order_fills, price_triggers = OrderFillRegistry(), PriceTriggerRegistry()
+        trading_state, state_task = await _trading_state(coins, fill_price, start_trades=True)
+        price_cache, wallet_dict = {coin: fill_price for coin in coins}, {}
+        shared_resources.last_buy_date.clear()
+        trading.last_buy_date.clear()
+
+        journal = PurchaseJournal(Path(journal_dir) / "purchases.journal")
+        journal_task = asyncio.create_task(journal.run())
+
+        with mock.patch.object(trading, "order", fake_order_factory(order_fills, fill_price)), \
+                mock.patch.object(shared_resources, "purchase_journal", journal):
+            tasks = [asyncio.create_task(trading.process_trade(
+                "access", "secret", coin, trading_state, shared_resources.indicator_store,
+                wallet_dict, order_fills, price_cache, price_triggers)) for coin in coins]
+
+            # 모든 거래가 익절 트리거를 등록할 때까지 대기
+            while len(price_triggers.triggers) < n and not all(task.done() for task in tasks):
+                await asyncio.sleep(0)
+            for coin in coins:
+                price_cache[coin] = fill_price * 2
+                price_triggers.check(coin, fill_price * 2)
+            await asyncio.gather(*tasks)
+
+        # 저널 기록 완료까지 포함
+        await _stop(journal_task)
+        await _stop(state_task)
+
+    loop = asyncio.new_event_loop()
+    with tempfile.TemporaryDirectory() as journal_dir, _quiet(), \
+            mock.patch.object(shared_resources, "persistent_purchases", {}), \
+            mock.patch.object(trading, "send_webhook", lambda message: None), \
+            mock.patch.object(trading, "_next_entry_kst", lambda now, entry_time: now):
+        try:
+            times, alloc = _measure(lambda: loop.run_until_complete(run_once()), repeat)
+        finally:
+            loop.close()
+    return _result("process_trade", n, "trade", n, times, alloc)
+
+
+BENCHMARKS = {
+    "calculate_indicators": lambda n, repeat: bench_calculate_indicators(n, repeat, batched=False),
+    "calculate_indicators_batched": lambda n, repeat: bench_calculate_indicators(n, repeat, batched=True),
+    "calculate_indicators_async": lambda n, repeat: bench_calculate_indicators_async(n, repeat, batched=False),
+    "calculate_indicators_async_batched": lambda n, repeat: bench_calculate_indicators_async(n, repeat, batched=True),
+    "classify_targets": bench_classify_targets,
+    "update_prices": bench_update_prices,
+    "process_trade": bench_process_trade,
+}
+
+
+def _metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=Path(__file__).parent).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """
+    기준 결과 대비 중앙값이 tolerance배를 넘게 느려진 벤치마크 목록을 반환합니다.
+    """
+    previous = {(r["name"], r["coins"]): r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        before = previous.get((result["name"], result["coins"]))
+        if before is None:
+            continue
+        ratio = result["wall_ms"]["median"] / before["wall_ms"]["median"]
+        result["baseline_ratio"] = ratio
+        if ratio > tolerance:
+            regressions.append((result["name"], result["coins"], ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="매매 핫 패스 벤치마크")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000], help="합성 마켓 코인 수")
+    parser.add_argument("--repeat", type=int, default=5, help="벤치마크별 반복 측정 횟수")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="실행할 벤치마크")
+    parser.add_argument("--output", help="결과 JSON 경로 (기본: benchmarks/results/bench-{시각}.json)")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON")
+    parser.add_argument("--tolerance", type=float, default=1.2, help="중앙값이 기준의 몇 배를 넘으면 회귀로 볼지")
+    args = parser.parse_args()
+
+    results = []
+    for name in args.only or BENCHMARKS:
+        for n in args.sizes:
+            result = BENCHMARKS[name](n, args.repeat)
+            results.append(result)
+            print(f"{name:36s} coins={n:5d}  median {result['wall_ms']['median']:10.3f} ms  "
+                  f"{result['per_item_us']:9.2f} us/{result['item']}  peak {result['alloc_peak_kb']:9.1f} KiB")
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for name, n, ratio in regressions:
+            print(f"회귀: {name} coins={n} 기준 대비 {ratio:.2f}배")
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"bench-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"meta": _metadata(), "results": results}, f, ensure_ascii=False, indent=2)
+    print(f"결과 저장: {output}")
+
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
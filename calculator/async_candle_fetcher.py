@@ -0,0 +1,151 @@
+import asyncio
+import time
+from datetime import datetime
+
+import aiohttp
+
+from calculator.candle_buffer import CandleBuffer, candle_start_timestamp
+from calculator.coins_indicators_calculator import (CANDLE_WINDOW, CANDLE_TOPUP_COUNT, filter_krw_coins,
+                                                    store_indicators, calculate_indicators_batch)
+from manager.http_client import get_ssl_context, upbit_url
+from manager.request_scheduler import PRIORITY_CANDLE
+
+
+class AsyncCandleFetcher:
+    """
+    하나의 aiohttp 세션(keep-alive 연결 풀)을 재사용하는 비동기 분봉 조회기.
+    동시 요청 수는 concurrency로 제한하고, 초당 요청 수는 공유 RequestScheduler의 그룹 예산을 따릅니다.
+    (분봉 조회는 주문, 계좌 조회보다 낮은 우선순위)
+    """
+
+    def __init__(self, scheduler, concurrency=8, max_retries=5):
+        self.concurrency = concurrency
+        self.scheduler = scheduler
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.max_retries = max_retries
+        self.session = None
+
+    async def _get_session(self):
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=60, ssl=get_ssl_context())
+            self.session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=10))
+        return self.session
+
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+
+    async def get_json(self, url, group, params=None):
+        """
+        요청 예산에 맞춘 GET 요청. 429 또는 일시적 오류 시 max_retries번까지 재시도합니다.
+        """
+        session = await self._get_session()
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                async with self.semaphore, self.scheduler.request(group, PRIORITY_CANDLE):
+                    async with session.get(url, params=params) as response:
+                        self.scheduler.observe(response.headers)
+                        if response.status == 429:
+                            # 다른 요청과 예산을 공유하고 있으므로 그룹 예산을 비우고 재시도
+                            self.scheduler.penalize(group)
+                            print(f"[{datetime.now()}] 429 오류 발생 ({params}). 재시도 {attempt}/{self.max_retries}")
+                            continue
+                        response.raise_for_status()
+                        return await response.json()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"[{datetime.now()}] 요청 오류 발생 ({params}): {e}. 재시도 {attempt}/{self.max_retries}")
+        raise RuntimeError(f"요청 {self.max_retries}회 실패: {url} {params}")
+
+    async def get_all_krw_coins(self):
+        markets = await self.get_json(upbit_url("/v1/market/all"), "market")
+        return filter_krw_coins(markets)
+
+    async def get_minute_candles(self, coin, count=CANDLE_WINDOW):
+        """
+        지정된 코인의 분봉 데이터를 시간 오름차순으로 가져옴.
+        """
+        params = {"market": coin, "count": count}
+        candles = await self.get_json(upbit_url("/v1/candles/minutes/1"), "candles", params=params)
+        # 시간 역순으로 반환되므로 뒤집어서 정렬
+        candles.reverse()
+        return candles
+
+
+def merge_built_candles(coin, buffer, builder, recorder=None):
+    """
+    체결 웹소켓으로 만든 분봉을 버퍼에 반영합니다. (REST 요청 없음)
+    버퍼의 최신 분봉 시작 이후 끊김 없이 체결을 받은 경우에만 반영하고, 그 외에는 False를 반환합니다.
+    """
+    candles = builder.drain(coin)
+    if buffer is None or not builder.is_continuous(buffer.last_timestamp()):
+        return False
+    if not buffer.merge(candles, contiguous=True):
+        return False
+    if recorder is not None and candles:
+        minute_start = int(time.time()) // 60 * 60
+        recorder.record_candles(coin, [candle for candle in candles if candle_start_timestamp(candle) < minute_start],
+                                include_last=True)
+    return True
+
+
+async def update_candle_buffer_async(fetcher, coin, candle_buffers, recorder=None, builder=None):
+    """
+    coins_indicators_calculator.update_candle_buffer 의 비동기 버전.
+    recorder가 주어지면 받아온 분봉 중 마감된 분봉을 시장 데이터 기록 버퍼에 추가합니다.
+    builder(MinuteCandleBuilder)가 주어지면 체결로 만든 분봉을 먼저 사용하고,
+    버퍼가 없거나 웹소켓 연결이 끊겼던 구간이 있을 때만 REST로 분봉을 받습니다.
+
+    :return: (버퍼, 전체 분봉으로 다시 채웠는지 여부)
+    """
+    buffer = candle_buffers.get(coin)
+    if builder is not None and merge_built_candles(coin, buffer, builder, recorder):
+        return buffer, False
+    if buffer is None:
+        buffer = CandleBuffer(CANDLE_WINDOW)
+        candle_buffers[coin] = buffer
+    else:
+        candles = await fetcher.get_minute_candles(coin, count=CANDLE_TOPUP_COUNT)
+        if recorder is not None:
+            recorder.record_candles(coin, candles)
+        if buffer.merge(candles):
+            return buffer, False
+
+    candles = await fetcher.get_minute_candles(coin, count=CANDLE_WINDOW)
+    if recorder is not None:
+        recorder.record_candles(coin, candles)
+    buffer.seed(candles)
+    return buffer, True
+
+
+async def calculate_indicators_async(fetcher, indicator_store, candle_buffers, indicator_engines, batched=False,
+                                     recorder=None, coins=None, builder=None, timeframes=None):
+    """
+    모든 KRW 코인의 분봉을 비동기로 동시에 받아 지표를 계산하고 indicator_store에 저장.
+    스레드 없이 이벤트 루프 안에서 실행되며, 요청 속도는 fetcher의 요청 스케줄러가 조절합니다.
+    coins가 주어지면 마켓 목록을 조회하지 않고 해당 코인만 계산합니다.
+    builder가 주어지면 체결 웹소켓으로 만든 분봉을 사용하고, 누락 구간이 있는 코인만 REST로 채웁니다.
+    timeframes(TimeframeIndicators)가 주어지면 마감된 분봉으로 상위 봉 지표도 함께 갱신합니다. (추가 REST 요청 없음)
+    """
+    krw_coins = await fetcher.get_all_krw_coins() if coins is None else coins
+
+    async def process(coin):
+        try:
+            buffer, reseeded = await update_candle_buffer_async(fetcher, coin, candle_buffers, recorder, builder)
+
+            # 오류 발생시 저장하지 않음
+            if len(buffer) != CANDLE_WINDOW:
+                print(f"{coin} 응답 오류, indicator_store 에 저장하지 않음.")
+                return
+
+            if timeframes is not None:
+                timeframes.update(coin, buffer)
+
+            if not batched:
+                store_indicators(coin, buffer, reseeded, indicator_store, indicator_engines)
+        except Exception as e:
+            print(f"Error processing {coin}: {e}")
+
+    await asyncio.gather(*(process(coin) for coin in krw_coins))
+
+    if batched:
+        calculate_indicators_batch(krw_coins, indicator_store, candle_buffers)
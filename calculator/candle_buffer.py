@@ -0,0 +1,118 @@
+import numpy as np
+from datetime import datetime, timezone
+
+
+def candle_start_timestamp(candle):
+    """
+    업비트 분봉 응답의 candle_date_time_utc(분봉 시작 시각)를 epoch 초 단위 정수로 변환.
+    """
+    start = datetime.fromisoformat(candle["candle_date_time_utc"]).replace(tzinfo=timezone.utc)
+    return int(start.timestamp())
+
+
+class CandleBuffer:
+    """
+    코인별 분봉(종가, 거래량, 분봉 시작 시각)을 고정 크기 NumPy 링 버퍼로 보관합니다.
+
+    최초 1회 seed()로 전체 분봉을 채운 뒤, 이후에는 merge()로 최근 1~3개의 분봉만 받아서 갱신합니다.
+    가장 최근 분봉(진행 중인 분봉)은 거래량이 계속 바뀌므로, 같은 시각의 분봉이 다시 들어오면 덮어씁니다.
+
+    * 업비트는 거래가 없는 분의 분봉을 반환하지 않으므로, 버퍼는 "최근 N개의 분봉"을 의미합니다.
+    """
+
+    def __init__(self, capacity=102):
+        self.capacity = capacity
+        self.close = np.zeros(capacity, dtype=float)
+        self.volume = np.zeros(capacity, dtype=float)
+        self.timestamp = np.zeros(capacity, dtype=np.int64)
+        self.head = 0   # 다음에 기록할 위치
+        self.size = 0   # 현재 저장된 분봉 개수
+        # 마지막 seed/merge 에서 새로 마감된 분봉 개수 (진행 중 분봉 제외)
+        self.closed_count = 0
+
+    def __len__(self):
+        return self.size
+
+    def _index(self, offset):
+        """가장 최근 분봉 기준 offset 번째(0: 최신) 분봉의 실제 배열 위치"""
+        return (self.head - 1 - offset) % self.capacity
+
+    def _append(self, ts, close, volume):
+        self.timestamp[self.head] = ts
+        self.close[self.head] = close
+        self.volume[self.head] = volume
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def last_timestamp(self):
+        if self.size == 0:
+            return None
+        return int(self.timestamp[self._index(0)])
+
+    def seed(self, candles):
+        """
+        시간 오름차순으로 정렬된 분봉 리스트로 버퍼를 초기화합니다.
+        """
+        self.head = 0
+        self.size = 0
+        for candle in candles:
+            self._append(candle_start_timestamp(candle), candle["trade_price"], candle["candle_acc_trade_volume"])
+        self.closed_count = max(self.size - 1, 0)
+
+    def merge(self, candles, contiguous=False):
+        """
+        최근 분봉 몇 개(시간 오름차순)를 버퍼에 반영합니다.
+
+        :param contiguous: 버퍼의 최신 분봉 이후 분봉이 빠짐없이 들어있음이 보장되는 경우 True
+                           (체결 웹소켓으로 끊김 없이 만든 분봉). 누락 구간 확인을 생략합니다.
+        :return: 반영 성공 여부. 버퍼가 비어있거나, 받아온 분봉과 버퍼 사이에 누락 구간이
+                 있을 수 있으면 False를 반환하며, 이 경우 seed()로 다시 채워야 합니다.
+        """
+        self.closed_count = 0
+        if self.size == 0:
+            return False
+        if not candles:
+            # 끊김 없이 수신 중이면 체결이 없었던 것이므로 바뀐 분봉이 없음
+            return contiguous
+
+        last_ts = self.last_timestamp()
+        # 받아온 가장 오래된 분봉이 버퍼의 최신 분봉보다 이후라면, 그 사이 분봉이 누락되었을 수 있음
+        if not contiguous and candle_start_timestamp(candles[0]) > last_ts:
+            return False
+
+        appended = 0
+        for candle in candles:
+            ts = candle_start_timestamp(candle)
+            close = candle["trade_price"]
+            volume = candle["candle_acc_trade_volume"]
+            if ts > last_ts:
+                self._append(ts, close, volume)
+                last_ts = ts
+                appended += 1
+                continue
+            # 이미 있는 분봉은 최종 값으로 덮어씀 (최근 몇 개만 확인)
+            for offset in range(min(self.size, len(candles) + 1)):
+                idx = self._index(offset)
+                if self.timestamp[idx] == ts:
+                    self.close[idx] = close
+                    self.volume[idx] = volume
+                    break
+
+        # 새 분봉이 추가될 때마다 직전 분봉이 마감됨
+        self.closed_count = appended
+        return True
+
+    def closed_candles(self):
+        """
+        마지막 seed/merge 에서 새로 마감된 분봉들의 (종가, 거래량) 배열을 시간 오름차순으로 반환합니다.
+        """
+        offsets = np.arange(self.closed_count, 0, -1)
+        idx = (self.head - 1 - offsets) % self.capacity
+        return self.close[idx], self.volume[idx]
+
+    def window(self):
+        """
+        시간 오름차순으로 정렬된 (분봉 시작 시각, 종가, 거래량) 배열을 반환합니다.
+        """
+        idx = (self.head - self.size + np.arange(self.size)) % self.capacity
+        return self.timestamp[idx], self.close[idx], self.volume[idx]
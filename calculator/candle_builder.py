@@ -0,0 +1,93 @@
+import time
+from datetime import datetime, timezone
+
+# 분이 바뀐 뒤 직전 분의 늦게 도착한 체결을 기다리는 시간 (초)
+CLOSE_GRACE = 0.2
+
+# 분봉 배열 열 순서
+_START, _OPEN, _HIGH, _LOW, _CLOSE, _VOLUME, _TURNOVER, _LAST_TRADE = range(8)
+
+
+def seconds_until_next_check(grace=CLOSE_GRACE):
+    """
+    1초 간격 확인 시각을 매 초 + grace초에 맞추기 위한 대기 시간 (초).
+    분이 바뀐 뒤 정확히 grace초 후에 분 변경을 확인하게 됩니다.
+    """
+    return 1 - (time.time() - grace) % 1
+
+
+def _as_candle(bar):
+    """만든 분봉을 업비트 분봉 응답과 같은 형태의 dict로 변환 (CandleBuffer, MarketRecorder 에서 그대로 사용)"""
+    return {
+        "candle_date_time_utc": datetime.fromtimestamp(bar[_START], timezone.utc).strftime("%Y-%m-%dT%H:%M:%S"),
+        "opening_price": bar[_OPEN],
+        "high_price": bar[_HIGH],
+        "low_price": bar[_LOW],
+        "trade_price": bar[_CLOSE],
+        "timestamp": bar[_LAST_TRADE],
+        "candle_acc_trade_price": bar[_TURNOVER],
+        "candle_acc_trade_volume": bar[_VOLUME],
+        "unit": 1,
+    }
+
+
+class MinuteCandleBuilder:
+    """
+    체결(trade) 웹소켓 메시지로 코인별 1분봉(OHLCV)을 직접 만드는 분봉 생성기.
+
+    - on_trade(): 체결 1건을 해당 분의 분봉에 반영합니다. (O(1))
+      체결 시각이 새 분이면 새 분봉을 시작하고, 이미 지난 분의 늦은 체결은 무시합니다.
+    - drain(): 마지막 drain 이후 바뀐 분봉들을 업비트 분봉 응답 형태로 반환합니다.
+      진행 중인 분봉은 이후 체결이 들어오면 다음 drain 에서 최종 값으로 다시 반환됩니다.
+    - connected() / disconnected(): 웹소켓 연결 상태. 연결이 끊기면 만들던 분봉을 버리고,
+      is_continuous()로 끊김 없이 수신한 구간인지 확인해서 그 외에는 REST로 다시 채우도록 합니다.
+
+    * 업비트와 같이 체결이 없는 분의 분봉은 만들지 않습니다.
+    """
+
+    def __init__(self):
+        self.bars = {}       # {코인명: 진행 중인(가장 최근) 분봉 [시작 시각, 시가, 고가, 저가, 종가, 거래량, 거래대금, 마지막 체결 ms]}
+        self.pending = {}    # {코인명: 마지막 drain 이후 바뀐 분봉 리스트}
+        self.covered_since = None   # 현재 연결로 수신을 시작한 시각 (epoch 초, None: 연결 안 됨)
+        self.late_trades = 0
+
+    def connected(self):
+        self.covered_since = time.time()
+
+    def disconnected(self):
+        self.covered_since = None
+        self.bars.clear()
+        self.pending.clear()
+
+    def is_continuous(self, since):
+        """since(epoch 초) 이후의 체결을 끊김 없이 모두 받았는지 여부"""
+        return self.covered_since is not None and since is not None and self.covered_since <= since
+
+    def on_trade(self, coin, timestamp_ms, price, volume):
+        start = timestamp_ms // 60_000 * 60
+        bar = self.bars.get(coin)
+        if bar is None or start > bar[_START]:
+            bar = [start, price, price, price, price, volume, price * volume, timestamp_ms]
+            self.bars[coin] = bar
+            self.pending.setdefault(coin, []).append(bar)
+            return
+        if start < bar[_START]:
+            self.late_trades += 1
+            return
+        if price > bar[_HIGH]:
+            bar[_HIGH] = price
+        elif price < bar[_LOW]:
+            bar[_LOW] = price
+        bar[_CLOSE] = price
+        bar[_VOLUME] += volume
+        bar[_TURNOVER] += price * volume
+        bar[_LAST_TRADE] = timestamp_ms
+        touched = self.pending.setdefault(coin, [])
+        if not touched or touched[-1] is not bar:
+            touched.append(bar)
+
+    def drain(self, coin):
+        """
+        :return: 마지막 drain 이후 바뀐 분봉 리스트 (시간 오름차순, 업비트 분봉 응답 형태)
+        """
+        return [_as_candle(bar) for bar in self.pending.pop(coin, ())]
@@ -1,24 +1,59 @@
 import requests
-import tulipy as ti
 import numpy as np
 import time
 import threading
+from calculator.candle_buffer import CandleBuffer
+from calculator.streaming_indicators import StreamingIndicators
+from calculator.market_matrix import calculate_market_indicators
+from calculator.market_universe import MarketUniverse
+from manager.http_client import upbit_url
 
+# 버퍼 크기(지표 계산에 필요한 분봉 개수)와 매 분 추가로 받아올 최근 분봉 개수
+CANDLE_WINDOW = 102
+CANDLE_TOPUP_COUNT = 3
 
-def get_all_krw_coins():
+# 스레드 방식 지표 계산이 사용하는 KRW 마켓 목록 캐시
+krw_universe = MarketUniverse()
+
+
+def fetch_krw_coins():
     """
     업비트 API를 통해 KRW 마켓의 모든 코인 이름을 가져옴.
     """
-    url = "https://api.upbit.com/v1/market/all"
+    url = upbit_url("/v1/market/all")
     response = requests.get(url)
     response.raise_for_status()
     markets = response.json()
 
+    return filter_krw_coins(markets)
+
+
+def get_all_krw_coins():
+    """
+    KRW 마켓의 모든 코인 이름. 캐시된 목록이 만료된 경우에만 API를 조회합니다.
+    """
+    krw_universe.refresh_sync(fetch_krw_coins)
+    return list(krw_universe.coins)
+
+
+def filter_krw_coins(markets):
+    """
+    /v1/market/all 응답에서 거래 대상 KRW 마켓 코인만 추려냄.
+    """
     # KRW 마켓 코인 필터링
-    krw_coins = ['KRW-BTC']
-    # [market["market"] for market in markets if market["market"].startswith("KRW-")]
-    print(krw_coins)
-    return krw_coins
+    return [market["market"] for market in markets if market["market"].startswith("KRW-")]
+
+
+def drop_coins(coins, indicator_store, candle_buffers, indicator_engines, timeframes=None):
+    """
+    상장 폐지된 코인의 지표 행, 분봉 버퍼, 스트리밍 지표 엔진(상위 봉 지표 포함)을 삭제합니다.
+    """
+    for coin in coins:
+        indicator_store.remove(coin)
+        candle_buffers.pop(coin, None)
+        indicator_engines.pop(coin, None)
+        if timeframes is not None:
+            timeframes.remove(coin)
 
 
 def get_minute_candles(coin, count=102):
@@ -29,7 +64,7 @@ def get_minute_candles(coin, count=102):
     :param coin: 코인 이름 (예: KRW-BTC)
     :param count: 가져올 캔들 개수
     """
-    url = "https://api.upbit.com/v1/candles/minutes/1"
+    url = upbit_url("/v1/candles/minutes/1")
     params = {"market": coin, "count": count, "group": "default"}
 
     while True:
@@ -62,72 +97,122 @@ def get_minute_candles(coin, count=102):
             time.sleep(sec)
 
 
-def calculate_indicators_for_coins(coins, indicators_dict):
+def update_candle_buffer(coin, candle_buffers):
     """
-    주어진 코인 리스트에 대해 지표를 계산하고 dictionary에 저장.
+    코인의 분봉 링 버퍼를 갱신합니다.
+    버퍼가 없거나 누락 구간이 생기면 전체 분봉(CANDLE_WINDOW개)으로 다시 채우고,
+    그 외에는 최근 CANDLE_TOPUP_COUNT개의 분봉만 받아서 반영합니다.
+
+    :return: (버퍼, 전체 분봉으로 다시 채웠는지 여부)
+    """
+    buffer = candle_buffers.get(coin)
+    if buffer is None:
+        buffer = CandleBuffer(CANDLE_WINDOW)
+        candle_buffers[coin] = buffer
+    elif buffer.merge(get_minute_candles(coin, count=CANDLE_TOPUP_COUNT)):
+        return buffer, False
+
+    buffer.seed(get_minute_candles(coin, count=CANDLE_WINDOW))
+    return buffer, True
+
+
+def update_indicator_engine(coin, buffer, reseeded, indicator_engines):
+    """
+    새로 마감된 분봉만 스트리밍 지표 엔진에 반영합니다.
+    버퍼를 다시 채운 경우에는 마감된 분봉 전체로 엔진을 다시 만듭니다.
+    """
+    engine = indicator_engines.get(coin)
+    if engine is None:
+        engine = StreamingIndicators(sma_period=20, vwma_period=100)
+        indicator_engines[coin] = engine
+        reseeded = True
+
+    if reseeded:
+        # 마지막 분봉은 진행 중이므로 제외
+        _, close_prices, volumes = buffer.window()
+        engine.seed(close_prices[:-1], volumes[:-1])
+    else:
+        for close, volume in zip(*buffer.closed_candles()):
+            engine.push(close, volume)
+    return engine
+
+
+def store_indicators(coin, buffer, reseeded, indicator_store, indicator_engines):
+    """
+    스트리밍 지표 엔진을 갱신하고 결과를 indicator_store에 저장.
+    """
+    engine = update_indicator_engine(coin, buffer, reseeded, indicator_engines)
+
+    # 결과 저장 (코인의 행을 제자리에서 갱신)
+    # 순서: [T-2 종가, T-1 종가, T-2 거래량, T-1 거래량, T-2 20 이동평균, T-1 20 이동평균, T-2 100 VWMA, T-1 100 VWMA, 현재가]
+    # 현재가: 진행 중인 분봉의 종가
+    indicator_store.update(coin, engine.values() + [buffer.close[buffer._index(0)]])
+
+
+def calculate_indicators_for_coins(coins, indicator_store, candle_buffers, indicator_engines, batched=False,
+                                   timeframes=None):
+    """
+    주어진 코인 리스트에 대해 지표를 계산하고 indicator_store에 저장.
+    지표는 마감된 분봉이 들어올 때마다 스트리밍 엔진에서 O(1)로 갱신됩니다.
+    batched=True 이면 분봉 버퍼만 갱신하고, 지표는 calculate_indicators_batch 에서 한 번에 계산합니다.
+    timeframes(TimeframeIndicators)가 주어지면 마감된 분봉으로 상위 봉 지표도 함께 갱신합니다.
     """
     for coin in coins:
         try:
-            # 분봉 데이터 가져오기
-            candles = get_minute_candles(coin)
-
-            # 종가(close)와 거래량(volume) 추출 - 최근 시간대가 배열 맨 앞 위치
-            close_prices = [candle["trade_price"] for candle in candles]
-            volumes = [candle["candle_acc_trade_volume"] for candle in candles]
+            # 분봉 링 버퍼 갱신
+            buffer, reseeded = update_candle_buffer(coin, candle_buffers)
 
             # 오류 발생시 저장하지 않음
-            if close_prices is None or volumes is None or len(close_prices) != 102:
-                print(f"{coin} 응답 오류, indicators_dict 에 저장하지 않음.")
+            if len(buffer) != CANDLE_WINDOW:
+                print(f"{coin} 응답 오류, indicator_store 에 저장하지 않음.")
                 continue
 
-            # NumPy 배열로 변환
-            close_prices = np.array(close_prices, dtype=float)
-            volumes = np.array(volumes, dtype=float)
+            if timeframes is not None:
+                timeframes.update(coin, buffer)
 
-            # 20분 SMA 계산
-            if len(close_prices) >= 20:
-                ma_20 = ti.sma(close_prices, period=20)
-                t_1_ma_20 = ma_20[-2]
-                t_2_ma_20 = ma_20[-3]
-            else:
-                t_1_ma_20, t_2_ma_20 = None, None
+            if batched:
+                continue
 
-            # 100분 VWMA 계산
-            if len(close_prices) >= 100:
-                vwma_100 = ti.vwma(close_prices, volumes, period=100)
-                t_1_vwma_100 = vwma_100[-2]
-                t_2_vwma_100 = vwma_100[-3]
-            else:
-                t_1_vwma_100, t_2_vwma_100 = None, None
-            # 현재가
-            t_close = close_prices[-1]
-            # T-1의 종가
-            t_1_close = close_prices[-2] if len(close_prices) > 1 else None
-            # T-2의 종가
-            t_2_close = close_prices[-3] if len(close_prices) > 1 else None
-            # T-1의 누적 거래량
-            t_1_volume = volumes[-2] if len(volumes) > 1 else None
-            # T-2의 누적 거래량
-            t_2_volume = volumes[-3] if len(volumes) > 1 else None
-            # 결과 저장
-            # 구조: {코인명: [T-2 종가, T-1 종가, T-2 거래량, T-1 거래량, T-2 20 이동평균, T-1 20 이동평균, T-2 100 VWMA, T-1 100 VWMA, 현재가]}
-            indicators_dict[coin] = [t_2_close, t_1_close, t_2_volume, t_1_volume,
-                                     t_2_ma_20, t_1_ma_20, t_2_vwma_100, t_1_vwma_100, t_close]
-
-            # API 요청 제한 고려 (업비트는 초당 요청 수 제한 있음)
-            # time.sleep(0.5)
+            store_indicators(coin, buffer, reseeded, indicator_store, indicator_engines)
 
         except Exception as e:
             print(f"Error processing {coin}: {e}")
 
 
-def calculate_indicators(indicators_dict, num_threads):
+def calculate_indicators_batch(coins, indicator_store, candle_buffers):
+    """
+    분봉 버퍼가 채워진 코인들의 종가/거래량을 (코인 수 x 윈도우) 행렬로 쌓아
+    전체 마켓의 지표를 한 번의 NumPy 연산으로 계산하고 indicator_store에 저장.
+    """
+    coins = [coin for coin in coins if coin in candle_buffers and len(candle_buffers[coin]) == CANDLE_WINDOW]
+    if not coins:
+        return
+
+    closes = np.empty((len(coins), CANDLE_WINDOW))
+    volumes = np.empty((len(coins), CANDLE_WINDOW))
+    for row, coin in enumerate(coins):
+        _, closes[row], volumes[row] = candle_buffers[coin].window()
+
+    indicators = calculate_market_indicators(closes, volumes, sma_period=20, vwma_period=100)
+    indicator_store.update_many(coins, indicators)
+
+
+def calculate_indicators(indicator_store, candle_buffers, indicator_engines, num_threads, batched=False,
+                         timeframes=None):
     """
-    모든 KRW 코인에 대해 지표를 멀티 스레드를 사용해 계산하고 dictionary에 저장.
-    :param indicators_dict: 결과를 저장할 dictionary
+    모든 KRW 코인에 대해 지표를 멀티 스레드를 사용해 계산하고 indicator_store에 저장.
+    :param indicator_store: 결과를 저장할 IndicatorStore
+    :param candle_buffers: 코인별 분봉 링 버퍼를 저장할 dictionary
+    :param indicator_engines: 코인별 스트리밍 지표 엔진을 저장할 dictionary
     :param num_threads: 사용할 스레드의 개수
+    :param batched: True 이면 스레드에서는 분봉만 갱신하고, 지표는 전체 마켓 행렬로 한 번에 계산
+    :param timeframes: 상위 봉 지표(TimeframeIndicators). None 이면 1분봉 지표만 계산
     """
     krw_coins = get_all_krw_coins()
+    # 목록에서 빠진(상장 폐지된) 코인 정리
+    listed = set(krw_coins)
+    drop_coins([coin for coin in candle_buffers if coin not in listed], indicator_store, candle_buffers,
+               indicator_engines, timeframes)
 
     # 스레드 리스트
     threads = []
@@ -150,10 +235,13 @@ def calculate_indicators(indicators_dict, num_threads):
         # 스레드에 할당할 코인 목록
         coins_slice = krw_coins[start_index:end_index]
 
-        t = threading.Thread(target=calculate_indicators_for_coins, args=(coins_slice, indicators_dict))
+        t = threading.Thread(target=calculate_indicators_for_coins, args=(coins_slice, indicator_store, candle_buffers, indicator_engines, batched, timeframes))
         threads.append(t)
         t.start()
 
     # 스레드가 모두 종료될 때까지 대기
     for t in threads:
-        t.join()
\ No newline at end of file
+        t.join()
+
+    if batched:
+        calculate_indicators_batch(krw_coins, indicator_store, candle_buffers)
\ No newline at end of file
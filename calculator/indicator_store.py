@@ -0,0 +1,115 @@
+import threading
+
+import numpy as np
+
+# 지표 필드 (열 순서)
+INDICATOR_FIELDS = (
+    "t2_close",       # T-2 종가
+    "t1_close",       # T-1 종가
+    "t2_volume",      # T-2 거래량
+    "t1_volume",      # T-1 거래량
+    "t2_ma20",        # T-2 20 이동평균
+    "t1_ma20",        # T-1 20 이동평균
+    "t2_vwma100",     # T-2 100 VWMA
+    "t1_vwma100",     # T-1 100 VWMA
+    "current_price",  # 현재가
+)
+INDICATOR_DTYPE = np.dtype([(field, np.float64) for field in INDICATOR_FIELDS])
+
+
+class IndicatorStore:
+    """
+    코인별 지표를 하나의 연속된 NumPy 배열에 저장하는 지표 저장소.
+
+    - 코인마다 고정된 행(row)을 할당하고, 매 분 해당 행을 제자리에서 갱신합니다. (리스트를 새로 만들지 않음)
+    - records(): 이름으로 필드에 접근할 수 있는 구조화 배열 (예: records()["t1_close"])
+    - matrix(): (코인 수 x 9) float 행렬
+    두 배열 모두 같은 메모리를 공유하는 view이므로 복사 없이 읽을 수 있습니다.
+
+    * 계산되지 않은 지표는 NaN으로 저장됩니다.
+    """
+
+    def __init__(self, capacity=256):
+        self._matrix = np.full((capacity, len(INDICATOR_FIELDS)), np.nan)
+        self._records = self._matrix.view(INDICATOR_DTYPE).reshape(capacity)
+        self.index = {}   # {코인명: 행 번호}
+        self.coins = []   # 행 번호 순서의 코인명
+        # 스레드에서 동시에 새 코인 행을 할당하거나 갱신하는 경우 대비 (행 할당, 갱신, 삭제는 모두 잠금 안에서)
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.coins)
+
+    def __contains__(self, coin):
+        return coin in self.index
+
+    def __iter__(self):
+        return iter(list(self.coins))
+
+    def __getitem__(self, coin):
+        """코인의 지표 레코드 (필드 이름으로 접근 가능한 view)"""
+        return self._records[self.index[coin]]
+
+    def _grow(self):
+        capacity = self._matrix.shape[0] * 2
+        matrix = np.full((capacity, len(INDICATOR_FIELDS)), np.nan)
+        matrix[:len(self.coins)] = self._matrix[:len(self.coins)]
+        self._matrix = matrix
+        self._records = matrix.view(INDICATOR_DTYPE).reshape(capacity)
+
+    def _row(self, coin):
+        # self.lock 을 잡은 상태에서 호출
+        row = self.index.get(coin)
+        if row is None:
+            if len(self.coins) == self._matrix.shape[0]:
+                self._grow()
+            row = len(self.coins)
+            self._matrix[row] = np.nan
+            self.coins.append(coin)
+            self.index[coin] = row
+        return row
+
+    def row(self, coin):
+        """코인에 할당된 행 번호. 처음 보는 코인이면 새 행을 할당합니다."""
+        with self.lock:
+            return self._row(coin)
+
+    def update(self, coin, values):
+        """
+        코인의 지표 행을 제자리에서 갱신합니다.
+        :param values: INDICATOR_FIELDS 순서의 값 9개 (None은 NaN으로 저장)
+        """
+        # 행 번호를 구한 뒤 쓰기 전에 다른 스레드가 배열을 키우거나(_grow) 행을 옮기지(remove) 않도록 잠금
+        with self.lock:
+            self._matrix[self._row(coin)] = values
+
+    def update_many(self, coins, matrix):
+        """여러 코인의 지표 행을 한 번에 갱신합니다. matrix: (코인 수 x 9)"""
+        with self.lock:
+            rows = [self._row(coin) for coin in coins]
+            self._matrix[rows] = matrix
+
+    def remove(self, coin):
+        """
+        코인의 행을 삭제합니다. 배열이 연속되도록 마지막 행을 삭제된 자리로 옮깁니다.
+        """
+        with self.lock:
+            row = self.index.pop(coin, None)
+            if row is None:
+                return
+            last = len(self.coins) - 1
+            if row != last:
+                last_coin = self.coins[last]
+                self._matrix[row] = self._matrix[last]
+                self.coins[row] = last_coin
+                self.index[last_coin] = row
+            self.coins.pop()
+            self._matrix[last] = np.nan
+
+    def records(self):
+        """사용 중인 행의 구조화 배열 view (복사 없음)"""
+        return self._records[:len(self.coins)]
+
+    def matrix(self):
+        """사용 중인 행의 (코인 수 x 9) float 행렬 view (복사 없음)"""
+        return self._matrix[:len(self.coins)]
@@ -0,0 +1,48 @@
+import numpy as np
+
+
+def rolling_sum(matrix, period):
+    """
+    (코인 수 x 시간) 행렬의 각 행에 대해 period 구간 합을 누적합(cumsum)으로 한 번에 계산합니다.
+    결과의 j번째 열은 원본의 [j, j + period) 구간 합입니다.
+
+    :return: (코인 수 x (시간 - period + 1)) 행렬
+    """
+    csum = np.cumsum(matrix, axis=1)
+    csum = np.concatenate([np.zeros((matrix.shape[0], 1)), csum], axis=1)
+    return csum[:, period:] - csum[:, :-period]
+
+
+def rolling_sma(closes, period):
+    """행별 단순 이동평균 (tulipy ti.sma와 같은 정렬)"""
+    return rolling_sum(closes, period) / period
+
+
+def rolling_vwma(closes, volumes, period):
+    """행별 거래량 가중 이동평균 (tulipy ti.vwma와 같은 정렬)"""
+    volume_sum = rolling_sum(volumes, period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return rolling_sum(closes * volumes, period) / volume_sum
+
+
+def calculate_market_indicators(closes, volumes, sma_period=20, vwma_period=100):
+    """
+    전체 코인의 종가/거래량 행렬로 IndicatorStore 와 같은 열 순서(INDICATOR_FIELDS)의 지표 행렬을 계산합니다.
+
+    :param closes: (코인 수 x 윈도우) 종가 행렬. 시간 오름차순이며 마지막 열은 진행 중인 분봉
+    :param volumes: (코인 수 x 윈도우) 거래량 행렬
+    :return: (코인 수 x 9) 행렬
+             [T-2 종가, T-1 종가, T-2 거래량, T-1 거래량,
+              T-2 20 이동평균, T-1 20 이동평균, T-2 100 VWMA, T-1 100 VWMA, 현재가]
+    """
+    closes = np.asarray(closes, dtype=float)
+    volumes = np.asarray(volumes, dtype=float)
+
+    ma_20 = rolling_sma(closes, sma_period)
+    vwma_100 = rolling_vwma(closes, volumes, vwma_period)
+
+    return np.column_stack([
+        closes[:, -3], closes[:, -2], volumes[:, -3], volumes[:, -2],
+        ma_20[:, -3], ma_20[:, -2], vwma_100[:, -3], vwma_100[:, -2],
+        closes[:, -1],
+    ])
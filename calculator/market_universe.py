@@ -0,0 +1,82 @@
+import time
+from datetime import datetime
+
+# 마켓 목록 갱신 주기 기본값 (초). 상장/상장 폐지는 드물기 때문에 매 분 조회하지 않음
+DEFAULT_UNIVERSE_TTL = 3600
+# 조회 실패 시 다시 시도하기까지의 대기 시간 (초)
+RETRY_INTERVAL = 60
+
+
+class MarketUniverse:
+    """
+    KRW 마켓 코인 목록 캐시.
+
+    - 처음 1회 전체 목록을 불러오고, 이후에는 ttl초가 지났을 때만 다시 조회합니다.
+    - refresh()는 이전 목록과 비교한 (신규 상장, 상장 폐지) 코인 리스트를 반환하므로,
+      호출하는 쪽은 전체를 다시 만들지 않고 바뀐 코인만 지표 저장소 / 구독에 반영하면 됩니다.
+    - 조회에 실패하거나 빈 목록을 받으면 기존 목록을 유지하고 RETRY_INTERVAL초 뒤에 다시 시도합니다.
+      (일시적인 오류로 전체 코인이 상장 폐지 처리되지 않도록)
+    """
+
+    def __init__(self, ttl=DEFAULT_UNIVERSE_TTL):
+        self.ttl = ttl
+        self.coins = []
+        self.expires_at = 0.0
+
+    def __len__(self):
+        return len(self.coins)
+
+    def __contains__(self, coin):
+        return coin in self.coins
+
+    def is_stale(self):
+        return time.monotonic() >= self.expires_at
+
+    def apply(self, coins):
+        """
+        새 목록으로 교체하고 변경분을 반환합니다.
+        :return: (신규 상장 코인 리스트, 상장 폐지 코인 리스트)
+        """
+        previous, current = set(self.coins), set(coins)
+        added = [coin for coin in coins if coin not in previous]
+        removed = [coin for coin in self.coins if coin not in current]
+        self.coins = list(coins)
+        self.expires_at = time.monotonic() + self.ttl
+        if self.coins and (added or removed) and previous:
+            print(f"[{datetime.now()}] 마켓 목록 변경 - 신규: {added}, 상장 폐지: {removed}")
+        return added, removed
+
+    def _failed(self, error):
+        if not self.coins:
+            raise error
+        print(f"[{datetime.now()}] 마켓 목록 조회 실패, 기존 목록 유지: {error}")
+        self.expires_at = time.monotonic() + RETRY_INTERVAL
+        return [], []
+
+    async def refresh(self, fetch, force=False):
+        """
+        목록이 만료되었으면 await fetch()로 다시 조회합니다.
+        :param fetch: KRW 코인 리스트를 반환하는 코루틴 함수 (예: AsyncCandleFetcher.get_all_krw_coins)
+        :return: (신규 상장 코인 리스트, 상장 폐지 코인 리스트)
+        """
+        if not force and not self.is_stale():
+            return [], []
+        try:
+            coins = await fetch()
+        except Exception as e:
+            return self._failed(e)
+        if not coins:
+            return self._failed(ValueError("빈 마켓 목록"))
+        return self.apply(coins)
+
+    def refresh_sync(self, fetch, force=False):
+        """refresh()의 동기 버전 (스레드 방식 지표 계산용)"""
+        if not force and not self.is_stale():
+            return [], []
+        try:
+            coins = fetch()
+        except Exception as e:
+            return self._failed(e)
+        if not coins:
+            return self._failed(ValueError("빈 마켓 목록"))
+        return self.apply(coins)
@@ -0,0 +1,114 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from calculator.indicator_store import INDICATOR_FIELDS
+
+CURRENT_PRICE_COLUMN = INDICATOR_FIELDS.index("current_price")
+
+
+class SharedIndicatorTable:
+    """
+    여러 프로세스가 함께 쓰는 공유 메모리 지표 테이블. (IndicatorStore와 같은 열 순서)
+
+    하나의 공유 메모리 블록에 다음 배열을 둡니다.
+      - matrix: (capacity x 9) 지표 행렬. 행 번호는 메인 프로세스가 코인마다 할당해서 worker에 알려줌
+      - seq: 행별 시퀀스 번호 (seqlock). 쓰는 동안 홀수, 다 쓰면 짝수
+      - cycles: shard별 지표 발행 횟수. worker가 한 번의 지표 갱신을 모두 기록한 뒤 1 증가
+      - started: shard별 마지막으로 발행한 지표 갱신의 시작 시각 (epoch 초)
+
+    각 행은 그 코인을 맡은 worker 하나만 기록하므로 쓰기 락이 없고,
+    읽는 쪽은 시퀀스 번호가 읽기 전후로 같고 짝수인 행만 사용해서 기록 중인 행을 읽지 않습니다.
+    """
+
+    def __init__(self, memory, capacity, shards, owner):
+        self.memory = memory
+        self.capacity = capacity
+        self.shards = shards
+        self.owner = owner
+        width = len(INDICATOR_FIELDS)
+        offset = 0
+        self.matrix = np.ndarray((capacity, width), dtype=np.float64, buffer=memory.buf, offset=offset)
+        offset += self.matrix.nbytes
+        self.seq = np.ndarray(capacity, dtype=np.int64, buffer=memory.buf, offset=offset)
+        offset += self.seq.nbytes
+        self.cycles = np.ndarray(shards, dtype=np.int64, buffer=memory.buf, offset=offset)
+        offset += self.cycles.nbytes
+        self.started = np.ndarray(shards, dtype=np.float64, buffer=memory.buf, offset=offset)
+
+    @staticmethod
+    def nbytes(capacity, shards):
+        return capacity * (len(INDICATOR_FIELDS) + 1) * 8 + shards * 2 * 8
+
+    @classmethod
+    def create(cls, capacity, shards):
+        """메인 프로세스에서 새 테이블을 만듭니다. (모든 지표는 NaN)"""
+        memory = shared_memory.SharedMemory(create=True, size=cls.nbytes(capacity, shards))
+        table = cls(memory, capacity, shards, owner=True)
+        table.matrix[:] = np.nan
+        table.seq[:] = 0
+        table.cycles[:] = 0
+        table.started[:] = np.nan
+        return table
+
+    @classmethod
+    def attach(cls, name, capacity, shards):
+        """worker 프로세스에서 메인 프로세스가 만든 테이블에 연결합니다."""
+        # spawn으로 시작된 worker는 메인 프로세스의 resource tracker를 함께 사용하므로 삭제(unlink)는 메인 프로세스가 담당
+        memory = shared_memory.SharedMemory(name=name)
+        return cls(memory, capacity, shards, owner=False)
+
+    @property
+    def name(self):
+        return self.memory.name
+
+    # ---------------------------------------------------------------- 쓰기 (worker)
+    def write_rows(self, rows, values):
+        """여러 행의 지표를 기록합니다. values: (행 수 x 9)"""
+        self.seq[rows] += 1
+        self.matrix[rows] = values
+        self.seq[rows] += 1
+
+    def write_price(self, row, price):
+        """실시간 체결가로 행의 현재가만 기록합니다."""
+        self.seq[row] += 1
+        self.matrix[row, CURRENT_PRICE_COLUMN] = price
+        self.seq[row] += 1
+
+    def publish(self, shard, started):
+        """shard의 지표 갱신이 끝났음을 알림. started: 이번 갱신을 시작한 시각 (epoch 초)"""
+        self.started[shard] = started
+        self.cycles[shard] += 1
+
+    # ---------------------------------------------------------------- 읽기 (메인 프로세스)
+    def read_rows(self, rows, retries=100):
+        """
+        행들의 지표를 복사해서 반환합니다. 기록 중이던 행은 다시 읽습니다.
+        retries번 안에 일관된 값을 읽지 못한 행은 NaN으로 반환합니다. (조건 평가에서 제외됨)
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        values = np.empty((len(rows), self.matrix.shape[1]))
+        pending = np.arange(len(rows))
+        for _ in range(retries):
+            before = self.seq[rows[pending]].copy()
+            values[pending] = self.matrix[rows[pending]]
+            after = self.seq[rows[pending]]
+            torn = (before != after) | (before & 1).astype(bool)
+            pending = pending[torn]
+            if not len(pending):
+                return values
+        values[pending] = np.nan
+        return values
+
+    def cycle_counts(self):
+        return self.cycles.copy()
+
+    def close(self):
+        # numpy view가 공유 메모리 버퍼를 참조하고 있으면 닫을 수 없으므로 먼저 해제
+        self.matrix = self.seq = self.cycles = self.started = None
+        self.memory.close()
+        if self.owner:
+            try:
+                self.memory.unlink()
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,319 @@
+import ast
+import json
+from dataclasses import dataclass, field
+from datetime import time as dtime
+from functools import reduce
+
+import numpy as np
+
+from calculator.indicator_store import INDICATOR_FIELDS
+from calculator.timeframe_aggregator import TIMEFRAME_SECONDS
+
+# 청산 조건에서만 사용할 수 있는 필드 (보유 코인의 매수 평균가)
+BUY_PRICE_FIELD = "buy_price"
+
+# 조건식에서 사용할 수 있는 필드: 1분봉 지표, 상위 봉 지표({필드}_{봉 단위}, 예: t1_close_5m)
+TIMEFRAME_FIELDS = {f"{name}_{timeframe}": (name, timeframe)
+                    for timeframe in TIMEFRAME_SECONDS for name in INDICATOR_FIELDS}
+MARKET_FIELDS = frozenset(INDICATOR_FIELDS) | frozenset(TIMEFRAME_FIELDS)
+
+_COMPARE = {
+    ast.Lt: np.less,
+    ast.LtE: np.less_equal,
+    ast.Gt: np.greater,
+    ast.GtE: np.greater_equal,
+    ast.Eq: np.equal,
+    ast.NotEq: np.not_equal,
+}
+_BINARY = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.divide,
+}
+
+
+@dataclass(frozen=True)
+class Strategy:
+    """
+    선언형 매매 전략.
+
+    - entry: 진입 조건식 리스트 (모두 만족해야 target). 예: "t1_volume > t2_volume * volume_surge_ratio"
+    - exit: 청산 조건식 리스트 (하나라도 만족하면 매도, 매 분 평가). buy_price(매수 평균가) 필드를 사용할 수 있음
+    - take_profit: 익절 배수 (현재가 >= 매수가 x take_profit 이면 즉시 매도, None: 사용 안 함)
+    - entry_time: 매수 시각 "HH:MM" (KST, 이미 지났으면 다음 날), None 이면 선택 즉시 매수
+    - params: 조건식에서 이름으로 사용하는 상수. 같은 조건식에 값만 바꾼 변형 전략을 만들 때 사용
+
+    조건식은 지표 필드, params, 숫자와 비교(< <= > >= == !=), 사칙연산, and / or / not 만 사용할 수 있습니다.
+    조건식이 참조하는 필드 중 하나라도 값이 없는(NaN) 코인은 조건을 만족하지 않는 것으로 처리됩니다. (not / != 포함)
+    """
+    name: str
+    entry: tuple
+    exit: tuple = ()
+    take_profit: float | None = None
+    entry_time: str | None = None
+    params: dict = field(default_factory=dict)
+
+    def __post_init__(self):
+        object.__setattr__(self, "entry", tuple(self.entry))
+        object.__setattr__(self, "exit", tuple(self.exit))
+        if not self.entry:
+            raise ValueError(f"{self.name}: 진입 조건이 없습니다.")
+        if self.take_profit is None and not self.exit:
+            raise ValueError(f"{self.name}: 익절 배수나 청산 조건 중 하나는 있어야 합니다.")
+        if self.entry_time is not None:
+            dtime.fromisoformat(self.entry_time)
+
+    @property
+    def entry_clock(self):
+        """매수 시각 (datetime.time, None: 즉시 매수)"""
+        return dtime.fromisoformat(self.entry_time) if self.entry_time is not None else None
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            name=data["name"],
+            entry=data["entry"],
+            exit=data.get("exit", ()),
+            take_profit=data.get("take_profit"),
+            entry_time=data.get("entry_time"),
+            params=data.get("params", {}),
+        )
+
+
+def load_strategies(path):
+    """전략 정의 JSON 파일(전략 dict 리스트)을 읽어서 Strategy 리스트로 반환합니다."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [Strategy.from_dict(data) for data in json.load(f)]
+
+
+class _Compiler:
+    """
+    조건식을 NumPy 연산 함수로 변환합니다. (eval 사용 안 함)
+
+    각 노드는 (정규화된 식 문자열, 함수) 로 변환되며, 함수는 평가 중 같은 식의 결과를 cache에서 재사용합니다.
+    params는 컴파일 시점에 상수로 치환되므로, 서로 다른 전략의 같은 식(예: "t1_ma20 < t1_close")은
+    한 번의 평가에서 한 번만 계산됩니다.
+    """
+
+    def __init__(self, params, allowed):
+        self.params = params
+        self.allowed = allowed
+        self.names = set()
+
+    def compile(self, source):
+        try:
+            tree = ast.parse(source, mode="eval")
+        except SyntaxError as e:
+            raise ValueError(f"조건식 문법 오류: {source!r}") from e
+        return self._node(tree.body)
+
+    def _cached(self, key, function):
+        def evaluate(fields, cache):
+            value = cache.get(key)
+            if value is None:
+                value = cache[key] = function(fields, cache)
+            return value
+        return key, evaluate
+
+    def _node(self, node):
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) \
+                and not isinstance(node.value, bool):
+            value = float(node.value)
+            return repr(value), lambda fields, cache: value
+
+        if isinstance(node, ast.Name):
+            if node.id in self.params:
+                value = float(self.params[node.id])
+                return repr(value), lambda fields, cache: value
+            if node.id not in self.allowed:
+                raise ValueError(f"알 수 없는 필드: {node.id}")
+            self.names.add(node.id)
+            name = node.id
+            return name, lambda fields, cache: fields[name]
+
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.Not)):
+            key, operand = self._node(node.operand)
+            if isinstance(node.op, ast.USub):
+                return self._cached(f"(-{key})", lambda fields, cache: np.negative(operand(fields, cache)))
+            return self._cached(f"(not {key})", lambda fields, cache: np.logical_not(operand(fields, cache)))
+
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY:
+            op = _BINARY[type(node.op)]
+            left_key, left = self._node(node.left)
+            right_key, right = self._node(node.right)
+            return self._cached(f"({left_key} {type(node.op).__name__} {right_key})",
+                                lambda fields, cache: op(left(fields, cache), right(fields, cache)))
+
+        if isinstance(node, ast.Compare):
+            # a < b < c -> (a < b) and (b < c)
+            if any(type(op_node) not in _COMPARE for op_node in node.ops):
+                raise ValueError(f"지원하지 않는 비교 연산: {ast.unparse(node)}")
+            operands = [self._node(operand) for operand in [node.left, *node.comparators]]
+            parts = []
+            for (left_key, left), op_node, (right_key, right) in zip(operands, node.ops, operands[1:]):
+                op = _COMPARE[type(op_node)]
+                parts.append(self._cached(
+                    f"({left_key} {type(op_node).__name__} {right_key})",
+                    lambda fields, cache, op=op, left=left, right=right: op(left(fields, cache), right(fields, cache))))
+            return self._all(parts)
+
+        if isinstance(node, ast.BoolOp):
+            parts = [self._node(value) for value in node.values]
+            return self._all(parts) if isinstance(node.op, ast.And) else self._any(parts)
+
+        raise ValueError(f"지원하지 않는 식: {ast.unparse(node)}")
+
+    def _all(self, parts):
+        if len(parts) == 1:
+            return parts[0]
+        functions = [function for _, function in parts]
+        return self._cached("(" + " and ".join(sorted(key for key, _ in parts)) + ")",
+                            lambda fields, cache: reduce(np.logical_and, [f(fields, cache) for f in functions]))
+
+    def _any(self, parts):
+        if len(parts) == 1:
+            return parts[0]
+        functions = [function for _, function in parts]
+        return self._cached("(" + " or ".join(sorted(key for key, _ in parts)) + ")",
+                            lambda fields, cache: reduce(np.logical_or, [f(fields, cache) for f in functions]))
+
+    def _finite(self, function):
+        """
+        조건식이 참조하는 필드 중 하나라도 NaN인 코인은 조건 불만족으로 처리합니다.
+        (NaN 비교는 항상 False이므로 not / != 를 거치면 True가 되어 값이 없는 코인이 조건을 만족하게 됨)
+        """
+        checks = [self._cached(f"(finite {name})", lambda fields, cache, name=name: np.isfinite(fields[name]))[1]
+                  for name in sorted(self.names)]
+        return lambda fields, cache: reduce(np.logical_and, [function(fields, cache)]
+                                            + [check(fields, cache) for check in checks])
+
+    def compile_all(self, sources):
+        """조건식 리스트를 모두 만족(and)하는 하나의 함수로 변환"""
+        return self._finite(self._all([self.compile(source) for source in sources])[1])
+
+    def compile_any(self, sources):
+        """조건식 리스트 중 하나라도 만족(or)하는 하나의 함수로 변환"""
+        return self._finite(self._any([self.compile(source) for source in sources])[1])
+
+
+def market_fields(indicator_store, names=INDICATOR_FIELDS, timeframes=None):
+    """
+    조건식 평가에 사용할 {필드명: 코인별 배열} 딕셔너리를 만듭니다. (행 순서: indicator_store.coins)
+    1분봉 필드는 indicator_store 배열의 view(복사 없음)이고,
+    상위 봉 필드({필드}_{봉 단위})는 timeframes(TimeframeIndicators)의 값을 indicator_store 행 순서로 맞춰 가져옵니다.
+    (해당 봉 단위 지표가 없으면 NaN -> 조건 불만족)
+    """
+    records = indicator_store.records()
+    fields = {name: records[name] for name in INDICATOR_FIELDS}
+    aligned = {}
+    for name in names:
+        if name not in TIMEFRAME_FIELDS:
+            continue
+        field_name, timeframe = TIMEFRAME_FIELDS[name]
+        if timeframe not in aligned:
+            values = np.full((len(indicator_store), len(INDICATOR_FIELDS)), np.nan)
+            if timeframes is not None and timeframe in timeframes.stores:
+                store = timeframes[timeframe]
+                rows = np.array([store.index.get(coin, -1) for coin in indicator_store.coins], dtype=np.intp)
+                found = rows >= 0
+                values[found] = store.matrix()[rows[found]]
+            aligned[timeframe] = values
+        fields[name] = aligned[timeframe][:, INDICATOR_FIELDS.index(field_name)]
+    return fields
+
+
+class StrategyEngine:
+    """
+    여러 전략의 조건식을 미리 컴파일해 두고, 전체 마켓 지표 배열에 대해 한 번에 평가하는 전략 엔진.
+
+    - evaluate(): 모든 전략의 진입 mask를 반환합니다. 전략 간에 같은 식은 한 번만 계산합니다.
+    - classify(): 진입 조건에 부합하는 코인을 (target, 코인별 전략) 으로 반환합니다.
+      여러 전략에 부합하는 코인은 먼저 등록된 전략을 사용합니다.
+    - exit_signals(): 보유 코인 중 자신의 전략 청산 조건을 만족하는 코인을 반환합니다.
+
+    지표 배열은 (코인 수) 1차원 배열뿐 아니라 (코인 수 x 시간) 행렬도 그대로 평가할 수 있습니다. (백테스트)
+    """
+
+    def __init__(self, strategies):
+        self.strategies = {}
+        self.entries = {}
+        self.exits = {}
+        self.names = set()
+        for strategy in strategies:
+            if strategy.name in self.strategies:
+                raise ValueError(f"중복된 전략 이름: {strategy.name}")
+            compiler = _Compiler(strategy.params, MARKET_FIELDS)
+            self.entries[strategy.name] = compiler.compile_all(strategy.entry)
+            if strategy.exit:
+                exit_compiler = _Compiler(strategy.params, MARKET_FIELDS | {BUY_PRICE_FIELD})
+                self.exits[strategy.name] = exit_compiler.compile_any(strategy.exit)
+                compiler.names |= exit_compiler.names
+            self.strategies[strategy.name] = strategy
+            self.names |= compiler.names
+        if not self.strategies:
+            raise ValueError("전략이 없습니다.")
+        self.names.discard(BUY_PRICE_FIELD)
+        self.default = next(iter(self.strategies.values()))
+
+    def strategy(self, name):
+        """전략 이름으로 Strategy를 반환합니다. (이름이 없거나 모르는 전략이면 첫 번째 전략)"""
+        return self.strategies.get(name, self.default)
+
+    def evaluate(self, fields):
+        """
+        :param fields: {필드명: 배열} 또는 INDICATOR_FIELDS 구조화 배열
+        :return: {전략 이름: 진입 boolean mask}
+        """
+        cache = {}
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return {name: np.asarray(entry(fields, cache), dtype=bool) for name, entry in self.entries.items()}
+
+    def evaluate_exits(self, fields, names=None):
+        """
+        :param fields: buy_price 필드가 포함된 {필드명: 배열}
+        :return: {전략 이름: 청산 boolean mask} (청산 조건이 있는 전략만)
+        """
+        cache = {}
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return {name: np.asarray(self.exits[name](fields, cache), dtype=bool)
+                    for name in (self.exits if names is None else names) if name in self.exits}
+
+    def classify(self, indicator_store, timeframes=None):
+        """
+        :return: (target {코인명: 현재가}, {코인명: 전략 이름})
+        """
+        if not len(indicator_store):
+            return {}, {}
+        fields = market_fields(indicator_store, self.names, timeframes)
+        masks = self.evaluate(fields)
+
+        # 먼저 등록된 전략이 우선
+        owner = np.full(len(indicator_store), -1)
+        for index, mask in reversed(list(enumerate(masks.values()))):
+            owner[mask] = index
+        rows = np.flatnonzero(owner >= 0)
+        names = list(masks)
+        coins = [indicator_store.coins[row] for row in rows]
+        targets = dict(zip(coins, fields["current_price"][rows].tolist()))
+        strategies = dict(zip(coins, [names[index] for index in owner[rows].tolist()]))
+        return targets, strategies
+
+    def exit_signals(self, indicator_store, positions, timeframes=None):
+        """
+        :param positions: 보유 코인 {코인명: (전략 이름, 매수 평균가)}
+        :return: 청산 조건을 만족하는 코인 리스트
+        """
+        held = {coin: position for coin, position in positions.items()
+                if position[0] in self.exits and coin in indicator_store}
+        if not held:
+            return []
+        fields = market_fields(indicator_store, self.names, timeframes)
+        rows = np.array([indicator_store.index[coin] for coin in held], dtype=np.intp)
+        fields = {name: values[rows] for name, values in fields.items()}
+        fields[BUY_PRICE_FIELD] = np.array([buy_price for _, buy_price in held.values()], dtype=np.float64)
+        names = np.array([name for name, _ in held.values()])
+        signaled = np.zeros(len(held), dtype=bool)
+        for name, mask in self.evaluate_exits(fields, set(names.tolist())).items():
+            signaled |= mask & (names == name)
+        return [coin for coin, hit in zip(held, signaled.tolist()) if hit]
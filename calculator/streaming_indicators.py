@@ -0,0 +1,106 @@
+class StreamingIndicators:
+    """
+    마감된 분봉이 들어올 때마다 누적합(running sum)으로 SMA / VWMA를 O(1)에 갱신합니다.
+
+    tulipy의 ti.sma, ti.vwma와 같은 방식(구간 합에 새 값을 더하고 빠지는 값을 뺌)으로 계산하며,
+    부동소수점 오차가 쌓이지 않도록 RESYNC_INTERVAL 번마다 구간 합을 처음부터 다시 계산합니다.
+
+    T-1: 가장 최근에 마감된 분봉, T-2: 그 직전 분봉
+    """
+
+    RESYNC_INTERVAL = 1000
+
+    def __init__(self, sma_period=20, vwma_period=100):
+        self.sma_period = sma_period
+        self.vwma_period = vwma_period
+        self.capacity = max(sma_period, vwma_period)
+        self.reset()
+
+    def reset(self):
+        self.closes = [0.0] * self.capacity
+        self.volumes = [0.0] * self.capacity
+        self.head = 0
+        self.count = 0
+        self.close_sum = 0.0
+        self.pv_sum = 0.0
+        self.volume_sum = 0.0
+        self.pushes_since_resync = 0
+
+        # [T-2, T-1] 값
+        self.close = [None, None]
+        self.volume = [None, None]
+        self.sma = [None, None]
+        self.vwma = [None, None]
+
+    def _at(self, back):
+        """가장 최근 값 기준 back 번째 이전 값의 위치 (0: 최신)"""
+        return (self.head - 1 - back) % self.capacity
+
+    def _resync(self):
+        sma_n = min(self.count, self.sma_period)
+        vwma_n = min(self.count, self.vwma_period)
+        self.close_sum = sum(self.closes[self._at(i)] for i in range(sma_n))
+        self.pv_sum = sum(self.closes[self._at(i)] * self.volumes[self._at(i)] for i in range(vwma_n))
+        self.volume_sum = sum(self.volumes[self._at(i)] for i in range(vwma_n))
+        self.pushes_since_resync = 0
+
+    def push(self, close, volume):
+        """
+        마감된 분봉 1개를 반영합니다.
+        """
+        close = float(close)
+        volume = float(volume)
+
+        # 구간을 벗어나는 값 (링 버퍼를 덮어쓰기 전에 읽어야 함)
+        old_sma_close = self.closes[self._at(self.sma_period - 1)] if self.count >= self.sma_period else None
+        if self.count >= self.vwma_period:
+            old_idx = self._at(self.vwma_period - 1)
+            old_vwma_close, old_vwma_volume = self.closes[old_idx], self.volumes[old_idx]
+        else:
+            old_vwma_close, old_vwma_volume = None, None
+
+        self.closes[self.head] = close
+        self.volumes[self.head] = volume
+        self.head = (self.head + 1) % self.capacity
+        self.count += 1
+        self.pushes_since_resync += 1
+
+        self.close_sum += close
+        self.pv_sum += close * volume
+        self.volume_sum += volume
+        if old_sma_close is not None:
+            self.close_sum -= old_sma_close
+        if old_vwma_close is not None:
+            self.pv_sum -= old_vwma_close * old_vwma_volume
+            self.volume_sum -= old_vwma_volume
+
+        if self.pushes_since_resync >= self.RESYNC_INTERVAL:
+            self._resync()
+
+        # T-1 값을 T-2로 밀어내고 새 T-1 값 기록
+        sma = self.close_sum / self.sma_period if self.count >= self.sma_period else None
+        if self.count >= self.vwma_period:
+            vwma = self.pv_sum / self.volume_sum if self.volume_sum else None
+        else:
+            vwma = None
+        self.close = [self.close[1], close]
+        self.volume = [self.volume[1], volume]
+        self.sma = [self.sma[1], sma]
+        self.vwma = [self.vwma[1], vwma]
+
+    def seed(self, closes, volumes):
+        """
+        마감된 분봉 전체(시간 오름차순)로 상태를 다시 만듭니다.
+        """
+        self.reset()
+        for close, volume in zip(closes, volumes):
+            self.push(close, volume)
+
+    def values(self):
+        """
+        [T-2 종가, T-1 종가, T-2 거래량, T-1 거래량,
+         T-2 20 이동평균, T-1 20 이동평균, T-2 100 VWMA, T-1 100 VWMA]
+        """
+        return [self.close[0], self.close[1], self.volume[0], self.volume[1],
+                self.sma[0], self.sma[1], self.vwma[0], self.vwma[1]]
+
@@ -1,12 +1,40 @@
-import threading
+from calculator.strategy import Strategy, StrategyEngine
 
-def process_coin(coin, values, target_dict, lock):
+# 조건 3. T-1 거래량이 T-2 거래량의 몇 배보다 커야 하는지
+VOLUME_SURGE_RATIO = 3
+# 조건 5. T-1 거래대금(T-1 거래량 x T-1 종가) 하한 (원)
+MIN_TURNOVER_KRW = 30_000_000
+
+# 기본 전략: 아래 5개 조건으로 스크리닝, KST 09:00 매수, +3% 익절
+DEFAULT_STRATEGY = Strategy(
+    name="default",
+    entry=(
+        # 조건 1
+        "t2_ma20 < t2_close", "t2_vwma100 < t2_close",
+        # 조건 2
+        "t1_ma20 < t1_close", "t1_vwma100 < t1_close",
+        # 조건 3
+        "t1_volume > t2_volume * volume_surge_ratio",
+        # 조건 4
+        "current_price > t1_close",
+        # 조건 5
+        "t1_volume * t1_close > min_turnover",
+    ),
+    take_profit=1.03,
+    entry_time="09:00",
+    params={"volume_surge_ratio": VOLUME_SURGE_RATIO, "min_turnover": MIN_TURNOVER_KRW},
+)
+
+_default_engine = StrategyEngine([DEFAULT_STRATEGY])
+
+
+def classify_mask(indicators):
     """
-    개별 코인에 대해 조건을 확인하여, 조건에 부합하면 target_dict에 추가하는 함수.
+    지표 레코드 배열에 대해 기본 전략(DEFAULT_STRATEGY)의 진입 조건을 한 번에 평가하여,
+    조건에 부합하는 코인의 boolean mask를 반환하는 함수.
 
-    indicators 리스트의 구조:
-      [T-2 종가, T-1 종가, T-2 거래량, T-1 거래량,
-       T-2 20 이동평균, T-1 20 이동평균, T-2 100 VWMA, T-1 100 VWMA, 현재가]
+    :param indicators: INDICATOR_FIELDS 이름으로 열에 접근할 수 있는 배열
+                       (IndicatorStore.records() 구조화 배열, 또는 {필드명: 배열} 딕셔너리)
 
     조건:
       1. T-2 20 이동평균과 T-2 100 VWMA가 T-2 종가보다 낮아야 함.
@@ -14,42 +42,28 @@ def process_coin(coin, values, target_dict, lock):
       3. T-1 거래량이 T-2 거래량의 3배보다 커야 함.
       4. 현재가가 T-1 종가보다 높아야 함.
       5. T-1 거래량 x T-1 종가 > 30_000_000
+
+    * 값이 없는(NaN) 지표가 포함된 코인은 조건을 만족하지 않는 것으로 처리됩니다.
     """
-    # 각 값 추출
-    t2_close    = values[0]
-    t1_close    = values[1]
-    t2_volume   = values[2]
-    t1_volume   = values[3]
-    t2_ma20     = values[4]
-    t1_ma20     = values[5]
-    t2_vwma100  = values[6]
-    t1_vwma100  = values[7]
-    current_price = values[8]
-
-    # 조건 계산
-    with lock:
-        target_dict[coin] = current_price
-
-def classify_targets(indicators_dict, target_dict):
+    return _default_engine.evaluate(indicators)[DEFAULT_STRATEGY.name]
+
+
+def classify_targets(indicator_store, target_dict, engine=None, strategy_dict=None, timeframes=None):
     """
-    indicators_dict에 저장된 모든 코인에 대해 조건을 평가하여, 조건에 부합하는 코인을
-    쓰레드를 병렬로 처리한 후 target_dict에 (코인명:현재가) 형태로 저장합니다.
+    indicator_store에 저장된 모든 코인에 대해 전략 조건을 하나의 boolean mask로 평가하여,
+    조건에 부합하는 코인을 target_dict에 (코인명:현재가) 형태로 한 번에 저장합니다.
 
     :parameter
-      - indicators_dict: dict
-            구조: {코인명: [T-2 종가, T-1 종가, T-2 거래량, T-1 거래량,
-                           T-2 20 이동평균, T-1 20 이동평균, T-2 100 VWMA, T-1 100 VWMA, 현재가]}
+      - indicator_store: IndicatorStore
+            코인별 행을 가진 지표 구조화 배열 (복사 없이 records() view로 읽음)
       - target_dict: dict
             구조: {코인명: 현재가}
+      - engine: StrategyEngine (None: 기본 전략만 평가)
+      - strategy_dict: dict
+            주어지면 {코인명: 선택된 전략 이름} 을 함께 저장
+      - timeframes: 상위 봉 지표를 사용하는 전략용 TimeframeIndicators
     """
-    lock = threading.Lock()
-    threads = []
-
-    for coin, values in indicators_dict.items():
-        thread = threading.Thread(target=process_coin, args=(coin, values, target_dict, lock))
-        threads.append(thread)
-        thread.start()
-
-    # 모든 쓰레드가 종료될 때까지 대기
-    for thread in threads:
-        thread.join()
\ No newline at end of file
+    targets, strategies = (engine or _default_engine).classify(indicator_store, timeframes)
+    target_dict.update(targets)
+    if strategy_dict is not None:
+        strategy_dict.update(strategies)
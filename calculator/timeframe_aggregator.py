@@ -0,0 +1,134 @@
+import numpy as np
+
+from calculator.indicator_store import IndicatorStore
+from calculator.streaming_indicators import StreamingIndicators
+
+# 지원하는 상위 봉 단위 (초). 일봉은 업비트와 같이 UTC 00:00(KST 09:00) 기준
+TIMEFRAME_SECONDS = {
+    "3m": 180,
+    "5m": 300,
+    "15m": 900,
+    "60m": 3600,
+    "1d": 86400,
+}
+
+
+def parse_timeframes(value):
+    """
+    "5m,15m" 형태의 문자열을 봉 단위 튜플로 변환합니다. 지원하지 않는 단위는 ValueError.
+    """
+    timeframes = tuple(part.strip() for part in value.split(",") if part.strip())
+    unknown = [timeframe for timeframe in timeframes if timeframe not in TIMEFRAME_SECONDS]
+    if unknown:
+        raise ValueError(f"지원하지 않는 봉 단위: {unknown} (지원: {', '.join(TIMEFRAME_SECONDS)})")
+    return timeframes
+
+
+class TimeframeAggregator:
+    """
+    마감된 1분봉으로 코인 하나의 상위 봉(3/5/15/60분, 일봉)을 만들고, 봉 단위별 스트리밍 지표 엔진을 갱신합니다.
+
+    - push(): 마감된 1분봉 1개를 봉 단위마다 진행 중인 봉에 더합니다. (종가: 마지막 1분봉 종가, 거래량: 합)
+      1분봉이 상위 봉의 마지막 1분이거나 다음 구간의 1분봉이 들어오면 상위 봉을 마감하고 지표 엔진에 반영합니다.
+      처음 반영한 1분봉보다 먼저 시작된 봉(시작 직후의 일부만 있는 봉)은 버립니다.
+      1분봉 1개당 봉 단위 수만큼의 O(1) 작업만 하며, REST 요청은 하지 않습니다.
+    - 상위 봉 지표는 프로그램 실행 이후 메모리에 모인 1분봉으로만 만들어지므로,
+      봉 단위 x 지표 기간 만큼의 시간이 지나야 값이 채워집니다. (그 전에는 None)
+    """
+
+    def __init__(self, timeframes, sma_period=20, vwma_period=100):
+        self.timeframes = tuple(timeframes)
+        self.periods = [TIMEFRAME_SECONDS[timeframe] for timeframe in self.timeframes]
+        self.engines = [StreamingIndicators(sma_period, vwma_period) for _ in self.timeframes]
+        self.bars = [None] * len(self.timeframes)   # 봉 단위별 진행 중인 봉 [시작 시각, 종가, 거래량]
+        self.first_timestamp = None                 # 처음 반영한 1분봉 시작 시각
+        self.last_timestamp = None                  # 마지막으로 반영한 1분봉 시작 시각
+
+    def push(self, timestamp, close, volume):
+        """
+        마감된 1분봉 1개를 반영합니다.
+        :param timestamp: 1분봉 시작 시각 (epoch 초)
+        """
+        if self.first_timestamp is None:
+            self.first_timestamp = timestamp
+        for i, period in enumerate(self.periods):
+            start = timestamp - timestamp % period
+            bar = self.bars[i]
+            if bar is not None and start > bar[0]:
+                # 마지막 1분에 체결이 없어 마감되지 않은 봉
+                self._close(i, bar)
+                bar = None
+            if bar is None:
+                bar = [start, close, volume]
+            else:
+                bar[1] = close
+                bar[2] += volume
+            if timestamp + 60 >= start + period:
+                self._close(i, bar)
+                bar = None
+            self.bars[i] = bar
+        self.last_timestamp = timestamp
+
+    def _close(self, i, bar):
+        # 처음 반영한 1분봉 이전에 시작된 봉은 앞부분 1분봉이 빠져 있으므로 지표에 반영하지 않음
+        if bar[0] >= self.first_timestamp:
+            self.engines[i].push(bar[1], bar[2])
+
+    def push_closed(self, timestamps, closes, volumes):
+        """
+        마감된 1분봉 배열(시간 오름차순) 중 아직 반영하지 않은 분봉만 반영합니다.
+        (분봉 버퍼 전체를 넘겨도 새로 마감된 분봉만 처리)
+        """
+        first = 0 if self.last_timestamp is None else int(np.searchsorted(timestamps, self.last_timestamp, "right"))
+        for timestamp, close, volume in zip(timestamps[first:].tolist(), closes[first:].tolist(),
+                                            volumes[first:].tolist()):
+            self.push(timestamp, close, volume)
+
+    def values(self, timeframe):
+        """
+        봉 단위의 [T-2 종가, T-1 종가, T-2 거래량, T-1 거래량,
+                  T-2 20 이동평균, T-1 20 이동평균, T-2 100 VWMA, T-1 100 VWMA]
+        """
+        return self.engines[self.timeframes.index(timeframe)].values()
+
+
+class TimeframeIndicators:
+    """
+    전체 코인의 상위 봉 지표.
+    봉 단위마다 IndicatorStore를 하나씩 두므로, 전략 조건식에서 {필드}_{봉 단위} (예: t1_close_5m) 로 사용할 수 있습니다.
+
+    - stores: {봉 단위: IndicatorStore} (현재가는 진행 중인 1분봉의 종가)
+    - aggregators: {코인명: TimeframeAggregator}
+    """
+
+    def __init__(self, timeframes, sma_period=20, vwma_period=100):
+        self.timeframes = tuple(timeframes)
+        self.sma_period = sma_period
+        self.vwma_period = vwma_period
+        self.stores = {timeframe: IndicatorStore() for timeframe in self.timeframes}
+        self.aggregators = {}
+
+    def __getitem__(self, timeframe):
+        return self.stores[timeframe]
+
+    def update(self, coin, buffer):
+        """
+        코인의 1분봉 버퍼에서 새로 마감된 분봉을 상위 봉에 반영하고, 봉 단위별 지표를 저장합니다.
+        (분봉 버퍼를 다시 채운 경우에도 이미 반영한 분봉 이후만 반영)
+        """
+        aggregator = self.aggregators.get(coin)
+        if aggregator is None:
+            aggregator = TimeframeAggregator(self.timeframes, self.sma_period, self.vwma_period)
+            self.aggregators[coin] = aggregator
+
+        # 마지막 분봉은 진행 중이므로 제외
+        timestamps, closes, volumes = buffer.window()
+        aggregator.push_closed(timestamps[:-1], closes[:-1], volumes[:-1])
+        current_price = float(closes[-1])
+        for timeframe, store in self.stores.items():
+            store.update(coin, aggregator.values(timeframe) + [current_price])
+
+    def remove(self, coin):
+        self.aggregators.pop(coin, None)
+        for store in self.stores.values():
+            store.remove(coin)
@@ -1,5 +1,12 @@
+import signal
+from datetime import datetime
 from manager.websocket_manager import public_websocket_connect
-from manager.coin_data_manager import update_prices, update_indicators_periodically, update_trading_dict, update_wallet_realtime
+from manager.coin_data_manager import update_prices, update_indicators_periodically, update_trading_dict, update_wallet_realtime, \
+    update_wallet_private, update_indicators_sharded, update_candles_from_trades
+from manager.http_client import warm_up, close_clients
+from manager.latency_metrics import serve_metrics
+from manager.market_shards import ShardedMarket
+from manager.webhook_manager import close_webhooks
 from trading import execute_trades
 from shared_resources import *
 
@@ -7,65 +14,150 @@ async def main():
     """
     프로그램을 실행하는 메인함수입니다. 비동기적인 작업을 동시에 실행합니다.
 
-    indicators_dict:
-        특정 코인의 여러 지표를 저장하는 딕셔너리
-        구조: {코인명: [T-2 종가, T-1 종가, T-2 거래량, T-1 거래량,
-                        T-2 20 이동평균, T-1 20 이동평균,
-                        T-2 100 VWMA, T-1 100 VWMA, 현재가]}
-        업데이트 주기 : 매 분
-
-    target_dict:
-        거래 대상이 되는 코인과 현재가를 저장하는 딕셔너리
+    indicator_store:
+        특정 코인의 여러 지표를 저장하는 지표 저장소 (IndicatorStore)
+        구조: 코인별 행을 가진 NumPy 구조화 배열, 필드(열) 순서:
+              [T-2 종가, T-1 종가, T-2 거래량, T-1 거래량,
+               T-2 20 이동평균, T-1 20 이동평균,
+               T-2 100 VWMA, T-1 100 VWMA, 현재가]
+        업데이트 주기 : 매 분 (코인별 행을 제자리에서 갱신)
+        SHARD_WORKERS 설정 시 worker 프로세스들이 공유 메모리 테이블에 계산한 지표를 매 분 복사해 옴
+
+    candle_buffers:
+        코인별 분봉(종가, 거래량, 시작 시각)을 보관하는 NumPy 링 버퍼 딕셔너리
+        구조: {코인명: CandleBuffer}
+        최초 1회 102개 분봉으로 채운 뒤, 매 분 최근 3개 분봉만 받아서 갱신
+        CANDLE_STREAM_MODE 설정 시 candle_builder가 체결로 만든 분봉으로 갱신 (연결이 끊겼던 구간만 REST 조회)
+
+    indicator_engines:
+        코인별 SMA-20 / VWMA-100 스트리밍 지표 엔진 딕셔너리
+        구조: {코인명: StreamingIndicators}
+        마감된 분봉이 들어올 때만 누적합으로 O(1) 갱신
+
+    timeframe_indicators:
+        INDICATOR_TIMEFRAMES 설정 시 1분봉으로 만든 상위 봉(3/5/15/60분, 일봉) 지표 (TimeframeIndicators)
+        구조: {봉 단위: IndicatorStore} (indicator_store와 같은 열 순서)
+        매 분 새로 마감된 1분봉만 상위 봉에 더하고, 상위 봉이 마감될 때 O(1) 갱신 (추가 REST 요청 없음)
+
+    trading_state:
+        target / trading / active 코인 상태를 소유하는 단일 writer actor (TradingStateActor)
+        각 Task는 명령(replace_targets, fill_trading, start_trade, finish_trade)으로만 상태를 바꾸고,
+        버전이 붙은 불변 스냅샷(trading_state.snapshot)을 락 없이 읽음
+        - targets: 조건에 부합하는 코인 {코인명: 현재가}, 업데이트 주기 : 매 분
+        - trading: targets에서 랜덤하게 선택된 최대 5개의 코인 {코인명: 선택 시점의 현재가}, 업데이트 주기 : 3초
+          (실시간 현재가는 price_cache에서 읽음)
+        - active: 거래가 진행 중인 코인
+        - strategies: target / trading 코인을 선택한 전략 이름 (process_trade 가 전략의 매수 시각, 익절 배수를 사용)
+
+    strategy_engine:
+        STRATEGY_FILE 의 전략들(없으면 기본 전략)의 진입/청산 조건식을 NumPy mask 연산으로 컴파일한 전략 엔진
+        매 분 전체 마켓에 대해 모든 전략을 한 번에 평가하고, 거래 중인 코인의 청산 조건을 확인
+
+    price_cache:
+        실시간 ticker 웹소켓으로 받은 최신 현재가를 저장하는 딕셔너리
         구조: {코인명: 현재가}
-        * target_dict 현재가도 1초마다 업데이트를 진행하면, 요청 수 초과 우려가 있음.
-        trading_dict에서 거래로 넘어가는 도중 trading_dict가 업데이트 됨.
-        따라서 현재가를 따로 업데이트 하지는 않고 코인 정보만 업데이트.
+        웹소켓 수신 Task만 기록하며, 락 없이 읽음
 
-    trading_dict:
-        target_dict에서 랜덤하게 선택된 최대 5개의 코인을 저장하는 딕셔너리
-        구조: {코인명: 현재가}
-        코인 업데이트 주기 : 3초
-        현재가 업데이트 주기 : 1초
+    price_triggers:
+        코인별 익절가 트리거 (PriceTriggerRegistry)
+        가격 수신 Task가 틱마다 확인해서 익절가에 도달한 거래를 즉시 깨움
 
     wallet_dict:
         매수한 코인의 내역을 기록하는 딕셔너리
         구조: {코인명: [매수 평균 가격, 매수 수량]}
+        업데이트 주기 : 실시간 (private 웹소켓), WALLET_RECONCILE_INTERVAL 초마다 REST 조회로 보정 (웹소켓이 끊긴 동안 1초)
+
+    latency_metrics:
+        웹소켓 수신 -> price_cache 기록 -> 트리거 확인 -> 주문 서명 -> 전송 -> 응답 단계별 지연 시간 히스토그램
+        METRICS_PORT 설정 시 Prometheus 형식으로 제공
+
+    order_fills:
+        주문 uuid별 체결 완료 알림 (OrderFillRegistry)
+        private 웹소켓 myOrder 이벤트로 체결이 끝나면 기다리는 거래를 즉시 깨움
+
+    purchase_journal:
+        매수/기록 삭제를 data/purchases.journal 에 한 줄씩 이어서 기록하는 저널 (PurchaseJournal)
+        프로그램 시작 시 저널을 다시 적용해서 구매 기록(persistent_purchases, last_buy_date)을 복원
 
     ACCESS_KEY, SECRET_KEY: 환경 변수로 저장된 키 값
     """
 
+    # SIGTERM(서비스 종료)도 Ctrl+C와 같이 실행 중인 Task를 취소해서 정리 코드(worker 종료, 공유 메모리 삭제)를 실행
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+
     # 웹소켓 연결
     await public_websocket_connect()
 
+    # 주문/계좌 조회용 공유 HTTP 연결 예열 (첫 주문에서 TLS 핸드셰이크 생략)
+    await warm_up()
+
     # 별도의 Task로 작업을 동시에 실행
 
-    # indicators_dict, target_dict 업데이트 - 매 분
-    task_indicators = asyncio.create_task(update_indicators_periodically
-                                    (indicators_dict, target_dict, target_lock))
+    # target / trading / active 상태 변경 명령 처리 - 명령 발생 시
+    task_state = asyncio.create_task(trading_state.run())
+
+    # indicator_store, target 업데이트 - 매 분
+    if SHARD_WORKERS:
+        # worker 프로세스들이 계산한 공유 메모리 지표로 타겟 분류
+        if INDICATOR_TIMEFRAMES:
+            print(f"[{datetime.now()}] SHARD_WORKERS 모드에서는 상위 봉 지표(INDICATOR_TIMEFRAMES)를 계산하지 않습니다.")
+        shards = ShardedMarket(SHARD_WORKERS, INDICATOR_BATCH_MODE, CANDLE_FETCH_CONCURRENCY, CANDLE_STREAM_MODE)
+        task_indicators = asyncio.create_task(update_indicators_sharded(shards, indicator_store, trading_state))
+    else:
+        task_indicators = asyncio.create_task(update_indicators_periodically
+                                        (indicator_store, candle_buffers, indicator_engines, trading_state))
 
-    # target_dict 5개 랜덤 -> trading_dict - 3초
-    task_transactions = asyncio.create_task(update_trading_dict
-                                    (trading_dict, target_dict, trading_lock, target_lock))
+    # target 5개 랜덤 -> trading - 3초
+    task_transactions = asyncio.create_task(update_trading_dict(trading_state))
 
-    # trading_dict 가격 업데이트 - 1초
+    # price_cache 가격 업데이트 - 실시간
     task_prices = asyncio.create_task(update_prices
-                                      (trading_dict, trading_lock))
+                                      (trading_state, price_cache, price_triggers, market_recorder, latency_metrics))
 
     # 거래 시작
     task_trades = asyncio.create_task(execute_trades
-                                      (ACCESS_KEY, SECRET_KEY, trading_dict, active_trades, indicators_dict
-                                       , wallet_dict, trading_lock, active_lock))
+                                      (ACCESS_KEY, SECRET_KEY, trading_state, indicator_store
+                                       , wallet_dict, order_fills, price_cache, price_triggers))
 
-    # wallet_dict 업데이트 - 1 초
+    # wallet_dict 변경분 반영, 주문 체결 알림 - 실시간 (private 웹소켓)
+    task_wallet_private = asyncio.create_task(update_wallet_private
+                                              (ACCESS_KEY, SECRET_KEY, wallet_dict, order_fills))
+
+    # wallet_dict 보정 - WALLET_RECONCILE_INTERVAL 초 (REST 계좌 조회)
     task_wallet = asyncio.create_task(update_wallet_realtime
-                                      (ACCESS_KEY, SECRET_KEY, wallet_dict))
+                                      (ACCESS_KEY, SECRET_KEY, wallet_dict, WALLET_RECONCILE_INTERVAL))
+
+    # 구매 기록 저널 기록 - 매수/매도 발생 시 (모아서 한 번에)
+    task_journal = asyncio.create_task(purchase_journal.run())
+
+    tasks = [task_state, task_indicators, task_prices, task_transactions, task_trades, task_wallet, task_wallet_private,
+             task_journal]
+
+    # 체결 웹소켓으로 1분봉 생성 - 실시간 (CANDLE_STREAM_MODE=1, SHARD_WORKERS 모드에서는 worker가 직접 생성)
+    if candle_builder is not None and not SHARD_WORKERS:
+        tasks.append(asyncio.create_task(update_candles_from_trades(candle_builder, market_universe)))
+
+    # 체결 틱, 마감된 분봉 파일 기록 - 1초 (MARKET_RECORDER_ENABLED=1 일 때)
+    if market_recorder is not None:
+        tasks.append(asyncio.create_task(market_recorder.run()))
+
+    # 단계별 지연 시간 히스토그램 제공 - http://127.0.0.1:METRICS_PORT/metrics (METRICS_PORT 설정 시)
+    if METRICS_PORT:
+        tasks.append(asyncio.create_task(serve_metrics(latency_metrics, METRICS_PORT)))
 
     # 모든 Task를 동시에 실행 (각 Task는 무한 루프로 동작)
-    await asyncio.gather(task_indicators, task_prices, task_transactions, task_trades, task_wallet)
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        # 대기 중인 웹훅을 보낸 뒤 연결 정리
+        await close_webhooks()
+        await close_clients()
 
 
 if __name__ == "__main__":
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
-        print("Program terminated by user")
\ No newline at end of file
+        print("Program terminated by user")
+    except asyncio.CancelledError:
+        print("Program terminated by SIGTERM")
\ No newline at end of file
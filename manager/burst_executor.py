@@ -0,0 +1,96 @@
+import asyncio
+import time
+from datetime import datetime
+
+
+class BurstOrderExecutor:
+    """
+    정해진 시각(예: KST 09:00)에 모아 둔 주문을 한 번에 보내는 실행기.
+
+    - submit(): 서명까지 끝난 주문을 시각별 대기 목록에 넣고, 주문 응답을 받을 때까지 대기합니다.
+    - 시각마다 타이머 Task 하나가 prewarm_lead초 전에 대기 주문 수만큼 HTTP 연결을 미리 맺어 두고,
+      마지막 spin_window초는 바쁜 대기로 시각을 맞춘 뒤 모든 주문을 동시에 전송합니다.
+      (거래마다 1초 간격으로 시각을 확인하지 않으므로 주문이 최대 1초 늦거나 흩어지지 않음)
+    - metrics가 주어지면 전송 시각의 오차(burst_fire_lateness)와 주문별 목표 시각 -> 응답 시간(burst_order_ack)을 기록합니다.
+
+    :param send: 준비된 주문을 보내고 응답 JSON을 반환하는 코루틴 함수 send(prepared)
+    :param warm_up: 연결 예열 코루틴 함수 warm_up(connections=n)
+    """
+
+    def __init__(self, send, warm_up=None, metrics=None, prewarm_lead=5.0, spin_window=0.005):
+        self.send = send
+        self.warm_up = warm_up
+        self.metrics = metrics
+        self.prewarm_lead = prewarm_lead
+        self.spin_window = spin_window
+        self.pending = {}   # {목표 시각(epoch 초): [(코인명, 준비된 주문, future), ...]}
+        self.timers = {}    # {목표 시각(epoch 초): 타이머 Task}
+
+    async def submit(self, coin, prepared, deadline):
+        """
+        :param prepared: 전송 직전 상태로 준비된 주문 (send 에 그대로 전달)
+        :param deadline: 주문을 보낼 시각 (timezone 정보가 있는 datetime)
+        :return: 주문 응답 JSON
+        """
+        fire_at = deadline.timestamp()
+        future = asyncio.get_running_loop().create_future()
+        self.pending.setdefault(fire_at, []).append((coin, prepared, future))
+        if fire_at not in self.timers:
+            self.timers[fire_at] = asyncio.create_task(self._fire_at(fire_at))
+        return await future
+
+    async def _sleep_until(self, fire_at):
+        """목표 시각 spin_window초 전까지는 이벤트 루프에서 대기하고, 남은 시간은 바쁜 대기로 맞춤"""
+        warmed = self.warm_up is None
+        while True:
+            remaining = fire_at - time.time()
+            if not warmed and remaining <= self.prewarm_lead:
+                warmed = True
+                connections = len(self.pending.get(fire_at, ()))
+                try:
+                    await self.warm_up(connections=connections)
+                except Exception as e:
+                    print(f"[{datetime.now()}] 주문 연결 예열 실패: {e}")
+                continue
+            if remaining <= self.spin_window:
+                break
+            if not warmed:
+                # 예열 시점까지 대기
+                await asyncio.sleep(min(remaining - self.prewarm_lead, 60))
+            elif remaining > 1:
+                await asyncio.sleep(remaining - 1)
+            else:
+                await asyncio.sleep(remaining - self.spin_window)
+        while time.time() < fire_at:
+            pass
+
+    async def _send(self, coin, prepared, future, fire_at):
+        try:
+            result = await self.send(prepared)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if self.metrics is not None:
+            self.metrics.observe("burst_order_ack", time.time() - fire_at)
+        if not future.done():
+            future.set_result(result)
+
+    async def _fire_at(self, fire_at):
+        try:
+            await self._sleep_until(fire_at)
+        except asyncio.CancelledError:
+            self.timers.pop(fire_at, None)
+            for _, _, future in self.pending.pop(fire_at, []):
+                future.cancel()
+            raise
+        # 전송 이후 들어온 주문은 새 타이머가 처리
+        self.timers.pop(fire_at, None)
+        entries = self.pending.pop(fire_at, [])
+
+        lateness = time.time() - fire_at
+        if self.metrics is not None:
+            self.metrics.observe("burst_fire_lateness", max(lateness, 0.0))
+        print(f"[{datetime.now()}] 예약 주문 {len(entries)}건 동시 전송 (목표 시각 대비 {lateness * 1000:.2f}ms)")
+        await asyncio.gather(*(self._send(coin, prepared, future, fire_at) for coin, prepared, future in entries
+                               if not future.cancelled()))
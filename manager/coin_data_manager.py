@@ -1,42 +1,77 @@
 import asyncio
-import random
 import json
-import ssl
 import sys
 import time
 
 import aiohttp
-import certifi
 import jwt
 import uuid
+import websockets
 from datetime import datetime
-from calculator.coins_indicators_calculator import calculate_indicators
+from calculator.async_candle_fetcher import AsyncCandleFetcher, calculate_indicators_async
+from calculator.candle_builder import seconds_until_next_check
+from calculator.coins_indicators_calculator import drop_coins
 from calculator.target_calculator import classify_targets
-from manager.webhook_manager import send_error_webhook
-from manager.websocket_manager import public_websocket_connect
+from manager.http_client import get_upbit_session, upbit_url, upbit_ws_url, ssl_context_for
+from manager.request_scheduler import PRIORITY_ACCOUNT
+from manager.webhook_manager import send_error_webhook, flush_webhooks
+from manager.websocket_manager import public_websocket_connect, private_websocket_connect
 import shared_resources
 
 
-async def update_prices(trading_dict, trading_lock):
+async def update_prices(trading_state, price_cache, price_triggers, recorder=None, metrics=None):
     """
-    웹소켓을 사용해 target_dict에 있는 코인들의 가격(trade_price)을 1초마다 업데이트합니다.
+    웹소켓 실시간 ticker 구독으로 거래 대상(trading) 코인들의 가격(trade_price)을 체결될 때마다 업데이트합니다.
+
+    - 수신 Task: 웹소켓 메시지를 받는 즉시 price_cache에 현재가를 기록합니다.
+      락을 사용하지 않으므로, 읽는 쪽도 락 없이 price_cache에서 최신 가격을 읽을 수 있습니다.
+      같은 틱에서 price_triggers를 확인해 익절가에 도달한 거래를 바로 깨웁니다.
+      recorder가 주어지면 체결 틱을 시장 데이터 기록 버퍼에 추가합니다.
+      metrics가 주어지면 수신 -> 디코딩 -> price_cache 기록 -> 트리거 확인 단계별 시간을 기록합니다.
+    - 구독 Task: trading_state 스냅샷의 거래 대상 코인 목록이 바뀐 경우에만 구독 메시지를 다시 보냅니다.
+      (목록이 비면 구독 없는 연결로 교체해서 거래가 끝난 코인의 틱을 더 받지 않음)
+
     error_send/rcv_limit:
         오류 제한 횟수를 의미합니다. 일정 횟수 이상 업데이트에 실패한다면, 프로그램을 종료합니다.
     """
     error_send_limit = 10
     error_rcv_limit = 10
-    while True:
-        async with trading_lock:
-            symbols = list(trading_dict.keys())
-            if symbols:
+    # 현재 구독 중인 코인 목록 (None: 재연결 등으로 다시 구독이 필요함)
+    subscribed = None
+
+    async def reconnect():
+        nonlocal subscribed
+        old_websocket = shared_resources.upbit_websocket
+        # 웹소켓 재연결 시도
+        await public_websocket_connect()
+        subscribed = None
+        # 이전 웹소켓을 닫아서 대기 중인 recv()를 깨움
+        try:
+            await old_websocket.close()
+        except Exception:
+            pass
+
+    async def watch_subscriptions():
+        nonlocal subscribed, error_send_limit
+        while True:
+            symbols = sorted(trading_state.snapshot.trading)
+            if symbols != subscribed:
                 subscribe_msg = json.dumps([
                     {"ticket": "ticker_websocket"},
-                    {"type": "ticker", "codes": symbols, "is_only_snapshot": True},
+                    {"type": "ticker", "codes": symbols},
                     {"format": "DEFAULT"}
                 ])
                 try:
-                    await shared_resources.upbit_websocket.send(subscribe_msg)
-                    # print(f"[{datetime.now()}] 구독 메시지 전송: {subscribe_msg}")
+                    if symbols:
+                        await shared_resources.upbit_websocket.send(subscribe_msg)
+                    elif subscribed:
+                        # 거래 중인 코인이 모두 빠진 경우. 빈 codes로는 구독할 수 없으므로 구독 없는 새 연결로 교체
+                        await reconnect()
+                    subscribed = symbols
+                    # 구독에서 빠진 코인의 가격 정리
+                    for code in [code for code in price_cache if code not in symbols]:
+                        price_cache.pop(code, None)
+                    error_send_limit = 10
 
                 # 오류 발생시 웹훅으로 전달
                 except Exception as e:
@@ -45,62 +80,121 @@ async def update_prices(trading_dict, trading_lock):
 
                     if error_send_limit == 0:
                         message_snd_webhook = f"웹소켓 데이터 수신 오류 및 재연결 10회 실패 : {e}. 프로그램을 종료합니다"
-                        await send_error_webhook(message_snd_webhook)
+                        send_error_webhook(message_snd_webhook)
+                        await flush_webhooks()
 
                         sys.exit(0)
                     message = f"[{datetime.now()}]" + message_snd + f"{e} 웹소켓 재연결을 시도합니다."
-                    await send_error_webhook(message)
-
-                    # 웹소켓 재연결 시도
-                    await public_websocket_connect()
-
-                    await asyncio.sleep(1)
+                    send_error_webhook(message)
+
+                    await reconnect()
+
+            await asyncio.sleep(0.2)
+
+    async def consume():
+        nonlocal error_rcv_limit
+        while True:
+            websocket = shared_resources.upbit_websocket
+            try:
+                response = await websocket.recv()
+                received = time.perf_counter()
+            except Exception as e:
+                # 구독 Task에서 이미 재연결한 경우
+                if websocket is not shared_resources.upbit_websocket:
                     continue
 
-                error_send_limit = 10
-
-                # 구독한 코인 수만큼 응답 받기
-                for _ in range(len(symbols)):
-                    try:
-                        response = await shared_resources.upbit_websocket.recv()
-                        data = json.loads(response)
-                        code = data.get("code")
-                        trade_price = data.get("trade_price")
-                        if code and trade_price is not None:
-                            trading_dict[code] = trade_price
-                    except Exception as e:
-                        message_recv = f"웹소켓 데이터 수신 오류: {e}"
-                        print(f"[{datetime.now()}]", message_recv)
-                        error_rcv_limit -= 1
-
-                        if error_rcv_limit == 0:
-                            message_recv_webhook = f"웹소켓 데이터 수신 오류 및 재연결 10회 실패 : {e}. 프로그램을 종료합니다"
-                            await send_error_webhook(message_recv_webhook)
-
-                            sys.exit(0)
-                        message = f"[{datetime.now()}]" + message_snd + f"{e} 웹소켓 재연결을 시도합니다."
-
-                        # 웹소켓 재연결 시도
-                        await public_websocket_connect()
+                message_recv = f"웹소켓 데이터 수신 오류: {e}"
+                print(f"[{datetime.now()}]", message_recv)
+                error_rcv_limit -= 1
 
-                        await send_error_webhook(message)
-                        continue
+                if error_rcv_limit == 0:
+                    message_recv_webhook = f"웹소켓 데이터 수신 오류 및 재연결 10회 실패 : {e}. 프로그램을 종료합니다"
+                    send_error_webhook(message_recv_webhook)
+                    await flush_webhooks()
 
-                error_rcv_limit = 10
+                    sys.exit(0)
+                message = f"[{datetime.now()}]" + message_recv + " 웹소켓 재연결을 시도합니다."
 
-                # print(f"[{datetime.now()}] trading_dict 업데이트 완료.")
-            # else:
-            # print(f"[{datetime.now()}] 업데이트할 타겟 코인이 없습니다.")
+                await reconnect()
 
-        # 1초마다 반복
-        await asyncio.sleep(1)
+                send_error_webhook(message)
+                continue
 
+            error_rcv_limit = 10
 
-async def update_indicators_periodically(indicators_dict, target_dict, target_lock):
+            try:
+                data = json.loads(response)
+            except ValueError as e:
+                # 잘못된 메시지 하나 때문에 수신 Task가 종료되지 않도록 무시
+                print(f"[{datetime.now()}] 웹소켓 메시지 디코딩 실패: {e}")
+                continue
+            if not isinstance(data, dict):
+                # JSON이지만 시세 객체가 아닌 메시지 (오류 배열 등)
+                print(f"[{datetime.now()}] 웹소켓 메시지 형식 오류: {response[:200]!r}")
+                continue
+            code = data.get("code")
+            trade_price = data.get("trade_price")
+            if code and trade_price is not None:
+                decoded = time.perf_counter()
+                price_cache[code] = trade_price
+                cached = time.perf_counter()
+                price_triggers.check(code, trade_price, received)
+                if metrics is not None:
+                    metrics.observe("tick_decode", decoded - received)
+                    metrics.observe("price_cache_update", cached - decoded)
+                    metrics.observe_since("trigger_check", cached)
+                    trade_timestamp = data.get("trade_timestamp")
+                    if trade_timestamp:
+                        metrics.observe("tick_transit", max(time.time() - trade_timestamp / 1000, 0.0))
+                if recorder is not None:
+                    recorder.record_tick(code, data.get("trade_timestamp"), trade_price, data.get("trade_volume"))
+
+    await asyncio.gather(watch_subscriptions(), consume())
+
+
+async def apply_strategies(indicator_store, trading_state, timeframes=None):
+    """
+    전략 엔진(strategy_engine)으로 전체 마켓을 한 번에 평가합니다.
+      - 진입 조건에 부합하는 코인으로 target 목록(과 코인별 전략)을 교체
+      - 거래 중인 코인 중 자신의 전략 청산 조건을 만족하는 코인은 익절 대기 중인 거래를 깨워서 매도
+    :return: 타겟 분류 결과 표시용 리스트 (전략이 여러 개면 "코인명(전략 이름)")
+    """
+    engine = shared_resources.strategy_engine
+    targets, strategies = {}, {}
+    classify_targets(indicator_store, targets, engine, strategies, timeframes)
+    await trading_state.replace_targets(targets, strategies)
+
+    snapshot = trading_state.snapshot
+    positions = {coin: (snapshot.strategies.get(coin, engine.default.name),
+                        shared_resources.persistent_purchases[coin]["buy_price"])
+                 for coin in snapshot.active if coin in shared_resources.persistent_purchases}
+    for coin in engine.exit_signals(indicator_store, positions, timeframes):
+        price = shared_resources.price_cache.get(coin, float(indicator_store[coin]["current_price"]))
+        if shared_resources.price_triggers.fire(coin, price):
+            print(f"[{datetime.now()}] {coin} 청산 조건 충족 ({positions[coin][0]}), 매도 진행")
+
+    if len(engine.strategies) > 1:
+        return [f"{coin}({strategies[coin]})" for coin in targets]
+    return list(targets)
+
+
+async def update_indicators_periodically(indicator_store, candle_buffers, indicator_engines, trading_state):
     """
-    매 분(분이 바뀔 때) 동기 함수인 지표 계산 및 타겟 분류를 실행합니다.
-    asyncio.to_thread를 사용하여 해당 작업이 진행되는 동안에도 이벤트 루프의 다른 작업(예: target_dict 업데이트)은 계속됩니다.
+    매 분(분이 바뀔 때) 지표 계산 및 타겟 분류를 실행합니다.
+    분봉 조회는 하나의 aiohttp 세션을 공유하는 비동기 fetcher가 이벤트 루프 안에서 동시에 처리하므로,
+    해당 작업이 진행되는 동안에도 이벤트 루프의 다른 작업(예: trading 코인 선택)은 계속됩니다.
+    분류 결과는 trading_state 에 target 교체 명령으로 전달합니다.
+    마켓 목록은 market_universe 캐시를 사용하고, 상장 폐지된 코인만 지표 저장소에서 삭제합니다.
+    (신규 상장 코인은 다음 계산에서 분봉 버퍼가 새로 채워짐)
+    CANDLE_STREAM_MODE 에서는 체결 웹소켓으로 만든 분봉(candle_builder)을 사용하므로, 분이 바뀐 직후
+    REST 요청 없이 지표를 계산하고, 연결이 끊겼던 코인만 REST로 분봉을 다시 채웁니다.
+    INDICATOR_TIMEFRAMES 가 있으면 같은 1분봉으로 상위 봉 지표(timeframe_indicators)도 함께 갱신합니다.
     """
+    fetcher = AsyncCandleFetcher(shared_resources.request_scheduler,
+                                 concurrency=shared_resources.CANDLE_FETCH_CONCURRENCY)
+    universe = shared_resources.market_universe
+    builder = shared_resources.candle_builder
+    timeframes = shared_resources.timeframe_indicators
     previous_minute = datetime.now().minute
     while True:
         current_minute = datetime.now().minute
@@ -110,66 +204,189 @@ async def update_indicators_periodically(indicators_dict, target_dict, target_lo
             start_time = time.time()
 
             print(f"\n[{datetime.now()}] 지표 업데이트 시작")
-            # calculate_indicators와 classify_targets를 별도 스레드에서 실행하여 이벤트 루프 블로킹 방지
-            await asyncio.to_thread(calculate_indicators, indicators_dict, 2)
+            _, delisted = await universe.refresh(fetcher.get_all_krw_coins)
+            drop_coins(delisted, indicator_store, candle_buffers, indicator_engines, timeframes)
+            await calculate_indicators_async(fetcher, indicator_store, candle_buffers, indicator_engines,
+                                             shared_resources.INDICATOR_BATCH_MODE, shared_resources.market_recorder,
+                                             coins=universe.coins, builder=builder, timeframes=timeframes)
             print(f"[{datetime.now()}] 지표 업데이트 완료")
 
-            # indicators_dict를 분류해서 특정 코인들을 target_dict에 저장
-            # 업데이트 실패(락을 해제하지 못하는 경우) 관리
-
-            async with target_lock:
-                target_dict.clear()  # target_dict 초기화
-                await asyncio.to_thread(classify_targets, indicators_dict, target_dict)
-                print(f"[{datetime.now()}] 타겟 분류 후 target_dict: [{', '.join(target_dict.keys())}]")
+            # indicator_store를 분류해서 특정 코인들로 target 목록을 교체
+            # 전략 엔진은 전체 코인을 전략별 mask로 한 번에 평가하므로 이벤트 루프에서 바로 실행
+            targets = await apply_strategies(indicator_store, trading_state, timeframes)
+            print(f"[{datetime.now()}] 타겟 분류 후 target: [{', '.join(targets)}]")
 
             end_time = time.time()
 
             duration = end_time - start_time
+            shared_resources.latency_metrics.observe("indicator_cycle", duration)
 
             # 보조지표 연산 예상 범주 시간 초과시 알람 전송.
             if duration > 30:
                 duration_msg = f"보조지표 연산에 소요시간 30초 초과. 총 {duration}초 소요."
-                asyncio.create_task(send_error_webhook(duration_msg))
+                send_error_webhook(duration_msg)
 
-        await asyncio.sleep(1)
+        # 분이 바뀐 직후(늦게 도착한 체결을 기다린 뒤) 확인하도록 매 초 + CLOSE_GRACE 에 깨어남
+        await asyncio.sleep(seconds_until_next_check())
 
 
-async def update_trading_dict(trading_dict, target_dict, trading_lock, target_lock):
+async def update_candles_from_trades(builder, universe):
     """
-    target_dict에서 랜덤하게 항목을 선택하여 trading_dict를 3초마다 업데이트합니다.
-    trading_dict의 항목 수가 5개이면 추가하지 않고, 5개 미만이면 부족한 개수만큼 target_dict에서
-    (이미 trading_dict에 없는 항목들 중에서) 랜덤하게 선택하여 추가합니다.
+    CANDLE_STREAM_MODE 의 체결 수신 Task.
+    마켓 목록(universe) 전체의 trade 웹소켓을 구독해서 체결마다 builder의 분봉을 갱신합니다.
+    update_prices 의 ticker 구독 메시지와 서로 대체되지 않도록 별도의 웹소켓 연결을 사용하고,
+    마켓 목록이 바뀌면 같은 연결로 구독 메시지를 다시 보냅니다.
+    연결이 끊기면 builder에 알려서 끊긴 구간의 분봉은 REST로 다시 채우도록 합니다.
     """
+    url = upbit_ws_url()
+    delay = 1
     while True:
-        async with target_lock, trading_lock:
-            if target_dict:
-                if len(trading_dict) < 5:
-                    # trading_dict에 추가해야 할 개수 계산
-                    needed = 5 - len(trading_dict)
-
-                    # target_dict의 키 중 이미 trading_dict에 없는 키만 선택
-                    available_keys = [key for key in target_dict.keys() if key not in trading_dict]
-
-                    if available_keys:
-                        # available_keys에서 부족한 개수만큼 랜덤 샘플링
-                        sample_keys = random.sample(available_keys, k=min(needed, len(available_keys)))
-
-                        # trading_dict에 추가한 이후 target_dict에서 제거
-                        # 거래종료 즉시 추가 등록 방지
-                        for key in sample_keys:
-                            trading_dict[key] = target_dict[key]
-                            target_dict.pop(key)
-
-                        print(f"[{datetime.now()}] trading_dict: [{', '.join(trading_dict.keys())}] 업데이트")
-                    # else:print(f"[{datetime.now()}] 새로운 항목이 없어 trading_dict 업데이트 안함. 현재 trading_dict: {trading_dict}")
-                # else:
-                #     print(f"[{datetime.now()}] trading_dict가 이미 5개입니다: {trading_dict}")
-            # else:print(f"[{datetime.now()}] target_dict에 항목이 없어 trading_dict 업데이트 안함.")
+        if not len(universe):
+            # 첫 지표 업데이트에서 마켓 목록을 불러올 때까지 대기
+            await asyncio.sleep(1)
+            continue
+        try:
+            async with websockets.connect(url, ssl=ssl_context_for(url), compression="deflate") as websocket:
+                async def subscribe(codes):
+                    await websocket.send(json.dumps([
+                        {"ticket": "trade_candles"},
+                        {"type": "trade", "codes": codes},
+                        {"format": "DEFAULT"}
+                    ]))
+
+                async def resubscribe(subscribed):
+                    while True:
+                        await asyncio.sleep(1)
+                        if universe.coins != subscribed:
+                            subscribed = list(universe.coins)
+                            await subscribe(subscribed)
+
+                codes = list(universe.coins)
+                await subscribe(codes)
+                builder.connected()
+                sender = asyncio.create_task(resubscribe(codes))
+                try:
+                    delay = 1
+                    async for response in websocket:
+                        data = json.loads(response)
+                        trade_price = data.get("trade_price")
+                        if trade_price is not None:
+                            builder.on_trade(data["code"], data["trade_timestamp"], trade_price, data["trade_volume"])
+                finally:
+                    builder.disconnected()
+                    sender.cancel()
+        except Exception as e:
+            print(f"[{datetime.now()}] 체결 웹소켓 오류: {e}. {delay}초 후 재연결")
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 30)
+
+
+async def update_indicators_sharded(shards, indicator_store, trading_state):
+    """
+    SHARD_WORKERS 모드의 지표 업데이트.
+    분봉 조회와 지표 계산은 worker 프로세스들이 공유 메모리 테이블에 기록하고,
+    메인 프로세스는 모든 shard가 발행하면 테이블을 indicator_store에 복사해서 타겟 분류만 실행합니다.
+    마켓 목록이 바뀌면 변경분(신규 상장, 상장 폐지)만 shard에 전달합니다.
+
+    :param shards: ShardedMarket
+    """
+    fetcher = AsyncCandleFetcher(shared_resources.request_scheduler)
+    universe = shared_resources.market_universe
+    await universe.refresh(fetcher.get_all_krw_coins)
+    shards.start(universe.coins)
+    print(f"[{datetime.now()}] 코인 {len(universe)}개를 worker {shards.workers}개에 나눠 지표 계산")
+
+    try:
+        while True:
+            published = await shards.wait_for_cycle()
+            shards.collect(indicator_store)
+
+            targets = await apply_strategies(indicator_store, trading_state)
+            print(f"[{datetime.now()}] 타겟 분류 후 target: [{', '.join(targets)}] "
+                  f"(shard {published}/{shards.workers})")
+
+            # shard가 지표 갱신을 시작한 시점(분이 바뀐 직후)부터 타겟 분류까지 걸린 시간
+            duration = time.time() - shards.cycle_started
+            shared_resources.latency_metrics.observe("indicator_cycle", duration)
+
+            # 보조지표 연산 예상 범주 시간 초과시 알람 전송.
+            if duration > 30:
+                duration_msg = f"보조지표 연산에 소요시간 30초 초과. 총 {duration}초 소요."
+                send_error_webhook(duration_msg)
+
+            listed, delisted = await universe.refresh(fetcher.get_all_krw_coins)
+            if listed or delisted:
+                shards.apply_diff(listed, delisted)
+                for coin in delisted:
+                    indicator_store.remove(coin)
+    finally:
+        shards.stop()
+        await fetcher.close()
+
+
+async def update_trading_dict(trading_state):
+    """
+    target에서 랜덤하게 항목을 선택하여 trading을 3초마다 업데이트합니다.
+    trading의 항목 수가 max_trading(5)개이면 추가하지 않고, 부족하면 부족한 개수만큼 target에서
+    (이미 trading에 없는 항목들 중에서) 랜덤하게 선택하여 추가합니다. 선택과 반영은 trading_state가 처리합니다.
+    """
+    while True:
+        selected = await trading_state.fill_trading()
+        if selected:
+            print(f"[{datetime.now()}] trading: [{', '.join(trading_state.snapshot.trading)}] 업데이트")
 
         await asyncio.sleep(3)
 
 
-async def update_wallet_realtime(ACCESS_KEY, SECRET_KEY, wallet_dict):
+def accounts_to_wallet(accounts):
+    """
+    /v1/accounts 응답을 {코인명: [매수 평균 가격, 매수 수량]} 형식으로 변환합니다. (KRW 제외)
+    """
+    wallet = {}
+    for account in accounts:
+        currency = account.get("currency")
+
+        # currency가 "KRW"인 항목은 제외
+        if currency == "KRW":
+            continue
+
+        # 코인명을 "KRW-{통화}" 형태로 생성 (예: ONDO -> KRW-ONDO)
+        wallet[f"KRW-{currency}"] = [float(account.get("avg_buy_price")), account.get("balance")]
+    return wallet
+
+
+async def fetch_wallet(ACCESS_KEY, SECRET_KEY):
+    """
+    REST 전체 계좌 조회(/v1/accounts)를 1회 실행합니다.
+    :return: {코인명: [매수 평균 가격, 매수 수량]}, 실패하면 None
+    """
+    payload = {"access_key": ACCESS_KEY, "nonce": str(uuid.uuid4())}
+    headers = {"Authorization": f"Bearer {jwt.encode(payload, SECRET_KEY, algorithm='HS256')}"}
+    try:
+        async with shared_resources.request_scheduler.request("default", PRIORITY_ACCOUNT):
+            async with get_upbit_session().get(upbit_url("/v1/accounts"), headers=headers) as response:
+                shared_resources.request_scheduler.observe(response.headers)
+                if response.status == 429:
+                    shared_resources.request_scheduler.penalize("default")
+                if response.status != 200:
+                    print(f"[{datetime.now()}] 계좌 조회 HTTP 오류 상태 {response.status}")
+                    return None
+                accounts = await response.json()
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+        print(f"[{datetime.now()}] 계좌 조회 오류: {e!r}")
+        return None
+    if "error" in accounts:
+        print(f"[{datetime.now()}] 계좌 조회 응답 오류: {accounts['error']}")
+        return None
+    return accounts_to_wallet(accounts)
+
+
+async def update_wallet_realtime(ACCESS_KEY, SECRET_KEY, wallet_dict, interval=1):
+    """
+    REST 전체 계좌 조회(/v1/accounts)로 wallet_dict를 interval초마다 다시 만듭니다.
+    실시간 변경은 private 웹소켓(update_wallet_private)이 반영하며, 이 함수는 누락된 변경을 보정하는 용도입니다.
+    private 웹소켓이 연결되어 있지 않은 동안에는 1초마다 조회합니다.
+    """
     error_limit = 100  # 연속으로 발생하는 오류 한도
     while True:
         # JWT 페이로드 생성: access_key와 nonce (중복되지 않는 임의의 값)
@@ -185,9 +402,7 @@ async def update_wallet_realtime(ACCESS_KEY, SECRET_KEY, wallet_dict):
         headers = {"Authorization": f"Bearer {jwt_token}"}
 
         # 업비트 전체 계좌 조회 API 엔드포인트
-        url = "https://api.upbit.com/v1/accounts"
-
-        ssl_context = ssl.create_default_context(cafile=certifi.where())
+        url = upbit_url("/v1/accounts")
 
         # GET 요청 전송, 오류 발생시 sec 초 후 재시도
         sec = 1
@@ -198,35 +413,34 @@ async def update_wallet_realtime(ACCESS_KEY, SECRET_KEY, wallet_dict):
             error_limit -= 1
 
             if error_limit == 0:
-                await send_error_webhook(f"wallet_dict Rest API {error_limit}회 이상 오류 발생. 시스템 종료.")
+                send_error_webhook(f"wallet_dict Rest API {error_limit}회 이상 오류 발생. 시스템 종료.")
+                await flush_webhooks()
                 sys.exit(0)
 
+        # 실패한 경우 None. 재시도 대기는 요청 예산(진행 중 요청, 계좌 조회 우선순위)을 반납한 뒤에 함
+        response_data = None
         try:
-            async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=ssl_context)) as session:
-                async with session.get(url, headers=headers) as response:
+            # 공유 aiohttp 세션 사용 (매 초 새 TCP + TLS 연결을 맺지 않음)
+            async with shared_resources.request_scheduler.request("default", PRIORITY_ACCOUNT):
+                async with get_upbit_session().get(url, headers=headers) as response:
+                    shared_resources.request_scheduler.observe(response.headers)
 
                     if response.status == 429:
+                        shared_resources.request_scheduler.penalize("default")
                         print(f"wallet_dict 업데이트 429 오류 발생 . {sec}초 후 재시도합니다.")
-                        await error_limit_count()
-                        await asyncio.sleep(sec)
-                        continue
                     # 200 OK가 아닌 경우 재시도 (필요에 따라 세부 처리 가능)
-                    if response.status != 200:
+                    elif response.status != 200:
                         print(f"wallet_dict 업데이트 HTTP 오류 상태 {response.status} 발생. {sec}초 후 재시도합니다.")
-                        await error_limit_count()
-                        await asyncio.sleep(sec)
-                        continue
-
-                    try:
-                        response_data = await response.json()
-                    except Exception as e:
-                        print("JSON 디코딩 오류: 응답 데이터를 확인하세요.", e)
-                        await error_limit_count()
-                        await asyncio.sleep(sec)
-                        continue
-
-        except aiohttp.ClientError as e:
+                    else:
+                        try:
+                            response_data = await response.json()
+                        except Exception as e:
+                            print("JSON 디코딩 오류: 응답 데이터를 확인하세요.", e)
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
             print(f"wallet_dict 업데이트 기타 오류 발생 : {e}. {sec}초 후 재시도합니다.")
+
+        if response_data is None:
             await error_limit_count()
             await asyncio.sleep(sec)
             continue
@@ -238,31 +452,103 @@ async def update_wallet_realtime(ACCESS_KEY, SECRET_KEY, wallet_dict):
         if "error" in response_data:
             error_msg = f"wallet_dict Rest API 응답 오류: {response_data['error']} 프로그램 종료."
             print(error_msg)
-            await send_error_webhook(error_msg)  # 오류 전송 완료까지 대기
+            send_error_webhook(error_msg)
+            await flush_webhooks()  # 오류 전송 완료까지 대기
 
             sys.exit(0)
 
-        # wallet_dict의 기존 내용을 모두 삭제
+        # wallet_dict의 기존 내용을 응답 받은 계좌 정보로 교체
+        wallet = accounts_to_wallet(response_data)
         wallet_dict.clear()
+        wallet_dict.update(wallet)
 
-        # 응답 받은 각 계좌 정보를 순회
-        for account in response_data:
-            currency = account.get("currency")
+        # print(f"wallet_dict [{', '.join(wallet_dict.keys())}] 업데이트 완료")
 
-            # currency가 "KRW"인 항목은 제외
-            if currency == "KRW":
-                continue
+        await asyncio.sleep(interval if shared_resources.private_stream_connected else 1)
 
-            # 매수 평균 가격과 매수 수량 추출
-            avg_buy_price = account.get("avg_buy_price")
-            balance = account.get("balance")
 
-            # 코인명을 "KRW-{통화}" 형태로 생성 (예: ONDO -> KRW-ONDO)
-            coin_name = f"KRW-{currency}"
+def apply_asset_event(wallet_dict, data):
+    """
+    myAsset 이벤트로 보유 수량을 갱신합니다.
+    잔고는 이벤트의 값으로 덮어쓰며, 매수 평균 가격은 myOrder 체결 이벤트 또는 REST 조회 값을 유지합니다.
+    """
+    for asset in data.get("assets", []):
+        currency = asset.get("currency")
+        if currency == "KRW":
+            continue
 
-            # wallet_dict에 {코인명: [매수 평균 가격, 매수 수량]} 형식으로 저장
-            wallet_dict[coin_name] = [float(avg_buy_price), balance]
+        coin_name = f"KRW-{currency}"
+        if float(asset.get("balance", 0)) + float(asset.get("locked", 0)) == 0:
+            wallet_dict.pop(coin_name, None)
+        elif coin_name in wallet_dict:
+            wallet_dict[coin_name] = [wallet_dict[coin_name][0], str(asset.get("balance"))]
+        # 처음 보는 코인(입금 등)은 평균 매수가를 알 수 없으므로 REST 조회에서 추가
 
-        # print(f"wallet_dict [{', '.join(wallet_dict.keys())}] 업데이트 완료")
 
+def apply_order_event(wallet_dict, order_fills, data):
+    """
+    myOrder 이벤트로 매수 평균 가격을 갱신하고, 주문이 끝나면 기다리는 거래에 체결 정보를 알립니다.
+    """
+    code = data.get("code")
+    state = data.get("state")
+    side = data.get("ask_bid", "").lower()
+
+    # 체결(trade) 이벤트의 price, volume은 이번 체결의 가격과 수량
+    if state == "trade" and side == "bid":
+        trade_price = float(data.get("price"))
+        trade_volume = float(data.get("volume"))
+        previous = wallet_dict.get(code)
+        if previous is None or float(previous[1]) <= 0:
+            wallet_dict[code] = [trade_price, str(trade_volume)]
+        else:
+            held = float(previous[1])
+            avg_buy_price = (previous[0] * held + trade_price * trade_volume) / (held + trade_volume)
+            wallet_dict[code] = [avg_buy_price, previous[1]]
+
+    # 시장가 매수는 남은 금액이 취소되며 cancel 상태로 끝날 수 있음
+    if state in ("done", "cancel"):
+        order_fills.resolve(data.get("uuid"), {
+            "code": code,
+            "side": side,
+            "state": state,
+            "avg_price": float(data.get("avg_price") or 0.0),
+            "executed_volume": float(data.get("executed_volume") or 0.0),
+        })
+
+
+async def update_wallet_private(ACCESS_KEY, SECRET_KEY, wallet_dict, order_fills):
+    """
+    업비트 private 웹소켓(myAsset, myOrder)으로 wallet_dict 변경분을 실시간으로 반영하고,
+    주문 체결 완료를 order_fills로 알립니다.
+    연결이 계속 실패하면 종료하며, 이후에는 REST 조회(update_wallet_realtime)만으로 wallet_dict를 유지합니다.
+    연결 상태는 shared_resources.private_stream_connected 에 기록합니다. (끊긴 동안 REST 조회 주기를 1초로 줄임)
+    """
+    error_limit = 10
+    while True:
+        websocket = await private_websocket_connect(ACCESS_KEY, SECRET_KEY)
+        if websocket is None:
+            shared_resources.private_stream_connected = False
+            error_limit -= 1
+            if error_limit == 0:
+                send_error_webhook("private 웹소켓 연결 10회 실패. REST 계좌 조회로만 wallet_dict를 갱신합니다.")
+                return
+            await asyncio.sleep(5)
+            continue
+
+        shared_resources.private_stream_connected = True
+        try:
+            async for message in websocket:
+                error_limit = 10
+                data = json.loads(message)
+                event_type = data.get("type")
+                if event_type == "myAsset":
+                    apply_asset_event(wallet_dict, data)
+                elif event_type == "myOrder":
+                    apply_order_event(wallet_dict, order_fills, data)
+        except Exception as e:
+            message = f"[{datetime.now()}] private 웹소켓 수신 오류: {e} 웹소켓 재연결을 시도합니다."
+            print(message)
+            send_error_webhook(message)
+
+        shared_resources.private_stream_connected = False
         await asyncio.sleep(1)
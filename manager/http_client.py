@@ -0,0 +1,92 @@
+import asyncio
+import os
+import ssl
+from datetime import datetime
+from functools import lru_cache
+
+import aiohttp
+import certifi
+import httpx
+
+# 업비트 서버 주소 기본값 (UPBIT_API_URL / UPBIT_WS_URL 환경 변수로 로컬 모의 서버 등으로 변경 가능)
+DEFAULT_UPBIT_API_URL = "https://api.upbit.com"
+DEFAULT_UPBIT_WS_URL = "wss://api.upbit.com/websocket/v1"
+
+# 공유 HTTP 클라이언트 (프로그램 실행 동안 재사용)
+_upbit_session = None
+_webhook_client = None
+
+
+@lru_cache(maxsize=1)
+def get_ssl_context():
+    """
+    certifi 인증서를 사용하는 SSL 컨텍스트. 한 번만 생성해서 모든 REST / 웹소켓 연결이 공유합니다.
+    """
+    return ssl.create_default_context(cafile=certifi.where())
+
+
+def upbit_url(path=""):
+    """
+    업비트 REST API 주소. 예: upbit_url("/v1/orders")
+    .env 로드 이후의 값을 쓰도록 호출 시점에 환경 변수를 읽습니다.
+    """
+    return os.environ.get("UPBIT_API_URL", DEFAULT_UPBIT_API_URL).rstrip("/") + path
+
+
+def upbit_ws_url(path=""):
+    """업비트 웹소켓 주소. 예: upbit_ws_url("/private")"""
+    return os.environ.get("UPBIT_WS_URL", DEFAULT_UPBIT_WS_URL).rstrip("/") + path
+
+
+def ssl_context_for(url):
+    """https / wss 주소에만 SSL 컨텍스트를 사용 (로컬 모의 서버의 http / ws 주소는 None)"""
+    return get_ssl_context() if url.startswith(("https://", "wss://")) else None
+
+
+def get_upbit_session():
+    """
+    업비트 REST API(주문, 계좌 조회)용 aiohttp 세션을 반환합니다.
+    연결 풀을 유지하므로 매 요청마다 TCP + TLS 핸드셰이크를 하지 않습니다.
+    """
+    global _upbit_session
+    if _upbit_session is None or _upbit_session.closed:
+        connector = aiohttp.TCPConnector(ssl=get_ssl_context(), limit=20, keepalive_timeout=60)
+        _upbit_session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=10))
+    return _upbit_session
+
+
+def get_webhook_client():
+    """
+    웹훅 전송용 httpx 클라이언트를 반환합니다.
+    """
+    global _webhook_client
+    if _webhook_client is None or _webhook_client.is_closed:
+        _webhook_client = httpx.AsyncClient(verify=get_ssl_context(), timeout=10,
+                                            limits=httpx.Limits(max_keepalive_connections=5, keepalive_expiry=60))
+    return _webhook_client
+
+
+async def warm_up(url=None, connections=1):
+    """
+    업비트 서버와 미리 TLS 연결을 맺어, 첫 주문이 핸드셰이크 시간을 기다리지 않도록 합니다.
+    connections개의 요청을 동시에 보내서 동시 주문에 필요한 만큼 연결 풀을 채웁니다. 응답 내용은 사용하지 않습니다.
+    """
+    async def head():
+        async with get_upbit_session().head(url or upbit_url()) as response:
+            await response.read()
+
+    results = await asyncio.gather(*(head() for _ in range(max(connections, 1))), return_exceptions=True)
+    errors = [result for result in results if isinstance(result, Exception)]
+    if errors:
+        print(f"[{datetime.now()}] 업비트 연결 예열 실패: {errors[0]}")
+
+
+async def close_clients():
+    """프로그램 종료 시 공유 클라이언트를 정리합니다."""
+    global _upbit_session, _webhook_client
+    if _upbit_session is not None and not _upbit_session.closed:
+        await _upbit_session.close()
+    if _webhook_client is not None and not _webhook_client.is_closed:
+        await _webhook_client.aclose()
+    _upbit_session = None
+    _webhook_client = None
@@ -0,0 +1,96 @@
+import asyncio
+import bisect
+import time
+from datetime import datetime
+
+from aiohttp import web
+
+# 히스토그램 구간 상한 (초): 10us ~ 약 42초, 2배 간격
+LATENCY_BUCKETS = tuple(1e-5 * 2 ** i for i in range(23))
+
+
+class LatencyHistogram:
+    """
+    고정 구간 지연 시간 히스토그램. observe()는 구간 탐색(bisect)과 정수 증가만 하므로 핫 패스에서 호출해도 됩니다.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)   # 마지막 칸: +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+
+class LatencyMetrics:
+    """
+    단계(stage)별 지연 시간 히스토그램 모음. Prometheus 텍스트 형식으로 내보낼 수 있습니다.
+
+    측정 단계:
+      - tick_transit: 업비트 체결 시각 -> 웹소켓 수신 (벽시계 기준, 서버와 시계 차이 포함)
+      - tick_decode: 웹소켓 수신 -> JSON 디코딩
+      - price_cache_update: 디코딩 -> price_cache 기록
+      - trigger_check: 익절 트리거 확인
+      - trigger_wake: 익절가 도달 틱 수신 -> 대기 중인 거래 재개
+      - order_sign: 주문 JWT 서명
+      - order_queue: 주문 요청 예산 대기
+      - order_roundtrip: 주문 전송 -> 응답(ack) 수신
+      - tick_to_ack: 익절가 도달 틱 수신 -> 매도 주문 응답 수신
+      - indicator_cycle: 매 분 지표 계산 + 타겟 분류
+      - burst_fire_lateness: 09:00 예약 주문의 실제 전송 시각 - 목표 시각
+      - burst_order_ack: 09:00 예약 주문별 목표 시각 -> 응답 수신
+    """
+
+    def __init__(self, namespace="autobit"):
+        self.namespace = namespace
+        self.histograms = {}
+
+    def observe(self, stage, seconds):
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = LatencyHistogram()
+        histogram.observe(seconds)
+
+    def observe_since(self, stage, start):
+        """time.perf_counter() 기준 start 부터 지금까지의 시간을 기록"""
+        self.observe(stage, time.perf_counter() - start)
+
+    def render(self):
+        """Prometheus 텍스트 형식 (stage 라벨을 가진 하나의 히스토그램)"""
+        name = f"{self.namespace}_stage_latency_seconds"
+        lines = [f"# HELP {name} Latency of each tick-to-order stage in seconds.",
+                 f"# TYPE {name} histogram"]
+        for stage, histogram in sorted(self.histograms.items()):
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound:.6g}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {histogram.sum:.9f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+
+async def serve_metrics(metrics, port, host="127.0.0.1"):
+    """
+    http://{host}:{port}/metrics 로 지연 시간 히스토그램을 제공하는 Task.
+    """
+
+    async def handle_metrics(request):
+        return web.Response(body=metrics.render().encode(),
+                            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host, port).start()
+        print(f"[{datetime.now()}] 지연 시간 지표 제공: http://{host}:{port}/metrics")
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
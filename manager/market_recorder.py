@@ -0,0 +1,151 @@
+import asyncio
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from calculator.candle_buffer import candle_start_timestamp
+
+KST = ZoneInfo("Asia/Seoul")
+
+# 고정 길이 레코드 형식 (little-endian). 파일에는 헤더 없이 레코드만 이어서 기록합니다.
+RECORD_DTYPES = {
+    # 체결 틱: 체결 시각(epoch ms), 체결가, 체결량
+    "ticks": np.dtype([("timestamp", "<i8"), ("price", "<f8"), ("volume", "<f8")]),
+    # 마감된 1분봉: 분봉 시작 시각(epoch 초, UTC), 시가, 고가, 저가, 종가, 누적 거래량
+    "candles": np.dtype([("timestamp", "<i8"), ("open", "<f8"), ("high", "<f8"),
+                         ("low", "<f8"), ("close", "<f8"), ("volume", "<f8")]),
+}
+# timestamp 단위 (초로 변환하기 위한 나눗수)
+TIMESTAMP_SCALE = {"ticks": 1000, "candles": 1}
+
+
+def record_path(root, day, coin, kind):
+    """
+    {root}/{YYYY-MM-DD}/{코인명}.{kind}.bin  (날짜는 KST 기준)
+    """
+    return Path(root) / day / f"{coin}.{kind}.bin"
+
+
+def _kst_day_numbers(timestamps, kind):
+    """timestamp 배열을 KST 기준 날짜 번호(epoch 이후 일 수) 배열로 변환"""
+    return (timestamps // TIMESTAMP_SCALE[kind] + 9 * 3600) // 86400
+
+
+def _day_name(day_number):
+    return datetime.fromtimestamp(int(day_number) * 86400, KST).date().isoformat()
+
+
+def read_records(root, day, coin, kind):
+    """
+    하루치 기록 파일을 파싱 없이 메모리 매핑해서 구조화 배열로 반환합니다.
+    필드는 records["price"] 처럼 복사 없이 열 단위로 읽을 수 있습니다.
+    """
+    path = record_path(root, day, coin, kind)
+    if not path.exists() or path.stat().st_size == 0:
+        return np.empty(0, dtype=RECORD_DTYPES[kind])
+    return np.memmap(path, dtype=RECORD_DTYPES[kind], mode="r")
+
+
+class MarketRecorder:
+    """
+    웹소켓 체결 틱과 마감된 분봉을 코인별/일별 바이너리 파일에 이어서 기록하는 recorder.
+
+    record_tick / record_candles 는 메모리 버퍼에 추가만 하므로 이벤트 루프를 막지 않으며,
+    run() Task가 flush_interval 초마다 모인 레코드를 별도 스레드에서 한 번에 파일에 씁니다.
+    대기 중인 레코드가 max_pending 개를 넘으면 새 레코드를 버리고(dropped), run()이 버린 개수를 로그로 남깁니다.
+    """
+
+    def __init__(self, root, flush_interval=1.0, max_pending=100_000):
+        self.root = Path(root)
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.pending = defaultdict(list)   # {(kind, 코인명): [레코드 튜플, ...]}
+        self.pending_count = 0
+        self.dropped = 0            # 대기열이 가득 차서 버린 레코드 수 (누적)
+        self.reported_dropped = 0   # 마지막으로 로그에 남긴 dropped 값
+        # 코인별로 마지막으로 기록한 분봉 시작 시각 (중복 기록 방지, 쓰기 스레드에서만 사용)
+        self.last_candle_ts = {}
+
+    def _append(self, kind, coin, record):
+        if self.pending_count >= self.max_pending:
+            # 디스크 쓰기가 밀린 경우 매매 루프를 막지 않도록 버림
+            self.dropped += 1
+            return
+        self.pending[(kind, coin)].append(record)
+        self.pending_count += 1
+
+    def record_tick(self, coin, timestamp_ms, price, volume):
+        if timestamp_ms is None or price is None:
+            return
+        self._append("ticks", coin, (int(timestamp_ms), float(price), float(volume or 0.0)))
+
+    def record_candles(self, coin, candles, include_last=False):
+        """
+        업비트 분봉 응답(시간 오름차순)에서 마감된 분봉을 기록합니다. 마지막(진행 중) 분봉은 제외합니다.
+        include_last=True 이면 모두 마감된 분봉으로 보고 마지막 분봉도 기록합니다.
+        이미 기록된 분봉은 쓰기 스레드에서 걸러냅니다.
+        """
+        for candle in (candles if include_last else candles[:-1]):
+            self._append("candles", coin, (
+                candle_start_timestamp(candle), float(candle["opening_price"]), float(candle["high_price"]),
+                float(candle["low_price"]), float(candle["trade_price"]), float(candle["candle_acc_trade_volume"]),
+            ))
+
+    def _last_recorded_candle(self, coin, day):
+        last = self.last_candle_ts.get(coin)
+        if last is None:
+            records = read_records(self.root, day, coin, "candles")
+            last = int(records["timestamp"][-1]) if len(records) else -1
+            self.last_candle_ts[coin] = last
+        return last
+
+    def _write(self, batch):
+        for (kind, coin), records in batch.items():
+            array = np.array(records, dtype=RECORD_DTYPES[kind])
+            day_numbers = _kst_day_numbers(array["timestamp"], kind)
+            for day_number in np.unique(day_numbers):
+                day = _day_name(day_number)
+                rows = array[day_numbers == day_number]
+                if kind == "candles":
+                    rows = rows[rows["timestamp"] > self._last_recorded_candle(coin, day)]
+                    # 같은 분봉은 한 번만 기록 (시간 오름차순)
+                    _, first = np.unique(rows["timestamp"], return_index=True)
+                    rows = rows[first]
+                    if not len(rows):
+                        continue
+                    self.last_candle_ts[coin] = int(rows["timestamp"][-1])
+                path = record_path(self.root, day, coin, kind)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with open(path, "ab") as f:
+                    rows.tofile(f)
+
+    async def flush(self):
+        if not self.pending_count:
+            return
+        batch, self.pending = self.pending, defaultdict(list)
+        self.pending_count = 0
+        await asyncio.to_thread(self._write, batch)
+
+    def report_dropped(self):
+        """마지막 확인 이후 버린 레코드가 있으면 로그로 남깁니다."""
+        dropped = self.dropped - self.reported_dropped
+        if dropped:
+            self.reported_dropped = self.dropped
+            print(f"[{datetime.now()}] 시장 데이터 기록 대기열이 가득 차서 레코드 {dropped}개를 버림 "
+                  f"(누적 {self.dropped}개, 대기열 한도 {self.max_pending}개)")
+
+    async def run(self):
+        """flush_interval 초마다 모인 레코드를 파일에 기록하는 Task"""
+        try:
+            while True:
+                await asyncio.sleep(self.flush_interval)
+                try:
+                    await self.flush()
+                except Exception as e:
+                    print(f"[{datetime.now()}] 시장 데이터 기록 실패: {e}")
+                self.report_dropped()
+        finally:
+            await self.flush()
@@ -0,0 +1,353 @@
+import asyncio
+import atexit
+import json
+import multiprocessing
+import queue
+import time
+from datetime import datetime
+
+import numpy as np
+import websockets
+
+from calculator.async_candle_fetcher import AsyncCandleFetcher, calculate_indicators_async
+from calculator.candle_builder import MinuteCandleBuilder, seconds_until_next_check
+from calculator.coins_indicators_calculator import drop_coins
+from calculator.indicator_store import IndicatorStore
+from calculator.shared_indicator_table import SharedIndicatorTable, CURRENT_PRICE_COLUMN
+from manager.http_client import upbit_ws_url, ssl_context_for
+from manager.request_scheduler import RequestScheduler, GROUP_LIMITS
+from manager.webhook_manager import send_error_webhook
+
+# 종료된 worker 재시작 대기 시간 (초). 연속으로 종료될 때마다 두 배씩 늘림
+WORKER_RESTART_DELAY = 1
+WORKER_RESTART_DELAY_MAX = 60
+# 이 시간(초) 이상 실행된 뒤 종료된 worker는 연속 종료 횟수를 다시 셈
+WORKER_STABLE_SECONDS = 300
+# 연속 종료 횟수가 이 값에 도달하면 오류 웹훅 전송
+WORKER_RESTART_ALERT = 5
+
+
+def shard_coins(coins, shards):
+    """코인을 shard 수만큼 번갈아 나눔 (목록 앞쪽의 코인이 한 shard에 몰리지 않도록)"""
+    return [coins[shard::shards] for shard in range(shards)]
+
+
+class _ShardWorker:
+    """
+    worker 프로세스 하나의 상태. 맡은 코인의 웹소켓 수신과 지표 계산을 하나의 이벤트 루프에서 실행합니다.
+
+    :param rows: {코인명: 공유 테이블 행 번호}
+    :param commands: 메인 프로세스가 보내는 코인 추가/삭제 명령 대기열 (multiprocessing.Queue)
+    :param stream_candles: True 이면 같은 웹소켓으로 trade도 구독해서 1분봉을 직접 만들고, 끊긴 구간만 REST로 채움
+    """
+
+    def __init__(self, shard, table, rows, commands, batched, concurrency, stream_candles=False):
+        self.shard = shard
+        self.table = table
+        self.rows = dict(rows)
+        self.commands = commands
+        self.batched = batched
+        self.concurrency = concurrency
+        self.prefix = f"[shard {shard}]"
+        self.last_prices = {}
+        self.store, self.candle_buffers, self.indicator_engines = IndicatorStore(capacity=max(len(rows), 1)), {}, {}
+        self.rows_changed = asyncio.Event()
+        self.builder = MinuteCandleBuilder() if stream_candles else None
+
+    def apply_commands(self):
+        """메인 프로세스가 보낸 ("add", 코인명, 행 번호) / ("remove", 코인명, 행 번호) 명령을 반영합니다."""
+        changed = False
+        while True:
+            try:
+                command, coin, row = self.commands.get_nowait()
+            except queue.Empty:
+                break
+            changed = True
+            if command == "add":
+                self.rows[coin] = row
+            elif command == "remove":
+                self.rows.pop(coin, None)
+                self.last_prices.pop(coin, None)
+                drop_coins([coin], self.store, self.candle_buffers, self.indicator_engines)
+                self.table.write_rows([row], np.full((1, self.table.matrix.shape[1]), np.nan))
+        if changed:
+            self.rows_changed.set()
+
+    def _subscribe_message(self):
+        codes = sorted(self.rows)
+        types = [{"type": "ticker", "codes": codes}]
+        if self.builder is not None:
+            types.append({"type": "trade", "codes": codes})
+        return json.dumps([{"ticket": f"shard_ticker_{self.shard}"}, *types, {"format": "DEFAULT"}])
+
+    async def stream_prices(self):
+        """
+        맡은 코인 전체의 ticker를 구독해서 체결가를 공유 테이블의 현재가 열에 바로 기록합니다.
+        분봉 생성기가 있으면 trade 메시지로 1분봉을 갱신합니다.
+        코인이 추가/삭제되면 같은 연결로 구독 메시지를 다시 보내고,
+        연결이 끊기면 1초부터 최대 30초까지 간격을 늘려가며 재연결합니다.
+        """
+        url = upbit_ws_url()
+        delay = 1
+        while True:
+            if not self.rows:
+                await self.rows_changed.wait()
+                self.rows_changed.clear()
+                continue
+            try:
+                async with websockets.connect(url, ssl=ssl_context_for(url), compression="deflate") as websocket:
+                    async def resubscribe():
+                        while True:
+                            await self.rows_changed.wait()
+                            self.rows_changed.clear()
+                            await websocket.send(self._subscribe_message())
+
+                    self.rows_changed.clear()
+                    await websocket.send(self._subscribe_message())
+                    if self.builder is not None:
+                        self.builder.connected()
+                    sender = asyncio.create_task(resubscribe())
+                    try:
+                        delay = 1
+                        async for response in websocket:
+                            data = json.loads(response)
+                            code = data.get("code")
+                            row = self.rows.get(code)
+                            trade_price = data.get("trade_price")
+                            if row is None or trade_price is None:
+                                continue
+                            if data.get("type") == "trade":
+                                if self.builder is not None:
+                                    self.builder.on_trade(code, data["trade_timestamp"], trade_price,
+                                                          data["trade_volume"])
+                                continue
+                            self.last_prices[code] = trade_price
+                            self.table.write_price(row, trade_price)
+                    finally:
+                        if self.builder is not None:
+                            self.builder.disconnected()
+                        sender.cancel()
+            except Exception as e:
+                print(f"[{datetime.now()}] {self.prefix} 웹소켓 오류: {e}. {delay}초 후 재연결")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+
+    async def refresh_indicators(self):
+        """
+        매 분(분이 바뀔 때) 맡은 코인의 분봉을 받아 지표를 계산하고 공유 테이블에 기록한 뒤 발행합니다.
+        업비트 요청 제한은 IP 단위이므로, 각 worker는 그룹별 제한을 shard 수로 나눈 예산만 사용합니다.
+        """
+        limits = {group: limit / self.table.shards for group, limit in GROUP_LIMITS.items()}
+        fetcher = AsyncCandleFetcher(RequestScheduler(limits), concurrency=self.concurrency)
+        previous_minute = datetime.now().minute
+        try:
+            while True:
+                self.apply_commands()
+                current_minute = datetime.now().minute
+                if current_minute != previous_minute:
+                    previous_minute = current_minute
+                    start_time = time.time()
+
+                    await calculate_indicators_async(fetcher, self.store, self.candle_buffers, self.indicator_engines,
+                                                     self.batched, coins=list(self.rows), builder=self.builder)
+                    # 계산 중에 삭제된 코인은 기록하지 않음
+                    self.apply_commands()
+                    coins = [coin for coin in self.store.coins if coin in self.rows]
+                    values = self.store.matrix()[[self.store.index[coin] for coin in coins]]
+                    # 분봉 조회 이후 들어온 체결가가 있으면 현재가로 사용
+                    for i, coin in enumerate(coins):
+                        price = self.last_prices.get(coin)
+                        if price is not None:
+                            values[i, CURRENT_PRICE_COLUMN] = price
+                    self.table.write_rows([self.rows[coin] for coin in coins], values)
+                    self.table.publish(self.shard, start_time)
+
+                    print(f"[{datetime.now()}] {self.prefix} 지표 {len(coins)}개 발행 "
+                          f"({time.time() - start_time:.2f}초)")
+
+                # 분이 바뀐 직후(늦게 도착한 체결을 기다린 뒤) 확인하도록 매 초 + CLOSE_GRACE 에 깨어남
+                await asyncio.sleep(seconds_until_next_check())
+        finally:
+            await fetcher.close()
+
+    async def run(self):
+        await asyncio.gather(self.refresh_indicators(), self.stream_prices())
+
+
+def _shard_process(shard, table_name, capacity, shards, rows, commands, batched, concurrency, stream_candles):
+    """worker 프로세스 진입점"""
+    table = SharedIndicatorTable.attach(table_name, capacity, shards)
+    print(f"[{datetime.now()}] [shard {shard}] worker 시작 (코인 {len(rows)}개)")
+    try:
+        asyncio.run(_ShardWorker(shard, table, rows, commands, batched, concurrency, stream_candles).run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        table.close()
+
+
+class ShardedMarket:
+    """
+    KRW 마켓 전체를 worker 프로세스들에 나눠 맡기는 shard 관리자. (SHARD_WORKERS 모드)
+
+    - 각 worker는 자신이 맡은 코인의 ticker 웹소켓과 분봉 조회, 지표 계산을 직접 하고,
+      결과를 공유 메모리 지표 테이블(SharedIndicatorTable)에 기록합니다.
+    - 메인 프로세스는 테이블을 복사해서 타겟 분류만 하므로, JSON 디코딩과 지표 계산이
+      주문 처리와 같은 코어(GIL)를 두고 경쟁하지 않습니다.
+    - apply_diff(): 신규 상장 코인은 가장 적은 코인을 맡은 shard에 추가하고, 상장 폐지 코인은 맡은 shard에서 삭제합니다.
+    - 종료된 worker는 wait_for_cycle() 중에 현재 맡은 코인으로 다시 시작합니다.
+      연속으로 종료되면 재시작 간격을 WORKER_RESTART_DELAY 초부터 최대 WORKER_RESTART_DELAY_MAX 초까지 늘리고,
+      WORKER_RESTART_ALERT 회 연속 종료되면 오류 웹훅을 보냅니다.
+    - 공유 메모리와 명령 대기열은 stop()에서 정리합니다. 프로그램이 stop() 없이 종료되어도 atexit로 정리합니다.
+    """
+
+    def __init__(self, workers, batched=False, concurrency=8, stream_candles=False):
+        self.workers = workers
+        self.batched = batched
+        self.concurrency = concurrency
+        self.stream_candles = stream_candles
+        # 메인 프로세스의 이벤트 루프, 소켓 등을 물려받지 않도록 spawn 방식 사용
+        self.context = multiprocessing.get_context("spawn")
+        self.table = None
+        self.coins = []          # 행 번호 순서의 코인명 (삭제된 행은 None)
+        self.owners = {}         # {코인명: shard 번호}
+        self.assignments = []    # shard별 {코인명: 행 번호}
+        self.commands = []       # shard별 명령 대기열
+        self.processes = []
+        self.started_at = []     # shard별 worker 시작 시각
+        self.failures = []       # shard별 연속 종료 횟수
+        self.restart_at = []     # shard별 재시작 예정 시각 (대기 중이 아니면 None)
+        self.collected = None
+        self.cycle_started = None   # 마지막으로 수집한 주기의 지표 갱신 시작 시각 (epoch 초, 가장 먼저 시작한 shard 기준)
+        atexit.register(self.stop)
+
+    def start(self, coins, capacity=None):
+        """coins를 shard로 나누고 worker 프로세스를 시작합니다."""
+        coins = list(coins)
+        capacity = capacity or max(256, len(coins) * 2)
+        self.table = SharedIndicatorTable.create(capacity, self.workers)
+        self.coins = coins
+        rows = {coin: row for row, coin in enumerate(coins)}
+        self.assignments = [{coin: rows[coin] for coin in part} for part in shard_coins(coins, self.workers)]
+        self.owners = {coin: shard for shard, part in enumerate(self.assignments) for coin in part}
+        self.commands = [self.context.Queue() for _ in range(self.workers)]
+        self.processes = [self._spawn(shard) for shard in range(self.workers)]
+        self.started_at = [time.monotonic()] * self.workers
+        self.failures = [0] * self.workers
+        self.restart_at = [None] * self.workers
+        self.collected = self.table.cycle_counts()
+
+    def _spawn(self, shard):
+        process = self.context.Process(
+            target=_shard_process, name=f"shard-{shard}", daemon=True,
+            args=(shard, self.table.name, self.table.capacity, self.workers, self.assignments[shard],
+                  self.commands[shard], self.batched, self.concurrency, self.stream_candles))
+        process.start()
+        return process
+
+    def _revive(self):
+        now = time.monotonic()
+        for shard, process in enumerate(self.processes):
+            if process.is_alive():
+                continue
+            if self.restart_at[shard] is None:
+                if now - self.started_at[shard] >= WORKER_STABLE_SECONDS:
+                    self.failures[shard] = 0
+                self.failures[shard] += 1
+                delay = min(WORKER_RESTART_DELAY * 2 ** (self.failures[shard] - 1), WORKER_RESTART_DELAY_MAX)
+                self.restart_at[shard] = now + delay
+                print(f"[{datetime.now()}] shard {shard} worker 종료됨 (exitcode={process.exitcode}, "
+                      f"연속 {self.failures[shard]}회). {delay}초 후 다시 시작합니다.")
+                if self.failures[shard] == WORKER_RESTART_ALERT:
+                    send_error_webhook(f"shard {shard} worker 연속 {self.failures[shard]}회 종료 "
+                                       f"(exitcode={process.exitcode}). 확인 필요")
+            if now < self.restart_at[shard]:
+                continue
+            self.restart_at[shard] = None
+            # 이전 worker에 보낸 명령은 현재 맡은 코인 목록에 이미 반영되어 있음
+            self._close_queue(self.commands[shard])
+            self.commands[shard] = self.context.Queue()
+            self.processes[shard] = self._spawn(shard)
+            self.started_at[shard] = now
+
+    @staticmethod
+    def _close_queue(commands):
+        # 읽는 worker가 없으므로 남은 명령을 보내려고 기다리지 않음
+        commands.close()
+        commands.cancel_join_thread()
+
+    def apply_diff(self, added, removed):
+        """
+        마켓 목록 변경분만 worker에 전달합니다.
+        삭제된 코인의 행은 worker가 명령을 받기 전에 기록한 값이 남아 있을 수 있으므로 다시 사용하지 않고,
+        공유 테이블의 행이 부족하면 전체 worker를 더 큰 테이블로 다시 시작합니다.
+        """
+        for coin in removed:
+            shard = self.owners.pop(coin, None)
+            if shard is None:
+                continue
+            row = self.assignments[shard].pop(coin)
+            self.coins[row] = None
+            self.commands[shard].put(("remove", coin, row))
+
+        added = [coin for coin in added if coin not in self.owners]
+        if len(self.coins) + len(added) > self.table.capacity:
+            coins = [coin for coin in self.coins if coin is not None] + added
+            print(f"[{datetime.now()}] 지표 테이블 크기 부족. worker를 다시 시작합니다. (코인 {len(coins)}개)")
+            self.stop()
+            self.start(coins)
+            return
+
+        for coin in added:
+            row = len(self.coins)
+            self.coins.append(coin)
+            shard = min(range(self.workers), key=lambda s: len(self.assignments[s]))
+            self.assignments[shard][coin] = row
+            self.owners[coin] = shard
+            self.commands[shard].put(("add", coin, row))
+
+    async def wait_for_cycle(self, timeout=30, interval=0.05):
+        """
+        모든 shard가 마지막 수집 이후 지표를 다시 발행할 때까지 대기합니다.
+        일부 shard만 발행한 상태로 timeout초가 지나면 발행된 결과만으로 진행합니다.
+
+        발행한 shard 중 가장 먼저 지표 갱신을 시작한 시각을 cycle_started 에 기록합니다.
+
+        :return: 이번 주기에 지표를 발행한 shard 수
+        """
+        first_published = None
+        while True:
+            self._revive()
+            advanced = self.table.cycles > self.collected
+            if advanced.all():
+                break
+            if advanced.any():
+                first_published = first_published or time.monotonic()
+                if time.monotonic() - first_published > timeout:
+                    break
+            await asyncio.sleep(interval)
+        self.collected = self.table.cycle_counts()
+        self.cycle_started = float(self.table.started[advanced].min())
+        return int(advanced.sum())
+
+    def collect(self, indicator_store):
+        """공유 테이블의 지표를 indicator_store에 복사합니다. 아직 계산되지 않은 코인은 제외합니다."""
+        rows = [row for row, coin in enumerate(self.coins) if coin is not None]
+        values = self.table.read_rows(rows)
+        ready = ~np.isnan(values).all(axis=1)
+        indicator_store.update_many([self.coins[row] for row, is_ready in zip(rows, ready) if is_ready],
+                                    values[ready])
+
+    def stop(self):
+        """worker를 종료하고 명령 대기열과 공유 메모리를 정리합니다. (여러 번 호출해도 됨)"""
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            process.join(timeout=5)
+        self.processes = []
+        for commands in self.commands:
+            self._close_queue(commands)
+        self.commands = []
+        if self.table is not None:
+            self.table.close()
+            self.table = None
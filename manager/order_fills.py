@@ -0,0 +1,51 @@
+import asyncio
+from collections import OrderedDict
+
+
+class OrderFillRegistry:
+    """
+    주문 uuid별 체결 완료 알림.
+
+    private 웹소켓(myOrder)에서 주문 체결이 끝나면 resolve()로 체결 정보를 기록하고,
+    해당 주문을 기다리는 거래를 즉시 깨웁니다.
+    주문 응답보다 체결 알림이 먼저 도착할 수 있으므로, 최근 체결 정보는 max_completed개까지 보관합니다.
+    """
+
+    def __init__(self, max_completed=1000):
+        self.max_completed = max_completed
+        self.completed = OrderedDict()   # {주문 uuid: 체결 정보}
+        self.waiters = {}                # {주문 uuid: [future, ...]}
+
+    def resolve(self, order_uuid, fill):
+        """
+        체결 정보 예: {"code": "KRW-BTC", "side": "bid", "avg_price": 1000.0, "executed_volume": 0.1}
+        """
+        self.completed[order_uuid] = fill
+        self.completed.move_to_end(order_uuid)
+        while len(self.completed) > self.max_completed:
+            self.completed.popitem(last=False)
+
+        for future in self.waiters.pop(order_uuid, []):
+            if not future.done():
+                future.set_result(fill)
+
+    async def wait(self, order_uuid, timeout):
+        """
+        주문이 체결될 때까지 최대 timeout초 대기합니다.
+        :return: 체결 정보, 시간 안에 체결 알림이 없으면 None
+        """
+        if order_uuid in self.completed:
+            return self.completed[order_uuid]
+
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.setdefault(order_uuid, []).append(future)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            waiters = self.waiters.get(order_uuid)
+            if waiters and future in waiters:
+                waiters.remove(future)
+                if not waiters:
+                    del self.waiters[order_uuid]
@@ -0,0 +1,157 @@
+import asyncio
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+# 저널 쓰기 실패 시 재시도 대기 시간 (초). 연속으로 실패할 때마다 두 배씩 늘림
+RETRY_DELAY = 1
+RETRY_DELAY_MAX = 60
+
+
+def _fsync_directory(path):
+    """파일 생성/교체(rename)가 전원이 꺼져도 남도록 디렉터리 항목을 디스크에 기록"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def replay(path):
+    """
+    저널 파일을 처음부터 다시 적용해서 구매 기록을 복원합니다.
+    기록 중에 종료되어 마지막 줄이 잘린 경우 해당 줄은 무시합니다.
+
+    :return: {코인명: {"date", "buy_price", "volume"}}
+    """
+    purchases = {}
+    path = Path(path)
+    if not path.exists():
+        return purchases
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("op") == "buy":
+                purchases[record["coin"]] = {key: record[key] for key in ("date", "buy_price", "volume")}
+            elif record.get("op") == "clear":
+                purchases.pop(record["coin"], None)
+    return purchases
+
+
+class PurchaseJournal:
+    """
+    구매 기록(매수 / 기록 삭제)을 한 줄짜리 JSON 레코드로 이어서 기록하는 append-only 저널.
+
+    - append(): 메모리 대기열에 추가만 하므로 이벤트 루프에서 디스크 I/O를 하지 않습니다.
+    - run(): 대기열에 레코드가 생기면 flush_interval 동안 더 모아서, 별도 스레드에서 한 번에 쓰고 fsync 합니다.
+      (09:00에 여러 매수가 몰려도 쓰기 1회)
+    - compact_every개 레코드를 쓸 때마다 현재 구매 기록만 남도록 저널을 새로 써서 교체합니다.
+    - 쓰기에 실패하면 RETRY_DELAY 초부터 최대 RETRY_DELAY_MAX 초까지 간격을 늘려가며 다시 시도하고,
+      연속 실패가 시작될 때 오류 웹훅을 한 번 보냅니다.
+    """
+
+    def __init__(self, path, flush_interval=0.05, compact_every=1000):
+        self.path = Path(path)
+        self.flush_interval = flush_interval
+        self.compact_every = compact_every
+        self.pending = []
+        self.written_since_compaction = 0
+        self._tail_checked = False
+        self._wakeup = asyncio.Event()
+
+    def append(self, record):
+        self.pending.append(record)
+        self._wakeup.set()
+
+    def record_buy(self, coin, date, buy_price, volume):
+        self.append({"op": "buy", "coin": coin, "date": date, "buy_price": buy_price, "volume": volume})
+
+    def record_clear(self, coin):
+        self.append({"op": "clear", "coin": coin})
+
+    def _ends_with_partial_line(self):
+        """이전 실행이 줄 중간에서 종료된 경우, 새 레코드가 잘린 줄에 붙지 않도록 확인"""
+        if not self.path.exists() or self.path.stat().st_size == 0:
+            return False
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b"\n"
+
+    def _write(self, batch):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        partial = not self._tail_checked and self._ends_with_partial_line()
+        self._tail_checked = True
+        created = not self.path.exists()
+        with open(self.path, "a", encoding="utf-8") as f:
+            if partial:
+                f.write("\n")
+            f.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in batch))
+            f.flush()
+            os.fsync(f.fileno())
+        if created:
+            _fsync_directory(self.path.parent)
+        self.written_since_compaction += len(batch)
+        if self.written_since_compaction >= self.compact_every:
+            self.compact()
+
+    def compact(self, purchases=None):
+        """
+        현재 구매 기록만 담은 새 저널을 만든 뒤 원자적으로 교체합니다.
+        purchases를 주지 않으면 저널을 다시 읽어서 만듭니다.
+        """
+        purchases = replay(self.path) if purchases is None else purchases
+        temp_path = self.path.with_name(self.path.name + ".tmp")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for coin, purchase in purchases.items():
+                f.write(json.dumps({"op": "buy", "coin": coin, **purchase}, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        _fsync_directory(self.path.parent)
+        self.written_since_compaction = 0
+
+    async def flush(self):
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        try:
+            await asyncio.to_thread(self._write, batch)
+        except Exception:
+            # 다음 기록 때 다시 시도
+            self.pending[:0] = batch
+            self._wakeup.set()
+            raise
+
+    async def run(self):
+        """대기열에 쌓인 레코드를 모아서 기록하는 Task (group commit)"""
+        # shared_resources -> purchase_journal -> webhook_manager -> shared_resources 순환 import 방지
+        from manager.webhook_manager import send_error_webhook
+
+        failures = 0
+        try:
+            while True:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                # 같은 시각에 몰린 다른 레코드를 함께 기록
+                await asyncio.sleep(self.flush_interval)
+                try:
+                    await self.flush()
+                except Exception as e:
+                    failures += 1
+                    delay = min(RETRY_DELAY * 2 ** (failures - 1), RETRY_DELAY_MAX)
+                    print(f"[{datetime.now()}] 구매 기록 저널 쓰기 실패 (연속 {failures}회): {e}. {delay}초 후 재시도")
+                    if failures == 1:
+                        send_error_webhook(f"구매 기록 저널 쓰기 실패: {e!r}. 기록 {len(self.pending)}개 대기 중, "
+                                           f"재시도 중 (디스크 확인 필요)")
+                    await asyncio.sleep(delay)
+                    continue
+                if failures:
+                    print(f"[{datetime.now()}] 구매 기록 저널 쓰기 복구 ({failures}회 실패 후)")
+                    failures = 0
+        finally:
+            await self.flush()
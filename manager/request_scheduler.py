@@ -0,0 +1,219 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+# 요청 우선순위 (숫자가 작을수록 우선)
+PRIORITY_ORDER = 0
+PRIORITY_ACCOUNT = 1
+PRIORITY_CANDLE = 2
+
+# 업비트 요청 그룹별 초당 요청 제한
+GROUP_LIMITS = {
+    "order": 8,         # 주문 생성
+    "default": 30,      # 주문 외 Exchange API (계좌 조회 등)
+    "market": 10,       # 마켓 코드 조회
+    "candles": 10,      # 캔들 조회
+    "ticker": 10,
+    "trades": 10,
+    "orderbook": 10,
+}
+
+# 우선순위가 낮은 요청은 그룹 예산을 이만큼 남겨둔 상태에서만 요청할 수 있음
+PRIORITY_RESERVE = {
+    PRIORITY_ORDER: 0,
+    PRIORITY_ACCOUNT: 1,
+    PRIORITY_CANDLE: 2,
+}
+
+
+def parse_remaining_req(header):
+    """
+    Remaining-Req 헤더를 파싱합니다.
+    예: "group=default; min=1800; sec=29" -> ("default", 29)
+    """
+    fields = {}
+    for part in header.split(";"):
+        key, _, value = part.strip().partition("=")
+        fields[key] = value
+    return fields.get("group"), int(fields["sec"]) if fields.get("sec", "").isdigit() else None
+
+
+class TokenBucket:
+    """
+    초당 rate개의 토큰이 채워지는 토큰 버킷.
+    요청 전에 acquire()로 토큰을 받아야 하므로, 요청 제한을 넘기기 전에 미리 속도를 조절합니다.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, tokens=1, reserve=0):
+        """
+        토큰을 받을 때까지 대기합니다.
+        reserve: 버킷에 남겨둬야 하는 토큰 수 (우선순위가 높은 요청 몫)
+        """
+        needed = min(tokens + reserve, self.capacity)
+        while True:
+            self._refill()
+            if self.tokens >= needed:
+                self.tokens -= tokens
+                return
+            await asyncio.sleep((needed - self.tokens) / self.rate)
+
+    def limit_to(self, remaining):
+        """서버가 알려준 남은 요청 수보다 많은 토큰을 가지고 있지 않도록 맞춤"""
+        self._refill()
+        self.tokens = min(self.tokens, float(remaining))
+
+    def drain(self):
+        """429 응답을 받은 경우, 남은 토큰을 비워 다음 요청을 늦춤"""
+        self.limit_to(0)
+
+
+class SlidingWindowLimiter:
+    """
+    최근 window초 동안의 요청 수를 limit개 이하로 유지하는 슬라이딩 윈도우 제한기.
+
+    업비트는 초당 요청 수를 직전 1초 구간으로 세므로, 토큰 버킷처럼 처음부터 가득 찬 예산으로
+    첫 1초에 2 x limit 개를 보내는 일이 없습니다.
+    - 응답을 받기 전인 요청(in_flight)도 예산을 차지합니다.
+    - 요청이 끝나면 끝난 시각을 기록하고, 그 시각부터 window초 동안 예산을 차지합니다.
+      (서버가 요청을 받은 시각은 끝난 시각 이전이므로, 지연이 들쭉날쭉해도 서버 기준 1초에 limit개를 넘지 않음)
+    """
+
+    def __init__(self, limit, window=1.0):
+        self.limit = int(limit)     # 샤드별로 나눈 예산 등 소수는 내림
+        self.window = window
+        self.sent = deque()     # 끝난 요청 시각 (오름차순)
+        self.in_flight = 0
+        self.released = None
+
+    def _expire(self, now):
+        while self.sent and self.sent[0] <= now - self.window:
+            self.sent.popleft()
+
+    def used(self):
+        """현재 예산을 차지하고 있는 요청 수"""
+        self._expire(time.monotonic())
+        return len(self.sent) + self.in_flight
+
+    async def acquire(self, reserve=0):
+        """
+        예산이 생길 때까지 대기한 뒤 요청 1개를 진행 중으로 등록합니다. 요청이 끝나면 release()를 호출해야 합니다.
+        reserve: 남겨둬야 하는 예산 (우선순위가 높은 요청 몫)
+        """
+        allowed = max(self.limit - reserve, 1)
+        while True:
+            now = time.monotonic()
+            self._expire(now)
+            if len(self.sent) + self.in_flight < allowed:
+                self.in_flight += 1
+                return
+            # 가장 오래된 요청이 구간을 벗어나거나, 진행 중인 요청이 끝날 때까지 대기
+            if self.released is None:
+                self.released = asyncio.Event()
+            delay = self.sent[0] + self.window - now if self.sent else self.window
+            try:
+                await asyncio.wait_for(self.released.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def release(self):
+        self.in_flight -= 1
+        self.sent.append(time.monotonic())
+        if self.released is not None:
+            self.released.set()
+            self.released = None
+
+    def limit_to(self, remaining):
+        """
+        서버가 알려준 남은 요청 수보다 예산이 많이 남아 있으면, 차이만큼을 지금 보낸 요청으로 간주합니다.
+        (다른 프로세스나 이전 실행의 요청처럼 이 제한기가 모르는 요청 몫)
+        """
+        now = time.monotonic()
+        self._expire(now)
+        unknown = (self.limit - remaining) - (len(self.sent) + self.in_flight)
+        self.sent.extend([now] * max(unknown, 0))
+
+    def drain(self):
+        """429 응답을 받은 경우, 앞으로 window초 동안 예산을 모두 사용한 것으로 간주"""
+        self.limit_to(0)
+
+
+class RequestScheduler:
+    """
+    업비트 REST 요청(주문, 계좌 조회, 캔들 조회)이 공유하는 요청 예산 스케줄러.
+
+    - 그룹별 슬라이딩 윈도우로 직전 1초의 요청 수(응답 대기 중인 요청 포함)를 제한하고,
+      응답의 Remaining-Req 헤더로 남은 예산을 보정합니다.
+    - 우선순위가 높은 요청이 대기/진행 중이면 낮은 우선순위 요청은 시작하지 않고 기다립니다.
+    - 낮은 우선순위 요청은 그룹 예산 일부를 남겨둔 상태에서만 요청하므로, 주문이 429에 막히지 않습니다.
+
+    사용 예:
+        async with scheduler.request("order", PRIORITY_ORDER):
+            response = await session.post(...)
+            scheduler.observe(response.headers)
+    """
+
+    def __init__(self, limits=None, reserve=None):
+        self.limits = dict(GROUP_LIMITS if limits is None else limits)
+        self.reserve = dict(PRIORITY_RESERVE if reserve is None else reserve)
+        self.limiters = {}
+        self.active = {priority: 0 for priority in self.reserve}
+        self.condition = None
+
+    def _limiter(self, group):
+        limiter = self.limiters.get(group)
+        if limiter is None:
+            limiter = SlidingWindowLimiter(self.limits.get(group, GROUP_LIMITS["default"]))
+            self.limiters[group] = limiter
+        return limiter
+
+    def _higher_priority_active(self, priority):
+        return any(count for p, count in self.active.items() if p < priority)
+
+    @asynccontextmanager
+    async def request(self, group, priority):
+        if self.condition is None:
+            self.condition = asyncio.Condition()
+
+        self.active[priority] = self.active.get(priority, 0) + 1
+        try:
+            # 우선순위가 높은 요청이 끝날 때까지 대기
+            if self._higher_priority_active(priority):
+                async with self.condition:
+                    await self.condition.wait_for(lambda: not self._higher_priority_active(priority))
+            limiter = self._limiter(group)
+            await limiter.acquire(reserve=self.reserve.get(priority, 0))
+            try:
+                yield
+            finally:
+                limiter.release()
+        finally:
+            self.active[priority] -= 1
+            async with self.condition:
+                self.condition.notify_all()
+
+    def observe(self, headers):
+        """
+        응답 헤더의 Remaining-Req 값으로 해당 그룹의 남은 예산을 보정합니다.
+        """
+        header = headers.get("Remaining-Req")
+        if not header:
+            return
+        group, remaining = parse_remaining_req(header)
+        if group is not None and remaining is not None:
+            self._limiter(group).limit_to(remaining)
+
+    def penalize(self, group):
+        """429 응답을 받은 그룹의 예산을 비움"""
+        self._limiter(group).drain()
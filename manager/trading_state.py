@@ -0,0 +1,146 @@
+import asyncio
+import random
+from dataclasses import dataclass, field
+from types import MappingProxyType
+
+
+@dataclass(frozen=True)
+class TradingSnapshot:
+    """
+    거래 상태의 읽기 전용 스냅샷. 상태가 바뀔 때마다 version이 1씩 증가한 새 스냅샷이 만들어집니다.
+
+    targets: 조건에 부합하는 코인 {코인명: 분류 시점의 현재가}
+    trading: 거래 대상으로 선택된 코인 {코인명: 선택 시점의 현재가} (최대 max_trading개)
+    active: 거래(process_trade)가 진행 중인 코인
+    strategies: target / trading 코인을 선택한 전략 이름 {코인명: 전략 이름}
+    """
+    version: int = 0
+    targets: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+    trading: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+    active: frozenset = frozenset()
+    strategies: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+
+
+class TradingStateActor:
+    """
+    target / trading / active 코인 상태를 혼자 소유하고 변경하는 상태 actor.
+
+    - 변경은 명령 대기열을 통해서만 run() Task가 순서대로 처리하므로 락이 필요 없습니다.
+    - 읽는 쪽은 snapshot 속성(불변 스냅샷)을 락 없이 바로 읽습니다.
+    - 명령 함수는 처리 결과를 기다릴 수 있는 코루틴입니다. (await actor.start_trade(coin))
+    """
+
+    def __init__(self, max_trading=5):
+        self.max_trading = max_trading
+        self.snapshot = TradingSnapshot()
+        self.queue = asyncio.Queue()
+        self._targets = {}
+        self._trading = {}
+        self._active = set()
+        self._target_strategies = {}    # {target 코인명: 전략 이름}
+        self._trading_strategies = {}   # {trading 코인명: 전략 이름}
+        self._changed = asyncio.Event()
+
+    # ---------------------------------------------------------------- 명령
+    async def _ask(self, command, *args):
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((command, args, future))
+        return await future
+
+    async def replace_targets(self, targets, strategies=None):
+        """
+        매 분 타겟 분류 결과로 target 목록을 교체합니다.
+        strategies: {코인명: 전략 이름} (trading으로 선택된 코인은 거래가 끝날 때까지 전략을 유지)
+        """
+        return await self._ask(self._replace_targets, dict(targets), dict(strategies or {}))
+
+    async def fill_trading(self):
+        """
+        trading이 max_trading개 미만이면, 부족한 개수만큼 target 중 (trading에 없는 코인에서) 랜덤하게 선택해 추가합니다.
+        선택된 코인은 거래 종료 즉시 다시 선택되지 않도록 target에서 제거합니다.
+        :return: 새로 추가된 코인 리스트
+        """
+        return await self._ask(self._fill_trading)
+
+    async def start_trade(self, coin):
+        """
+        trading에 있고 거래 중이 아닌 코인을 거래 중으로 표시합니다.
+        :return: 거래를 시작해도 되면 True
+        """
+        return await self._ask(self._start_trade, coin)
+
+    async def finish_trade(self, coin):
+        """거래가 끝난 코인을 trading과 active에서 제거합니다."""
+        return await self._ask(self._finish_trade, coin)
+
+    # ---------------------------------------------------------------- 명령 처리 (run Task 안에서만 호출)
+    def _replace_targets(self, targets, strategies):
+        self._targets = targets
+        self._target_strategies = strategies
+        return True, None
+
+    def _fill_trading(self):
+        needed = self.max_trading - len(self._trading)
+        available = [coin for coin in self._targets if coin not in self._trading]
+        if needed <= 0 or not available:
+            return False, []
+        selected = random.sample(available, k=min(needed, len(available)))
+        for coin in selected:
+            self._trading[coin] = self._targets.pop(coin)
+            strategy = self._target_strategies.pop(coin, None)
+            if strategy is not None:
+                self._trading_strategies[coin] = strategy
+        return True, selected
+
+    def _start_trade(self, coin):
+        if coin not in self._trading or coin in self._active:
+            return False, False
+        self._active.add(coin)
+        return True, True
+
+    def _finish_trade(self, coin):
+        changed = coin in self._active or coin in self._trading
+        self._active.discard(coin)
+        self._trading.pop(coin, None)
+        self._trading_strategies.pop(coin, None)
+        return changed, None
+
+    def _publish(self):
+        self.snapshot = TradingSnapshot(
+            version=self.snapshot.version + 1,
+            targets=MappingProxyType(dict(self._targets)),
+            trading=MappingProxyType(dict(self._trading)),
+            active=frozenset(self._active),
+            strategies=MappingProxyType({**self._target_strategies, **self._trading_strategies}),
+        )
+        # 변경을 기다리는 쪽을 깨우고 다음 변경용 이벤트로 교체
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def changed(self, version):
+        """snapshot.version이 version보다 커질 때까지 대기하고 새 스냅샷을 반환합니다."""
+        while self.snapshot.version <= version:
+            await self._changed.wait()
+        return self.snapshot
+
+    async def run(self):
+        """명령을 순서대로 처리하고, 상태가 바뀌면 새 스냅샷을 발행하는 Task"""
+        while True:
+            command, args, future = await self.queue.get()
+            changed = False
+            # 같은 시점에 쌓인 명령을 모두 처리한 뒤 스냅샷은 한 번만 발행
+            while True:
+                try:
+                    command_changed, result = command(*args)
+                except Exception as e:
+                    command_changed, result = False, None
+                    if not future.done():
+                        future.set_exception(e)
+                changed |= command_changed
+                if not future.done():
+                    future.set_result(result)
+                if self.queue.empty():
+                    break
+                command, args, future = self.queue.get_nowait()
+            if changed:
+                self._publish()
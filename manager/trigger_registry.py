@@ -0,0 +1,84 @@
+import asyncio
+import bisect
+import itertools
+
+
+class PriceTriggerRegistry:
+    """
+    코인별 목표가(익절가) 트리거를 가격 오름차순으로 정렬해서 보관합니다.
+
+    가격 수신 Task가 틱마다 check()를 호출하면, 목표가 이하인 트리거만 꺼내서 대기 중인 거래를 즉시 깨웁니다.
+    가장 낮은 목표가만 비교하므로 트리거가 걸리지 않은 틱의 비용은 O(1)이며,
+    거래별로 1초마다 가격을 확인하는 루프가 필요 없습니다.
+    """
+
+    def __init__(self):
+        # {코인명: [(목표가, 순번, future), ...]} (목표가 오름차순)
+        self.triggers = {}
+        # {코인명: 트리거를 완료시킨 틱의 수신 시각(time.perf_counter())} (지연 시간 측정용)
+        self.fired_at = {}
+        self._sequence = itertools.count()
+
+    def register(self, coin, threshold):
+        """
+        목표가 트리거를 등록하고, 현재가가 목표가 이상이 되면 그 가격으로 완료되는 future를 반환합니다.
+        """
+        future = asyncio.get_running_loop().create_future()
+        bisect.insort(self.triggers.setdefault(coin, []), (threshold, next(self._sequence), future))
+        return future
+
+    def cancel(self, coin, future):
+        triggers = self.triggers.get(coin)
+        if not triggers:
+            return
+        self.triggers[coin] = [entry for entry in triggers if entry[2] is not future]
+        if not self.triggers[coin]:
+            del self.triggers[coin]
+        if not future.done():
+            future.cancel()
+
+    def check(self, coin, price, received_at=None):
+        """
+        새 가격이 들어올 때마다 호출합니다. 목표가에 도달한 트리거를 모두 완료시킵니다.
+        received_at: 해당 틱의 수신 시각. 주어지면 트리거가 완료될 때 fired_at에 기록합니다.
+        """
+        triggers = self.triggers.get(coin)
+        if not triggers or triggers[0][0] > price:
+            return
+        if received_at is not None:
+            self.fired_at[coin] = received_at
+
+        fired = bisect.bisect_right(triggers, (price, float("inf")))
+        for _, _, future in triggers[:fired]:
+            if not future.done():
+                future.set_result(price)
+        del triggers[:fired]
+        if not triggers:
+            del self.triggers[coin]
+
+    def fire(self, coin, price):
+        """
+        목표가와 관계없이 코인의 트리거를 모두 price로 완료시킵니다. (전략 청산 조건 충족 시 대기 중인 거래를 깨움)
+        :return: 완료시킨 트리거가 있으면 True
+        """
+        triggers = self.triggers.pop(coin, ())
+        for _, _, future in triggers:
+            if not future.done():
+                future.set_result(price)
+        return bool(triggers)
+
+    async def wait(self, coin, threshold, current_price=None):
+        """
+        현재가가 목표가 이상이 될 때까지 대기하고, 도달한 가격을 반환합니다.
+        이미 목표가 이상이라면 바로 반환합니다.
+        """
+        if current_price is not None and current_price >= threshold:
+            return current_price
+
+        future = self.register(coin, threshold)
+        try:
+            return await future
+        finally:
+            # 대기가 취소된 경우 트리거 정리
+            if not future.done() or future.cancelled():
+                self.cancel(coin, future)
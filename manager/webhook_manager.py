@@ -1,31 +1,150 @@
+import asyncio
+from datetime import datetime
+
 import httpx
+
+from manager.http_client import get_webhook_client
+from manager.request_scheduler import TokenBucket
 from shared_resources import WEBHOOK_URL, WEBHOOK_ERROR_URL
 
-async def send_webhook(message):
-    # 일반적인 내용 전송
-    payload = {
-        'content': message
-    }
-    headers={
-        "Content-Type": "application/json"
-    }
-    try:
-        async with httpx.AsyncClient() as client:
-            await client.post(WEBHOOK_URL, json=payload, headers=headers)
-    except Exception as e:
-        print("웹훅 전송 중 오류 발생")
-
-async def send_error_webhook(message):
-    # 오류 전송
-    message= f"⚠️{message}"
-    payload = {
-        'content': message
-    }
-    headers={
-        "Content-Type": "application/json"
-    }
-    try:
-        async with httpx.AsyncClient() as client:
-            await client.post(WEBHOOK_ERROR_URL, json=payload, headers=headers)
-    except Exception as e:
-        print("웹훅 전송 중 오류 발생")
\ No newline at end of file
+# 디스코드 웹훅 제한: 메시지 길이 2000자, 웹훅당 2초에 5회
+WEBHOOK_MAX_LENGTH = 2000
+WEBHOOK_RATE = 5 / 2
+
+
+class WebhookDispatcher:
+    """
+    하나의 웹훅 주소로 메시지를 보내는 전송 Task.
+
+    - submit(): 크기가 제한된 대기열에 넣기만 하고 바로 반환하므로, 알림이 매매 루프를 막지 않습니다.
+      대기열이 가득 차면 메시지를 버리고 개수만 세었다가 다음 전송에 요약해서 붙입니다.
+    - 첫 메시지가 들어오면 coalesce_window 초 동안 모인 메시지를 한 번의 요청(최대 2000자)으로 합칩니다.
+      같은 메시지가 반복되면 한 줄로 합치고 반복 횟수를 표시합니다.
+    - 초당 요청 수는 토큰 버킷으로 웹훅 제한에 맞추며, 429 응답은 Retry-After 만큼 기다린 뒤 다시 보냅니다.
+    """
+
+    def __init__(self, url, max_queue=200, coalesce_window=0.5, max_retries=3):
+        self.url = url
+        self.queue = asyncio.Queue(max_queue)
+        self.coalesce_window = coalesce_window
+        self.max_retries = max_retries
+        self.bucket = TokenBucket(WEBHOOK_RATE, capacity=5)
+        self.dropped = 0
+        self.task = None
+
+    def submit(self, message):
+        if not self.url:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.dropped += 1
+        self._ensure_running()
+
+    def _ensure_running(self):
+        if self.task is None or self.task.done():
+            try:
+                self.task = asyncio.get_running_loop().create_task(self.run())
+            except RuntimeError:
+                # 이벤트 루프 밖에서 호출된 경우, 다음 submit()에서 시작
+                pass
+
+    def _drain(self, first):
+        messages = [first]
+        while not self.queue.empty():
+            messages.append(self.queue.get_nowait())
+        return messages
+
+    def _compose(self, messages):
+        """메시지를 합쳐서 WEBHOOK_MAX_LENGTH 이하의 본문 목록으로 만듦"""
+        counts = {}
+        for message in messages:
+            counts[message] = counts.get(message, 0) + 1
+        lines = [message if count == 1 else f"{message} (x{count})" for message, count in counts.items()]
+        if self.dropped:
+            lines.append(f"⚠️ 알림이 너무 많아 메시지 {self.dropped}건을 생략했습니다.")
+            self.dropped = 0
+
+        contents, current = [], ""
+        for line in lines:
+            line = line[:WEBHOOK_MAX_LENGTH]
+            if current and len(current) + 1 + len(line) > WEBHOOK_MAX_LENGTH:
+                contents.append(current)
+                current = ""
+            current = f"{current}\n{line}" if current else line
+        if current:
+            contents.append(current)
+        return contents
+
+    async def _post(self, content):
+        payload = {
+            'content': content
+        }
+        headers = {
+            "Content-Type": "application/json"
+        }
+        for _ in range(self.max_retries):
+            await self.bucket.acquire()
+            response = await get_webhook_client().post(self.url, json=payload, headers=headers)
+            if response.status_code != 429:
+                return
+            self.bucket.drain()
+            try:
+                retry_after = float(response.headers.get("Retry-After", 1))
+            except ValueError:
+                retry_after = 1.0
+            await asyncio.sleep(retry_after)
+
+    async def run(self):
+        while True:
+            first = await self.queue.get()
+            await asyncio.sleep(self.coalesce_window)
+            messages = self._drain(first)
+            try:
+                for content in self._compose(messages):
+                    await self._post(content)
+            except (httpx.HTTPError, OSError) as e:
+                print(f"[{datetime.now()}] 웹훅 전송 중 오류 발생: {e}")
+            finally:
+                for _ in messages:
+                    self.queue.task_done()
+
+    async def flush(self, timeout=5):
+        """대기열의 메시지를 모두 보낼 때까지 최대 timeout초 대기 (프로그램 종료 전)"""
+        if self.task is None or self.task.done():
+            return
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def close(self):
+        await self.flush()
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+
+webhook_dispatcher = WebhookDispatcher(WEBHOOK_URL)
+error_webhook_dispatcher = WebhookDispatcher(WEBHOOK_ERROR_URL)
+
+
+def send_webhook(message):
+    # 일반적인 내용 전송 (대기열에 넣고 바로 반환)
+    webhook_dispatcher.submit(message)
+
+
+def send_error_webhook(message):
+    # 오류 전송 (대기열에 넣고 바로 반환)
+    error_webhook_dispatcher.submit(f"⚠️{message}")
+
+
+async def flush_webhooks(timeout=5):
+    """
+    대기 중인 웹훅을 모두 보낼 때까지 대기합니다. 프로그램을 종료하기 직전에 호출합니다.
+    """
+    await asyncio.gather(webhook_dispatcher.flush(timeout), error_webhook_dispatcher.flush(timeout))
+
+
+async def close_webhooks():
+    await asyncio.gather(webhook_dispatcher.close(), error_webhook_dispatcher.close())
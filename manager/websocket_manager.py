@@ -1,26 +1,60 @@
 import asyncio
+import json
 import sys
-import certifi
+import uuid
+import jwt
 import websockets
 from datetime import datetime
-import ssl
-from manager.webhook_manager import send_webhook, send_error_webhook
+from manager.http_client import upbit_ws_url, ssl_context_for
+from manager.webhook_manager import send_webhook, send_error_webhook, flush_webhooks
 import shared_resources
 
 async def public_websocket_connect():
     """"
     업비트 websocket_public 용으로 사용할 웹소켓을 반환합니다.
     """
-    url = "wss://api.upbit.com/websocket/v1"
-    ssl_context = ssl.create_default_context(cafile=certifi.where())
+    url = upbit_ws_url()
+    ssl_context = ssl_context_for(url)
     try:
         websocket = await websockets.connect(url, ssl=ssl_context, compression="deflate")
         msg = f"✅ 웹소켓 연결 성공!"
-        asyncio.create_task(send_webhook(msg))
+        send_webhook(msg)
         print(f"[{datetime.now()}]" + msg)
         shared_resources.upbit_websocket = websocket
     except Exception as e:
         msg = f"웹소켓 연결 실패: {e}"
-        await send_error_webhook(msg)
+        send_error_webhook(msg)
         print(f"[{datetime.now()}]" + msg)
+        await flush_webhooks()
         sys.exit(0)
+
+
+async def private_websocket_connect(ACCESS_KEY, SECRET_KEY):
+    """
+    업비트 websocket_private(myAsset, myOrder) 용 웹소켓을 연결하고 구독 메시지를 전송합니다.
+    연결에 실패하면 None을 반환합니다. (계좌 정보는 REST 조회로 보완)
+    """
+    url = upbit_ws_url("/private")
+    payload = {
+        "access_key": ACCESS_KEY,
+        "nonce": str(uuid.uuid4()),
+    }
+    jwt_token = jwt.encode(payload, SECRET_KEY, algorithm="HS256")
+    headers = {"Authorization": f"Bearer {jwt_token}"}
+    subscribe_msg = json.dumps([
+        {"ticket": f"private_{uuid.uuid4()}"},
+        {"type": "myAsset"},
+        {"type": "myOrder"},
+        {"format": "DEFAULT"}
+    ])
+    try:
+        websocket = await websockets.connect(url, ssl=ssl_context_for(url), additional_headers=headers)
+        await websocket.send(subscribe_msg)
+        print(f"[{datetime.now()}]✅ private 웹소켓 연결 성공!")
+        shared_resources.upbit_private_websocket = websocket
+        return websocket
+    except Exception as e:
+        msg = f"private 웹소켓 연결 실패: {e}"
+        send_error_webhook(msg)
+        print(f"[{datetime.now()}]" + msg)
+        return None
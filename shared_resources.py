@@ -5,27 +5,51 @@ from zoneinfo import ZoneInfo
 from pathlib import Path
 from datetime import datetime as _dt
 import json
+from calculator.indicator_store import IndicatorStore
+from calculator.market_universe import MarketUniverse
+from calculator.candle_builder import MinuteCandleBuilder
+from calculator.timeframe_aggregator import TimeframeIndicators, parse_timeframes
+from calculator.strategy import StrategyEngine, load_strategies
+from calculator.target_calculator import DEFAULT_STRATEGY
+from manager.request_scheduler import RequestScheduler
+from manager.trigger_registry import PriceTriggerRegistry
+from manager.order_fills import OrderFillRegistry
+from manager.market_recorder import MarketRecorder
+from manager.latency_metrics import LatencyMetrics
+from manager.purchase_journal import PurchaseJournal, replay
+from manager.trading_state import TradingStateActor
 
 load_dotenv()  # .env 파일 로드
 
 KST = ZoneInfo("Asia/Seoul")
 DATA_DIR = Path("./data")
 DATA_DIR.mkdir(exist_ok=True)
+# 이전 버전의 구매 기록 파일 (저널이 없을 때 1회 가져옴)
 PURCHASES_FILE = DATA_DIR / "purchases.json"
+PURCHASES_JOURNAL = DATA_DIR / "purchases.journal"
 
 # 공유 자원 (각 Task들이 사용하는 데이터)
-indicators_dict = {}
-target_dict = {}
-trading_dict = {}
+indicator_store = IndicatorStore()
+candle_buffers = {}
+indicator_engines = {}
+price_cache = {}
+price_triggers = PriceTriggerRegistry()
 wallet_dict = {}
-active_trades = set()
+order_fills = OrderFillRegistry()
 upbit_websocket = None
+upbit_private_websocket = None
+# private 웹소켓(myAsset, myOrder) 수신 중 여부 (False 이면 REST 계좌 조회를 1초마다 실행)
+private_stream_connected = False
 
+# KRW 마켓 목록 캐시 (MARKET_UNIVERSE_TTL 초마다 다시 조회해서 상장/상장 폐지 반영)
+MARKET_UNIVERSE_TTL = int(os.environ.get("MARKET_UNIVERSE_TTL", "3600"))
+market_universe = MarketUniverse(MARKET_UNIVERSE_TTL)
 
-# 비동기 락 (각 공유 자원별로 생성)
-target_lock = asyncio.Lock()
-trading_lock = asyncio.Lock()
-active_lock = asyncio.Lock()
+# 업비트 REST 요청 예산 스케줄러 (주문 > 계좌 조회 > 캔들 조회 순으로 우선)
+request_scheduler = RequestScheduler()
+
+# target / trading / active 코인 상태 (trading_state.run() Task만 변경하고, 나머지 Task는 스냅샷을 읽음)
+trading_state = TradingStateActor(max_trading=5)
 
 # 업비트 API 키
 ACCESS_KEY = os.environ.get("ACCESS_KEY")
@@ -38,32 +62,81 @@ WEBHOOK_ERROR_URL = os.environ.get("WEBHOOK_ERROR_URL")
 # 개별 거래 구매 금액
 PURCHASE_VOLUME = int(os.environ.get("PURCHASE_VOLUME"))
 
+# 지표 계산 방식 (1: 전체 마켓을 행렬로 한 번에 계산, 0: 코인별 스트리밍 계산)
+INDICATOR_BATCH_MODE = os.environ.get("INDICATOR_BATCH_MODE", "0") == "1"
+
+# 분봉 생성 방식 (1: 체결 웹소켓으로 1분봉을 직접 만들고 연결이 끊겼던 구간만 REST로 채움, 0: 매 분 REST로 분봉 조회)
+CANDLE_STREAM_MODE = os.environ.get("CANDLE_STREAM_MODE", "0") == "1"
+
+# 1분봉으로 함께 계산할 상위 봉 단위 (예: "5m,15m,1d", 지원: 3m, 5m, 15m, 60m, 1d / 빈 값: 1분봉 지표만 계산)
+INDICATOR_TIMEFRAMES = parse_timeframes(os.environ.get("INDICATOR_TIMEFRAMES", ""))
+
+# 매매 전략 정의 JSON 파일 (전략 dict 리스트, 빈 값: 기본 전략(DEFAULT_STRATEGY)만 사용)
+STRATEGY_FILE = os.environ.get("STRATEGY_FILE", "")
+
+# 지표 계산 worker 프로세스 수 (0: 메인 프로세스에서 계산, N: KRW 마켓을 N개 프로세스에 나눠 계산하고 공유 메모리로 전달)
+SHARD_WORKERS = int(os.environ.get("SHARD_WORKERS", "0"))
+
+# 09:00 매수 방식 (1: 주문을 미리 서명해 두고 09:00에 한 번에 동시 전송, 0: 거래마다 1초 간격으로 확인 후 전송)
+BURST_ORDER_MODE = os.environ.get("BURST_ORDER_MODE", "0") == "1"
+
+# REST 계좌 조회 주기(초). 실시간 변경은 private 웹소켓으로 반영하고, REST 조회는 보정용
+WALLET_RECONCILE_INTERVAL = int(os.environ.get("WALLET_RECONCILE_INTERVAL", "60"))
+
+# 시장 데이터(체결 틱, 마감된 분봉) 기록 여부 (1: 기록)
+MARKET_RECORDER_ENABLED = os.environ.get("MARKET_RECORDER_ENABLED", "0") == "1"
+MARKET_DATA_DIR = DATA_DIR / "market"
+
+# 분봉 조회 동시 요청 수 (초당 요청 수는 request_scheduler의 1초 슬라이딩 윈도우가 업비트 시세 API 제한에 맞춰 조절)
+CANDLE_FETCH_CONCURRENCY = int(os.environ.get("CANDLE_FETCH_CONCURRENCY", "8"))
+
+# 틱 수신 ~ 주문 응답 단계별 지연 시간 히스토그램
+latency_metrics = LatencyMetrics()
+# 지연 시간 지표(Prometheus 형식) 제공 포트 (0: 제공하지 않음)
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "0"))
+
+# 체결로 1분봉을 만드는 분봉 생성기 (CANDLE_STREAM_MODE=1 일 때만 생성)
+candle_builder = MinuteCandleBuilder() if CANDLE_STREAM_MODE else None
+
+# 봉 단위별 상위 봉 지표 (INDICATOR_TIMEFRAMES 가 있을 때만 생성, 예: timeframe_indicators["5m"].records())
+timeframe_indicators = TimeframeIndicators(INDICATOR_TIMEFRAMES) if INDICATOR_TIMEFRAMES else None
+
+# 매 분 전체 마켓에 대해 모든 전략의 진입/청산 조건을 한 번에 평가하는 전략 엔진
+strategy_engine = StrategyEngine(load_strategies(STRATEGY_FILE) if STRATEGY_FILE else [DEFAULT_STRATEGY])
+
+# 시장 데이터 recorder (MARKET_RECORDER_ENABLED=1 일 때만 생성)
+market_recorder = MarketRecorder(MARKET_DATA_DIR) if MARKET_RECORDER_ENABLED else None
+
 last_buy_date = {}            # { "KRW-BTC": date, ... }
 persistent_purchases = {}     # { "KRW-BTC": {"date":"YYYY-MM-DD","buy_price":float,"volume":float} }
 
+# 구매 기록 저널 (purchase_journal.run() Task가 백그라운드에서 기록)
+purchase_journal = PurchaseJournal(PURCHASES_JOURNAL)
+
 def load_purchases():
-    """구매 기록 로드 (프로그램 시작 시 1회)"""
+    """구매 기록 로드 (프로그램 시작 시 1회). 저널을 처음부터 다시 적용해서 복원"""
     global persistent_purchases, last_buy_date
-    if PURCHASES_FILE.exists():
-        try:
+    try:
+        if not purchase_journal.path.exists() and PURCHASES_FILE.exists():
+            # 이전 형식(JSON 파일 전체 저장)의 기록을 저널로 옮김
             with open(PURCHASES_FILE, "r", encoding="utf-8") as f:
-                persistent_purchases = json.load(f)
-            # 날짜 hydrates
-            for coin, rec in persistent_purchases.items():
-                if "date" in rec:
-                    last_buy_date[coin] = _dt.fromisoformat(rec["date"]).date()
-        except Exception:
-            persistent_purchases = {}
+                purchase_journal.compact(json.load(f))
+        persistent_purchases = replay(purchase_journal.path)
+        # 날짜 hydrates
+        for coin, rec in persistent_purchases.items():
+            if "date" in rec:
+                last_buy_date[coin] = _dt.fromisoformat(rec["date"]).date()
+    except Exception:
+        persistent_purchases = {}
 
 def save_purchase(coin: str, buy_price: float, volume: float):
-    """매수 직후 구매 기록 저장"""
+    """매수 직후 구매 기록 저장 (저널에 추가만 하고 디스크 쓰기는 백그라운드에서 처리)"""
     persistent_purchases[coin] = {
         "date": _dt.now(KST).date().isoformat(),
         "buy_price": float(buy_price),
         "volume": float(volume),
     }
-    with open(PURCHASES_FILE, "w", encoding="utf-8") as f:
-        json.dump(persistent_purchases, f, ensure_ascii=False, indent=2)
+    purchase_journal.record_buy(coin, **persistent_purchases[coin])
     # 당일 1회 규칙 반영
     last_buy_date[coin] = _dt.now(KST).date()
 
@@ -72,8 +145,7 @@ def clear_purchase(coin: str):
     last_buy_date.pop(coin, None)
     if coin in persistent_purchases:
         persistent_purchases.pop(coin)
-        with open(PURCHASES_FILE, "w", encoding="utf-8") as f:
-            json.dump(persistent_purchases, f, ensure_ascii=False, indent=2)
+        purchase_journal.record_clear(coin)
 
 # 모듈 import 시 자동 로드
 load_purchases()
\ No newline at end of file
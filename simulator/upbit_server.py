@@ -0,0 +1,552 @@
+"""
+업비트 REST / 웹소켓 API를 흉내 내는 로컬 모의 거래소 서버.
+
+합성 마켓의 가격을 무작위로 움직이면서 아래 API를 제공합니다.
+  - GET  /v1/market/all              마켓 목록
+  - GET  /v1/candles/minutes/1       1분봉 (최신순, count <= 200)
+  - GET  /v1/accounts                계좌 조회
+  - POST /v1/orders                  시장가 주문 (즉시 체결)
+  - WS   /websocket/v1               ticker, trade 구독
+  - WS   /websocket/v1/private       myAsset, myOrder
+  - POST /webhook                    웹훅 수신 (개수만 셈)
+  - GET  /stats                      요청 / 429 / 주문 / 웹훅 통계
+
+응답 지연, 429 응답, 웹소켓 강제 종료를 옵션으로 주입할 수 있고,
+업비트와 같은 초당 요청 제한(request_scheduler.GROUP_LIMITS)과 Remaining-Req 헤더를 적용합니다.
+
+사용 예:
+    python -m simulator.upbit_server --markets 250 --latency-ms 30 --error-rate 0.02
+    UPBIT_API_URL=http://127.0.0.1:8765 UPBIT_WS_URL=ws://127.0.0.1:8765/websocket/v1 \\
+        WEBHOOK_URL=http://127.0.0.1:8765/webhook WEBHOOK_ERROR_URL=http://127.0.0.1:8765/webhook \\
+        ACCESS_KEY=test SECRET_KEY=test PURCHASE_VOLUME=5000 python main.py
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from datetime import datetime, timezone, timedelta
+
+import numpy as np
+from aiohttp import web, WSMsgType
+
+from manager.request_scheduler import GROUP_LIMITS
+
+KST = timezone(timedelta(hours=9))
+# 마켓별로 보관하는 분봉 개수 (업비트 분봉 API 최대 count)
+CANDLE_HISTORY = 200
+FEE_RATE = 0.0005
+
+
+@dataclass
+class FaultConfig:
+    latency_ms: float = 0.0           # REST 응답 지연 (ms)
+    jitter_ms: float = 0.0            # 지연에 더해지는 0 ~ jitter_ms 무작위 지연
+    error_rate: float = 0.0           # 요청 제한과 무관하게 429를 돌려줄 확률
+    rate_limit: bool = True           # 그룹별 초당 요청 제한 적용 여부
+    disconnect_interval: float = 0.0  # 0보다 크면 평균 이 간격(초)마다 ticker 웹소켓 연결을 끊음
+
+
+def _request_group(request):
+    """업비트 요청 제한 그룹"""
+    path = request.path
+    if path == "/v1/orders" and request.method == "POST":
+        return "order"
+    if path.startswith("/v1/candles"):
+        return "candles"
+    if path == "/v1/market/all":
+        return "market"
+    if path.startswith("/v1/"):
+        return "default"
+    return None
+
+
+def _candle_time(minute):
+    """분 번호(epoch 분)의 UTC / KST 분봉 시작 시각 문자열"""
+    start = datetime.fromtimestamp(minute * 60, timezone.utc)
+    return start.strftime("%Y-%m-%dT%H:%M:%S"), start.astimezone(KST).strftime("%Y-%m-%dT%H:%M:%S")
+
+
+class SimulatedExchange:
+    """
+    합성 마켓의 가격, 분봉, 계좌를 보관하는 모의 거래소.
+
+    가격은 tick_interval초마다 모든 마켓이 로그 정규 랜덤워크로 움직이며, 매 분 surge_probability 확률로
+    거래량이 급증하며 가격이 오르는 마켓이 생깁니다. (스크리닝 조건을 만족하는 코인이 나오도록)
+    """
+
+    def __init__(self, markets=200, seed=0, tick_interval=0.1, volatility=0.0005, surge_probability=0.02,
+                 krw_balance=10_000_000, faults=None):
+        self.rng = np.random.default_rng(seed)
+        # KRW-BTC는 항상 포함 (거래 대상 필터가 특정 마켓만 고르는 경우 대비)
+        self.markets = ["KRW-BTC"] + [f"KRW-S{i:03d}" for i in range(1, markets)]
+        self.index = {market: i for i, market in enumerate(self.markets)}
+        self.tick_interval = tick_interval
+        self.volatility = volatility
+        self.surge_probability = surge_probability
+        self.faults = faults or FaultConfig()
+
+        self.prices = 10 ** self.rng.uniform(1, 5, len(self.markets))
+        self.base_volume = 50_000_000 / self.prices / 60  # 분당 평균 거래량 (거래대금 약 5천만 원)
+        self.surging = np.zeros(len(self.markets), dtype=bool)
+        self.candles = {market: deque(maxlen=CANDLE_HISTORY) for market in self.markets}
+        self.current = {}   # {마켓: 진행 중인 분봉}
+        self.minute = int(time.time() // 60)
+        self._seed_history()
+
+        # 계좌: {화폐: [잔고, 매수 평균가]}
+        self.accounts = {"KRW": [float(krw_balance), 0.0]}
+
+        self.ticker_clients = {}    # {웹소켓: {구독 타입(ticker/trade): 코인 집합}}
+        self.private_clients = set()
+        self.request_counts = defaultdict(int)
+        self.window = defaultdict(deque)   # {그룹: 최근 1초 요청 시각}
+        self.stats = defaultdict(int)
+
+    # ---------------------------------------------------------------- 시세
+    def _seed_history(self):
+        """서버 시작 전 CANDLE_HISTORY분 동안의 마감된 분봉을 만듦"""
+        for minute in range(self.minute - CANDLE_HISTORY, self.minute):
+            steps = self.rng.normal(0, self.volatility * np.sqrt(60 / self.tick_interval), len(self.markets))
+            opens = self.prices.copy()
+            self.prices *= np.exp(steps)
+            volumes = self.base_volume * self.rng.uniform(0.5, 1.5, len(self.markets))
+            for i, market in enumerate(self.markets):
+                self.candles[market].append(self._candle(market, minute, opens[i], self.prices[i], volumes[i]))
+        for i, market in enumerate(self.markets):
+            self.current[market] = self._candle(market, self.minute, self.prices[i], self.prices[i], 0.0)
+
+    def _candle(self, market, minute, open_price, close_price, volume):
+        utc, kst = _candle_time(minute)
+        return {
+            "market": market,
+            "candle_date_time_utc": utc,
+            "candle_date_time_kst": kst,
+            "opening_price": float(open_price),
+            "high_price": float(max(open_price, close_price)),
+            "low_price": float(min(open_price, close_price)),
+            "trade_price": float(close_price),
+            "timestamp": (minute + 1) * 60_000 - 1,
+            "candle_acc_trade_price": float(volume * close_price),
+            "candle_acc_trade_volume": float(volume),
+            "unit": 1,
+        }
+
+    def _roll_minute(self, minute):
+        """분이 바뀌면 진행 중인 분봉을 마감하고, 새 분봉과 급등 마켓을 정함"""
+        for market in self.markets:
+            self.candles[market].append(self.current[market])
+            price = self.prices[self.index[market]]
+            self.current[market] = self._candle(market, minute, price, price, 0.0)
+        self.surging = self.rng.random(len(self.markets)) < self.surge_probability
+        self.minute = minute
+
+    def step(self):
+        """
+        tick_interval 동안의 체결을 만들어 가격과 진행 중인 분봉을 갱신합니다.
+        :return: [(마켓, 체결가, 체결량, 체결 시각 ms), ...]
+        """
+        now = time.time()
+        minute = int(now // 60)
+        if minute != self.minute:
+            self._roll_minute(minute)
+
+        drift = np.where(self.surging, 0.02 * self.tick_interval / 60, 0.0)
+        self.prices *= np.exp(drift + self.rng.normal(0, self.volatility, len(self.markets)))
+        ticks_per_minute = 60 / self.tick_interval
+        volumes = self.base_volume / ticks_per_minute * self.rng.exponential(1.0, len(self.markets))
+        volumes[self.surging] *= 6
+
+        timestamp = int(now * 1000)
+        trades = []
+        for i, market in enumerate(self.markets):
+            price, volume = float(self.prices[i]), float(volumes[i])
+            candle = self.current[market]
+            candle["high_price"] = max(candle["high_price"], price)
+            candle["low_price"] = min(candle["low_price"], price)
+            candle["trade_price"] = price
+            candle["timestamp"] = timestamp
+            candle["candle_acc_trade_volume"] += volume
+            candle["candle_acc_trade_price"] += volume * price
+            trades.append((market, price, volume, timestamp))
+        return trades
+
+    def minute_candles(self, market, count):
+        """최신 분봉부터 count개 (진행 중인 분봉 포함)"""
+        candles = list(self.candles[market])[-(count - 1):] if count > 1 else []
+        candles.append(dict(self.current[market]))
+        return candles[::-1]
+
+    # ---------------------------------------------------------------- 계좌 / 주문
+    def account_list(self):
+        return [{
+            "currency": currency,
+            "balance": f"{balance:.8f}",
+            "locked": "0.0",
+            "avg_buy_price": f"{avg_price:.8f}",
+            "avg_buy_price_modified": False,
+            "unit_currency": "KRW",
+        } for currency, (balance, avg_price) in self.accounts.items() if balance > 0 or currency == "KRW"]
+
+    def place_order(self, data):
+        """
+        시장가 주문을 현재가로 즉시 체결합니다.
+        :return: (주문 응답, 체결 이벤트 목록) 또는 (오류 응답, None)
+        """
+        market = data.get("market")
+        side = data.get("side")
+        if market not in self.index:
+            return {"error": {"name": "market_does_not_exist", "message": "마켓이 존재하지 않습니다."}}, None
+        currency = market.split("-", 1)[1]
+        price = float(self.prices[self.index[market]])
+        krw = self.accounts["KRW"]
+        held = self.accounts.setdefault(currency, [0.0, 0.0])
+
+        if side == "bid" and data.get("ord_type") == "price":
+            amount = float(data.get("price", 0))
+            fee = amount * FEE_RATE
+            if amount + fee > krw[0]:
+                return {"error": {"name": "insufficient_funds_bid", "message": "매수가능금액이 부족합니다."}}, None
+            volume = amount / price
+            krw[0] -= amount + fee
+            held[1] = (held[0] * held[1] + amount) / (held[0] + volume)
+            held[0] += volume
+        elif side == "ask" and data.get("ord_type") == "market":
+            volume = float(data.get("volume", 0))
+            if volume > held[0] + 1e-12:
+                return {"error": {"name": "insufficient_funds_ask", "message": "매도가능금액이 부족합니다."}}, None
+            amount = volume * price
+            fee = amount * FEE_RATE
+            krw[0] += amount - fee
+            held[0] = max(held[0] - volume, 0.0)
+            if held[0] == 0:
+                held[1] = 0.0
+        else:
+            return {"error": {"name": "invalid_parameter", "message": "지원하지 않는 주문입니다."}}, None
+
+        self.stats["orders"] += 1
+        order_uuid = str(uuid.uuid4())
+        created_at = datetime.now(KST).isoformat()
+        order = {
+            "uuid": order_uuid,
+            "side": side,
+            "ord_type": data.get("ord_type"),
+            "price": data.get("price"),
+            "state": "wait",
+            "market": market,
+            "created_at": created_at,
+            "volume": data.get("volume"),
+            "remaining_volume": data.get("volume"),
+            "reserved_fee": str(fee),
+            "remaining_fee": str(fee),
+            "paid_fee": "0",
+            "locked": str(amount + fee) if side == "bid" else data.get("volume"),
+            "executed_volume": "0",
+            "trades_count": 0,
+        }
+        base_event = {
+            "type": "myOrder", "code": market, "uuid": order_uuid, "ask_bid": side.upper(),
+            "order_type": data.get("ord_type"), "avg_price": price, "executed_volume": volume,
+            "timestamp": int(time.time() * 1000), "stream_type": "REALTIME",
+        }
+        events = [
+            dict(base_event, state="trade", price=price, volume=volume),
+            dict(base_event, state="done", price=price, volume=volume),
+            {"type": "myAsset", "timestamp": int(time.time() * 1000), "stream_type": "REALTIME",
+             "assets": [{"currency": name, "balance": balance, "locked": 0.0}
+                        for name, (balance, _) in self.accounts.items() if name in ("KRW", currency)]},
+        ]
+        return order, events
+
+    # ---------------------------------------------------------------- 요청 제한
+    def check_rate_limit(self, group):
+        """
+        그룹의 최근 1초 요청 수를 세어 (제한 초과 여부, 남은 요청 수)를 반환합니다.
+        """
+        limit = GROUP_LIMITS.get(group, 10)
+        now = time.monotonic()
+        window = self.window[group]
+        while window and now - window[0] >= 1.0:
+            window.popleft()
+        if self.faults.rate_limit and len(window) >= limit:
+            return True, 0
+        window.append(now)
+        return False, max(limit - len(window), 0)
+
+
+# -------------------------------------------------------------------- HTTP 핸들러
+@web.middleware
+async def fault_middleware(request, handler):
+    """지연, 요청 제한, 429 주입을 모든 업비트 API 요청에 적용"""
+    exchange = request.app["exchange"]
+    faults = exchange.faults
+    group = _request_group(request)
+    if group is None:
+        return await handler(request)
+
+    exchange.request_counts[group] += 1
+    if faults.latency_ms or faults.jitter_ms:
+        await asyncio.sleep((faults.latency_ms + random.uniform(0, faults.jitter_ms)) / 1000)
+
+    limited, remaining = exchange.check_rate_limit(group)
+    headers = {"Remaining-Req": f"group={group}; min=1800; sec={remaining}"}
+    if limited or random.random() < faults.error_rate:
+        exchange.stats["429"] += 1
+        return web.json_response({"error": {"name": "too_many_requests", "message": "Too many API requests."}},
+                                 status=429, headers=headers)
+
+    response = await handler(request)
+    response.headers.update(headers)
+    return response
+
+
+def _authorized(request):
+    return request.headers.get("Authorization", "").startswith("Bearer ")
+
+
+def _unauthorized():
+    return web.json_response({"error": {"name": "jwt_verification", "message": "Jwt 토큰 검증에 실패했습니다."}},
+                             status=401)
+
+
+async def handle_markets(request):
+    exchange = request.app["exchange"]
+    markets = [{"market": market, "korean_name": market.split("-")[1], "english_name": market.split("-")[1]}
+               for market in exchange.markets]
+    # KRW 외 마켓도 섞어서 필터링 코드가 동작하도록 함
+    markets.append({"market": "BTC-ETH", "korean_name": "이더리움", "english_name": "Ethereum"})
+    return web.json_response(markets)
+
+
+async def handle_candles(request):
+    exchange = request.app["exchange"]
+    market = request.query.get("market")
+    if market not in exchange.index:
+        return web.json_response({"error": {"name": 404, "message": "Code not found"}}, status=404)
+    count = min(max(int(request.query.get("count", 1)), 1), CANDLE_HISTORY)
+    return web.json_response(exchange.minute_candles(market, count))
+
+
+async def handle_accounts(request):
+    if not _authorized(request):
+        return _unauthorized()
+    return web.json_response(request.app["exchange"].account_list())
+
+
+async def handle_orders(request):
+    if not _authorized(request):
+        return _unauthorized()
+    exchange = request.app["exchange"]
+    order, events = exchange.place_order(await request.json())
+    if events is None:
+        return web.json_response(order, status=400)
+    # 업비트처럼 주문 응답 이후에 체결 이벤트가 도착하도록 별도 Task로 전송
+    task = asyncio.create_task(_broadcast_private(exchange, events))
+    request.app["background"].add(task)
+    task.add_done_callback(request.app["background"].discard)
+    return web.json_response(order, status=201)
+
+
+async def handle_webhook(request):
+    request.app["exchange"].stats["webhooks"] += 1
+    await request.read()
+    return web.Response(status=204)
+
+
+async def handle_root(request):
+    return web.Response(status=200)
+
+
+async def handle_stats(request):
+    exchange = request.app["exchange"]
+    return web.json_response({
+        "requests": dict(exchange.request_counts),
+        "ticker_clients": len(exchange.ticker_clients),
+        "private_clients": len(exchange.private_clients),
+        **exchange.stats,
+    })
+
+
+# -------------------------------------------------------------------- 웹소켓
+def _subscribed_codes(message):
+    """구독 메시지에서 타입별 코드 목록을 읽음. (업비트처럼 새 구독 메시지는 이전 구독을 대체)"""
+    codes = {"ticker": set(), "trade": set()}
+    for item in json.loads(message):
+        if isinstance(item, dict) and item.get("type") in codes:
+            codes[item["type"]].update(item.get("codes", []))
+    return codes
+
+
+async def handle_ticker_ws(request):
+    exchange = request.app["exchange"]
+    websocket = web.WebSocketResponse(heartbeat=60)
+    await websocket.prepare(request)
+    exchange.ticker_clients[websocket] = {"ticker": set(), "trade": set()}
+    exchange.stats["ticker_connections"] += 1
+    try:
+        async for message in websocket:
+            if message.type == WSMsgType.TEXT or message.type == WSMsgType.BINARY:
+                try:
+                    exchange.ticker_clients[websocket] = _subscribed_codes(message.data)
+                except (ValueError, TypeError):
+                    await websocket.send_json({"error": {"name": "WRONG_FORMAT", "message": "잘못된 요청입니다."}})
+    finally:
+        exchange.ticker_clients.pop(websocket, None)
+    return websocket
+
+
+async def handle_private_ws(request):
+    exchange = request.app["exchange"]
+    if not _authorized(request):
+        return _unauthorized()
+    websocket = web.WebSocketResponse(heartbeat=60)
+    await websocket.prepare(request)
+    exchange.private_clients.add(websocket)
+    try:
+        async for _ in websocket:
+            pass
+    finally:
+        exchange.private_clients.discard(websocket)
+    return websocket
+
+
+async def _broadcast_private(exchange, events):
+    for websocket in list(exchange.private_clients):
+        for event in events:
+            try:
+                await websocket.send_bytes(json.dumps(event).encode())
+            except ConnectionError:
+                exchange.private_clients.discard(websocket)
+                break
+
+
+def _ticker_message(market, price, volume, timestamp, candle):
+    return json.dumps({
+        "type": "ticker",
+        "code": market,
+        "opening_price": candle["opening_price"],
+        "high_price": candle["high_price"],
+        "low_price": candle["low_price"],
+        "trade_price": price,
+        "trade_volume": volume,
+        "trade_timestamp": timestamp,
+        "timestamp": timestamp,
+        "stream_type": "REALTIME",
+    }).encode()
+
+
+def _trade_message(market, price, volume, timestamp, sequential_id):
+    return json.dumps({
+        "type": "trade",
+        "code": market,
+        "trade_price": price,
+        "trade_volume": volume,
+        "ask_bid": "BID",
+        "trade_timestamp": timestamp,
+        "timestamp": timestamp,
+        "sequential_id": sequential_id,
+        "stream_type": "REALTIME",
+    }).encode()
+
+
+async def run_market(app):
+    """tick_interval마다 시세를 움직이고 구독 중인 웹소켓에 체결(ticker, trade)을 보내는 Task"""
+    exchange = app["exchange"]
+    faults = exchange.faults
+    next_disconnect = _next_disconnect(faults)
+    sequential_id = 0
+    while True:
+        trades = exchange.step()
+        for websocket, codes in list(exchange.ticker_clients.items()):
+            ticker_codes, trade_codes = codes["ticker"], codes["trade"]
+            if not ticker_codes and not trade_codes:
+                continue
+            try:
+                for market, price, volume, timestamp in trades:
+                    if market in ticker_codes:
+                        await websocket.send_bytes(
+                            _ticker_message(market, price, volume, timestamp, exchange.current[market]))
+                    if market in trade_codes:
+                        sequential_id += 1
+                        await websocket.send_bytes(_trade_message(market, price, volume, timestamp, sequential_id))
+            except ConnectionError:
+                exchange.ticker_clients.pop(websocket, None)
+
+        if next_disconnect is not None and time.monotonic() >= next_disconnect:
+            # 장애 주입: 연결된 ticker 웹소켓 중 하나를 끊음
+            if exchange.ticker_clients:
+                websocket = random.choice(list(exchange.ticker_clients))
+                exchange.ticker_clients.pop(websocket, None)
+                exchange.stats["forced_disconnects"] += 1
+                await websocket.close()
+            next_disconnect = _next_disconnect(faults)
+
+        await asyncio.sleep(exchange.tick_interval)
+
+
+def _next_disconnect(faults):
+    if faults.disconnect_interval <= 0:
+        return None
+    return time.monotonic() + random.expovariate(1 / faults.disconnect_interval)
+
+
+async def _start_market(app):
+    app["market_task"] = asyncio.create_task(run_market(app))
+
+
+async def _stop_market(app):
+    app["market_task"].cancel()
+    for websocket in list(app["exchange"].ticker_clients) + list(app["exchange"].private_clients):
+        await websocket.close()
+
+
+def create_app(exchange):
+    app = web.Application(middlewares=[fault_middleware])
+    app["exchange"] = exchange
+    app["background"] = set()
+    app.router.add_get("/v1/market/all", handle_markets)
+    app.router.add_get("/v1/candles/minutes/1", handle_candles)
+    app.router.add_get("/v1/accounts", handle_accounts)
+    app.router.add_post("/v1/orders", handle_orders)
+    app.router.add_get("/websocket/v1", handle_ticker_ws)
+    app.router.add_get("/websocket/v1/private", handle_private_ws)
+    app.router.add_post("/webhook", handle_webhook)
+    app.router.add_get("/stats", handle_stats)
+    # warm_up()의 HEAD 요청
+    app.router.add_get("/", handle_root)
+    app.on_startup.append(_start_market)
+    app.on_cleanup.append(_stop_market)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="업비트 API를 흉내 내는 로컬 모의 거래소 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--markets", type=int, default=200, help="합성 KRW 마켓 수 (KRW-BTC 포함)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tick-interval", type=float, default=0.1, help="체결 생성 주기 (초)")
+    parser.add_argument("--surge-probability", type=float, default=0.02, help="마켓별 분당 거래량 급등 확률")
+    parser.add_argument("--krw-balance", type=float, default=10_000_000)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="무작위 429 응답 확률")
+    parser.add_argument("--no-rate-limit", action="store_true", help="초당 요청 제한을 적용하지 않음")
+    parser.add_argument("--disconnect-interval", type=float, default=0.0,
+                        help="평균 이 간격(초)마다 ticker 웹소켓 연결을 끊음 (0: 끊지 않음)")
+    args = parser.parse_args()
+
+    faults = FaultConfig(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+                         rate_limit=not args.no_rate_limit, disconnect_interval=args.disconnect_interval)
+    exchange = SimulatedExchange(markets=args.markets, seed=args.seed, tick_interval=args.tick_interval,
+                                 surge_probability=args.surge_probability, krw_balance=args.krw_balance,
+                                 faults=faults)
+    print(f"[{datetime.now()}] 모의 거래소 시작: http://{args.host}:{args.port} ({len(exchange.markets)}개 마켓)")
+    web.run_app(create_app(exchange), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
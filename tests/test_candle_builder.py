@@ -0,0 +1,130 @@
+import asyncio
+
+from calculator.async_candle_fetcher import update_candle_buffer_async
+from calculator.candle_buffer import CandleBuffer, candle_start_timestamp
+from calculator.candle_builder import MinuteCandleBuilder, _as_candle
+from calculator.coins_indicators_calculator import CANDLE_TOPUP_COUNT, CANDLE_WINDOW
+
+# 2026-10-18 10:00:00 UTC
+BASE = 1_792_317_600
+COIN = "KRW-BTC"
+
+
+def _ms(minute, second=0.0):
+    return int((BASE + minute * 60 + second) * 1000)
+
+
+def _candle(minute, close, volume=1.0):
+    start = BASE + minute * 60
+    return _as_candle([start, close, close, close, close, volume, close * volume, start * 1000])
+
+
+class FakeFetcher:
+    """REST 분봉 조회 대신 미리 정한 분봉을 돌려주고 요청한 개수를 기록"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    async def get_minute_candles(self, coin, count):
+        self.requests.append(count)
+        return self.responses.pop(0)
+
+
+def _seeded_buffer(minutes):
+    buffer = CandleBuffer(CANDLE_WINDOW)
+    buffer.seed([_candle(minute, 100.0 + minute) for minute in minutes])
+    return buffer
+
+
+# ---------------------------------------------------------------- 분봉 생성
+def test_trades_roll_over_at_minute_boundary():
+    builder = MinuteCandleBuilder()
+    builder.on_trade(COIN, _ms(0, 1), 100.0, 1.0)
+    builder.on_trade(COIN, _ms(0, 30), 105.0, 2.0)
+    builder.on_trade(COIN, _ms(0, 59.999), 98.0, 1.0)
+    builder.on_trade(COIN, _ms(1), 101.0, 4.0)
+
+    first, second = builder.drain(COIN)
+    assert candle_start_timestamp(first) == BASE
+    assert (first["opening_price"], first["high_price"], first["low_price"], first["trade_price"]) == \
+        (100.0, 105.0, 98.0, 98.0)
+    assert first["candle_acc_trade_volume"] == 4.0
+    assert first["candle_acc_trade_price"] == 100.0 + 210.0 + 98.0
+    assert candle_start_timestamp(second) == BASE + 60
+    assert (second["opening_price"], second["trade_price"], second["candle_acc_trade_volume"]) == (101.0, 101.0, 4.0)
+    assert builder.drain(COIN) == []
+
+
+def test_late_trade_for_closed_minute_is_ignored():
+    builder = MinuteCandleBuilder()
+    builder.on_trade(COIN, _ms(1, 5), 101.0, 1.0)
+    builder.on_trade(COIN, _ms(0, 59), 90.0, 5.0)
+    assert builder.late_trades == 1
+    (candle,) = builder.drain(COIN)
+    assert (candle["low_price"], candle["candle_acc_trade_volume"]) == (101.0, 1.0)
+
+
+def test_open_bar_is_drained_again_with_final_values():
+    builder = MinuteCandleBuilder()
+    builder.on_trade(COIN, _ms(0, 10), 100.0, 1.0)
+    assert builder.drain(COIN)[0]["candle_acc_trade_volume"] == 1.0
+    builder.on_trade(COIN, _ms(0, 50), 102.0, 2.0)
+    builder.on_trade(COIN, _ms(1, 1), 103.0, 1.0)
+    first, second = builder.drain(COIN)
+    assert (first["trade_price"], first["candle_acc_trade_volume"]) == (102.0, 3.0)
+    assert candle_start_timestamp(second) == BASE + 60
+
+
+def test_minutes_without_trades_have_no_candle():
+    builder = MinuteCandleBuilder()
+    builder.on_trade(COIN, _ms(0), 100.0, 1.0)
+    builder.on_trade(COIN, _ms(3), 101.0, 1.0)
+    assert [candle_start_timestamp(c) for c in builder.drain(COIN)] == [BASE, BASE + 180]
+
+
+# ---------------------------------------------------------------- 끊긴 구간 REST 보충
+def test_continuous_stream_merges_without_rest():
+    buffer = _seeded_buffer(range(5))
+    builder = MinuteCandleBuilder()
+    builder.covered_since = BASE + 3 * 60    # 버퍼의 최신 분봉(10:04) 시작 전부터 수신 중
+    builder.on_trade(COIN, _ms(4, 30), 110.0, 1.0)
+    builder.on_trade(COIN, _ms(5, 1), 111.0, 1.0)
+    fetcher = FakeFetcher()
+
+    result, reseeded = asyncio.run(update_candle_buffer_async(fetcher, COIN, {COIN: buffer}, builder=builder))
+    assert result is buffer and not reseeded
+    assert fetcher.requests == []
+    assert buffer.last_timestamp() == BASE + 5 * 60
+    _, closes, _ = buffer.window()
+    assert closes[-2:].tolist() == [110.0, 111.0]
+
+
+def test_gap_after_reconnect_is_filled_over_rest():
+    buffer = _seeded_buffer(range(5))
+    builder = MinuteCandleBuilder()
+    builder.connected()
+    builder.disconnected()
+    builder.covered_since = BASE + 6 * 60    # 10:05 ~ 10:06 사이에 끊겼다가 다시 연결
+    builder.on_trade(COIN, _ms(6, 10), 120.0, 1.0)
+    fetcher = FakeFetcher([_candle(4, 104.0), _candle(5, 105.0), _candle(6, 120.0)])
+
+    _, reseeded = asyncio.run(update_candle_buffer_async(fetcher, COIN, {COIN: buffer}, builder=builder))
+    assert not reseeded
+    assert fetcher.requests == [CANDLE_TOPUP_COUNT]
+    timestamps, closes, _ = buffer.window()
+    assert (timestamps[-3:] - BASE).tolist() == [240, 300, 360]
+    assert closes[-3:].tolist() == [104.0, 105.0, 120.0]
+
+
+def test_gap_longer_than_topup_reseeds_the_buffer():
+    buffer = _seeded_buffer(range(5))
+    builder = MinuteCandleBuilder()
+    builder.covered_since = BASE + 20 * 60
+    fetcher = FakeFetcher([_candle(m, 100.0) for m in (18, 19, 20)],
+                          [_candle(m, 100.0 + m) for m in range(20 - CANDLE_WINDOW + 1, 21)])
+
+    _, reseeded = asyncio.run(update_candle_buffer_async(fetcher, COIN, {COIN: buffer}, builder=builder))
+    assert reseeded
+    assert fetcher.requests == [CANDLE_TOPUP_COUNT, CANDLE_WINDOW]
+    assert len(buffer) == CANDLE_WINDOW and buffer.last_timestamp() == BASE + 20 * 60
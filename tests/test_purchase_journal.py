@@ -0,0 +1,50 @@
+import asyncio
+import json
+
+from manager.purchase_journal import PurchaseJournal, replay
+
+
+def _buy(coin, price):
+    return {"op": "buy", "coin": coin, "date": "2026-10-18", "buy_price": price, "volume": 1.5}
+
+
+def _write_lines(path, records, tail=""):
+    path.write_text("".join(json.dumps(record) + "\n" for record in records) + tail, encoding="utf-8")
+
+
+def test_replay_ignores_torn_last_line(tmp_path):
+    path = tmp_path / "purchases.journal"
+    _write_lines(path, [_buy("KRW-A", 100), _buy("KRW-B", 200), {"op": "clear", "coin": "KRW-A"}],
+                 tail='{"op": "buy", "coin": "KRW-C", "da')
+    assert replay(path) == {"KRW-B": {"date": "2026-10-18", "buy_price": 200, "volume": 1.5}}
+
+
+def test_replay_of_missing_journal_is_empty(tmp_path):
+    assert replay(tmp_path / "purchases.journal") == {}
+
+
+def test_records_after_torn_line_start_on_a_new_line(tmp_path):
+    path = tmp_path / "purchases.journal"
+    _write_lines(path, [_buy("KRW-A", 100)], tail='{"op": "clear", "coi')
+
+    journal = PurchaseJournal(path)
+    journal.record_buy("KRW-B", "2026-10-18", 200, 1.5)
+    journal.record_clear("KRW-A")
+    asyncio.run(journal.flush())
+
+    assert replay(path) == {"KRW-B": {"date": "2026-10-18", "buy_price": 200, "volume": 1.5}}
+    assert path.read_text(encoding="utf-8").endswith("\n")
+
+
+def test_compact_keeps_current_purchases_only(tmp_path):
+    path = tmp_path / "purchases.journal"
+    journal = PurchaseJournal(path, compact_every=3)
+    for coin in ("KRW-A", "KRW-B"):
+        journal.record_buy(coin, "2026-10-18", 100, 1.5)
+    journal.record_clear("KRW-A")
+    asyncio.run(journal.flush())
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["coin"] for line in lines] == ["KRW-B"]
+    assert not (tmp_path / "purchases.journal.tmp").exists()
+    assert journal.written_since_compaction == 0
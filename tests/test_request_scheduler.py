@@ -0,0 +1,58 @@
+import asyncio
+import time
+
+from manager.request_scheduler import RequestScheduler, SlidingWindowLimiter, PRIORITY_ORDER
+
+
+def _run(limiter, count, latency=0.0):
+    starts = []
+
+    async def request():
+        await limiter.acquire()
+        starts.append(time.monotonic())
+        await asyncio.sleep(latency)
+        limiter.release()
+
+    async def main():
+        await asyncio.gather(*(request() for _ in range(count)))
+
+    asyncio.run(main())
+    return sorted(starts)
+
+
+def _max_in_window(starts, window):
+    return max(sum(1 for t in starts if start <= t < start + window) for start in starts)
+
+
+def test_first_window_is_not_doubled():
+    # 토큰 버킷(용량 == 초당 개수)은 처음 구간에 2배까지 보냄
+    starts = _run(SlidingWindowLimiter(5, window=0.1), 20)
+    assert _max_in_window(starts, 0.1) <= 5
+
+
+def test_in_flight_requests_use_the_budget():
+    starts = _run(SlidingWindowLimiter(3, window=0.05), 6, latency=0.1)
+    # 응답을 기다리는 동안에는 다음 요청을 시작하지 않음
+    assert starts[3] - starts[0] >= 0.1
+
+
+def test_remaining_req_and_429_reduce_the_budget():
+    limiter = SlidingWindowLimiter(10, window=0.1)
+    limiter.limit_to(4)
+    assert limiter.used() == 6
+    limiter.drain()
+    assert limiter.used() == 10
+    time.sleep(0.1)
+    assert limiter.used() == 0
+
+
+def test_scheduler_observes_remaining_req():
+    scheduler = RequestScheduler({"order": 8})
+
+    async def main():
+        async with scheduler.request("order", PRIORITY_ORDER):
+            scheduler.observe({"Remaining-Req": "group=order; min=1800; sec=2"})
+            assert scheduler.limiters["order"].used() == 6
+
+    asyncio.run(main())
+    assert scheduler.limiters["order"].used() == 6
@@ -0,0 +1,192 @@
+import numpy as np
+import pytest
+
+from calculator.indicator_store import INDICATOR_FIELDS, IndicatorStore
+from calculator.strategy import Strategy, StrategyEngine, market_fields
+from calculator.target_calculator import DEFAULT_STRATEGY, classify_mask
+
+
+def _fields(**values):
+    fields = {name: np.array([np.nan]) for name in INDICATOR_FIELDS}
+    fields.update({name: np.asarray(value, dtype=np.float64) for name, value in values.items()})
+    return fields
+
+
+def _mask(*entry, fields, params=None):
+    engine = StrategyEngine([Strategy("s", entry=entry, take_profit=1.03, params=params or {})])
+    return engine.evaluate(fields)["s"].tolist()
+
+
+# ---------------------------------------------------------------- 파싱 / 평가
+def test_comparison_and_arithmetic():
+    fields = _fields(t1_close=[10, 10, 10], t2_close=[5, 4, 2], t1_volume=[1, 2, 3])
+    assert _mask("t1_close > t2_close * 2", fields=fields) == [False, True, True]
+    assert _mask("t1_close - t2_close >= 6", fields=fields) == [False, True, True]
+    assert _mask("t1_close / t1_volume == 5", fields=fields) == [False, True, False]
+    assert _mask("-t2_close < -4", fields=fields) == [True, False, False]
+
+
+def test_chained_comparison():
+    fields = _fields(t1_close=[0.5, 10, 60])
+    assert _mask("1 < t1_close < 50", fields=fields) == [False, True, False]
+
+
+def test_params_and_underscored_numbers():
+    fields = _fields(t1_volume=[10, 40], t2_volume=[5, 10], t1_close=[1_000_000, 1_000_000])
+    params = {"ratio": 3}
+    assert _mask("t1_volume > t2_volume * ratio", fields=fields, params=params) == [False, True]
+    assert _mask("t1_volume * t1_close > 30_000_000", fields=fields) == [False, True]
+
+
+def test_entry_conditions_are_combined_with_and():
+    fields = _fields(t1_close=[10, 10, 1], t2_close=[5, 20, 5])
+    assert _mask("t1_close > 2", "t1_close > t2_close", fields=fields) == [True, False, False]
+
+
+def test_bool_operators():
+    fields = _fields(t1_close=[1, 5, 9], t2_close=[1, 1, 1])
+    assert _mask("t1_close < 2 or t1_close > 8", fields=fields) == [True, False, True]
+    assert _mask("t1_close > 2 and t1_close < 8", fields=fields) == [False, True, False]
+    assert _mask("not t1_close > 2", fields=fields) == [True, False, False]
+    assert _mask("t1_close != 5", fields=fields) == [True, False, True]
+
+
+def _screening_mask(matrix):
+    # 기본 전략 이전의 벡터화 스크리닝 조건 (조건 1 ~ 5)
+    (t2_close, t1_close, t2_volume, t1_volume,
+     t2_ma20, t1_ma20, t2_vwma100, t1_vwma100, current_price) = matrix.T
+    return ((t2_ma20 < t2_close) & (t2_vwma100 < t2_close)
+            & (t1_ma20 < t1_close) & (t1_vwma100 < t1_close)
+            & (t1_volume > t2_volume * 3)
+            & (current_price > t1_close)
+            & (t1_volume * t1_close > 30_000_000))
+
+
+def test_default_strategy_matches_screening_on_random_market():
+    rng = np.random.default_rng(0)
+    store = IndicatorStore()
+    for i in range(200):
+        close = rng.random() * 100 + 1
+        values = [close * (1 + rng.normal(0, .01)), close, rng.random() * 1e6, rng.random() * 3e6,
+                  close * .99, close * rng.uniform(.98, 1.01), close * .99, close * rng.uniform(.98, 1.01),
+                  close * rng.uniform(.99, 1.02)]
+        store.update(f"KRW-C{i}", values)
+    expected = _screening_mask(store.matrix())
+    assert expected.any() and not expected.all()
+    assert np.array_equal(classify_mask(store.records()), expected)
+
+
+def test_default_strategy_matches_screening_conditions():
+    # [T-2 종가, T-1 종가, T-2 거래량, T-1 거래량, T-2 MA20, T-1 MA20, T-2 VWMA100, T-1 VWMA100, 현재가]
+    base = [100, 110, 100_000, 310_000, 99, 109, 98, 108, 111]
+    rows = {
+        "pass": (base, True),
+        "surge_exactly_3x": ([100, 110, 100_000, 300_000, 99, 109, 98, 108, 111], False),
+        "surge_above_3x": ([100, 110, 100_000, 300_001, 99, 109, 98, 108, 111], True),
+        "turnover_exactly_30m": ([100, 100, 90_000, 300_000, 99, 99, 98, 98, 101], False),
+        "turnover_above_30m": ([100, 100, 90_000, 300_001, 99, 99, 98, 98, 101], True),
+        "t2_ma20_not_below": ([100, 110, 100_000, 310_000, 100, 109, 98, 108, 111], False),
+        "t2_vwma100_above": ([100, 110, 100_000, 310_000, 99, 109, 101, 108, 111], False),
+        "t1_ma20_not_below": ([100, 110, 100_000, 310_000, 99, 110, 98, 108, 111], False),
+        "t1_vwma100_above": ([100, 110, 100_000, 310_000, 99, 109, 98, 111, 111], False),
+        "price_not_above_t1": ([100, 110, 100_000, 310_000, 99, 109, 98, 108, 110], False),
+    }
+    for i, field in enumerate(INDICATOR_FIELDS):
+        values = list(base)
+        values[i] = np.nan
+        rows[f"nan_{field}"] = (values, False)
+
+    store = IndicatorStore()
+    for coin, (values, _) in rows.items():
+        store.update(coin, values)
+    expected = np.array([passed for _, passed in rows.values()])
+
+    assert _screening_mask(store.matrix()).tolist() == expected.tolist()
+    assert classify_mask(store.records()).tolist() == expected.tolist()
+
+
+def test_variants_share_subexpressions():
+    fields = _fields(t1_close=[10, 10], t2_close=[5, 20])
+    reads = []
+
+    class Fields(dict):
+        def __getitem__(self, name):
+            reads.append(name)
+            return dict.__getitem__(self, name)
+
+    engine = StrategyEngine([Strategy("a", entry=["t1_close > t2_close"], take_profit=1.03),
+                             Strategy("b", entry=["t1_close > t2_close"], take_profit=1.05)])
+    masks = engine.evaluate(Fields(fields))
+    assert masks["a"].tolist() == masks["b"].tolist() == [True, False]
+    # 두 전략의 같은 식은 한 번만 계산
+    single = len(reads)
+    reads.clear()
+    StrategyEngine([Strategy("a", entry=["t1_close > t2_close"], take_profit=1.03)]).evaluate(Fields(fields))
+    assert single == len(reads)
+
+
+# ---------------------------------------------------------------- NaN
+@pytest.mark.parametrize("expression", [
+    "t1_close < t1_ma20",
+    "not (t1_close < t1_ma20)",
+    "t1_close != t1_ma20",
+    "not t1_close == 1",
+    "t1_close < t1_ma20 and t1_volume > 0",
+    "t1_close < t1_ma20 or t1_volume > 0",
+    "not (t1_close < t1_ma20) or t1_volume > 0",
+])
+def test_nan_fields_never_match(expression):
+    fields = _fields(t1_close=[np.nan, 1.0], t1_ma20=[1.0, np.nan], t1_volume=[1.0, 1.0])
+    assert _mask(expression, fields=fields) == [False, False]
+
+
+def test_missing_timeframe_fields_never_match():
+    store = IndicatorStore()
+    store.update("KRW-BTC", [1.0] * len(INDICATOR_FIELDS))
+    engine = StrategyEngine([Strategy("s", entry=["not (t1_close_5m < t1_ma20_5m)"], take_profit=1.03)])
+    assert engine.classify(store) == ({}, {})
+    fields = market_fields(store, engine.names)
+    assert np.isnan(fields["t1_close_5m"]).all()
+
+
+def test_exit_conditions_with_nan_and_buy_price():
+    store = IndicatorStore()
+    store.update("KRW-A", [1.0] * 8 + [90.0])
+    store.update("KRW-B", [1.0] * 8 + [np.nan])
+    store.update("KRW-C", [1.0] * 8 + [120.0])
+    engine = StrategyEngine([Strategy("s", entry=["current_price > 0"],
+                                      exit=["not current_price >= buy_price * 0.95"])])
+    positions = {coin: ("s", 100.0) for coin in ("KRW-A", "KRW-B", "KRW-C")}
+    assert engine.exit_signals(store, positions) == ["KRW-A"]
+
+
+# ---------------------------------------------------------------- 거부
+@pytest.mark.parametrize("expression", [
+    "unknown_field > 1",
+    "t1_close ** 2 > 1",
+    "t1_close % 2 == 0",
+    "__import__('os').system('true')",
+    "t1_close in (1, 2)",
+    "t1_close is None",
+    "abs(t1_close) > 1",
+    "t1_close.real > 1",
+    "t1_close > 'a'",
+    "t1_close > True",
+    "buy_price > 1",
+    "t1_close >",
+])
+def test_rejected_expressions(expression):
+    with pytest.raises(ValueError):
+        StrategyEngine([Strategy("s", entry=[expression], take_profit=1.03)])
+
+
+def test_rejected_strategies():
+    with pytest.raises(ValueError):
+        Strategy("s", entry=[], take_profit=1.03)
+    with pytest.raises(ValueError):
+        Strategy("s", entry=["t1_close > 0"])
+    with pytest.raises(ValueError):
+        Strategy("s", entry=["t1_close > 0"], take_profit=1.03, entry_time="9h")
+    strategy = Strategy("s", entry=["t1_close > 0"], take_profit=1.03)
+    with pytest.raises(ValueError):
+        StrategyEngine([strategy, strategy])
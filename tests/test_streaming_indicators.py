@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from calculator.streaming_indicators import StreamingIndicators
+
+ti = pytest.importorskip("tulipy")
+
+
+def _series(length=5_000, seed=0):
+    rng = np.random.default_rng(seed)
+    closes = 50_000_000 + np.cumsum(rng.normal(0, 50_000, length))
+    volumes = rng.gamma(2.0, 0.5, length)
+    return closes, volumes
+
+
+def test_matches_tulipy_sma_and_vwma():
+    # RESYNC_INTERVAL 을 여러 번 지나도록 5000개 반영
+    closes, volumes = _series()
+    sma = ti.sma(closes, period=20)
+    vwma = ti.vwma(closes, volumes, period=100)
+
+    engine = StreamingIndicators()
+    for i, (close, volume) in enumerate(zip(closes, volumes)):
+        engine.push(close, volume)
+        if i >= 100:
+            assert engine.sma[1] == pytest.approx(sma[i - 19], rel=1e-9)
+            assert engine.sma[0] == pytest.approx(sma[i - 20], rel=1e-9)
+            assert engine.vwma[1] == pytest.approx(vwma[i - 99], rel=1e-9)
+            assert engine.vwma[0] == pytest.approx(vwma[i - 100], rel=1e-9)
+
+
+def test_values_are_none_until_the_period_is_filled():
+    closes, volumes = _series(101)
+    engine = StreamingIndicators()
+    engine.seed(closes[:99], volumes[:99])
+    assert engine.sma[1] is not None and engine.vwma == [None, None]
+    engine.push(closes[99], volumes[99])
+    assert engine.vwma[0] is None and engine.vwma[1] == pytest.approx(ti.vwma(closes[:100], volumes[:100], 100)[0])
+
+
+def test_seed_matches_pushes():
+    closes, volumes = _series(300, seed=1)
+    pushed = StreamingIndicators()
+    for close, volume in zip(closes, volumes):
+        pushed.push(close, volume)
+    seeded = StreamingIndicators()
+    seeded.seed(closes, volumes)
+    assert seeded.values() == pytest.approx(pushed.values(), rel=1e-12)
@@ -0,0 +1,33 @@
+from calculator.timeframe_aggregator import TimeframeAggregator
+
+# 2026-10-18 10:00:00 UTC
+BASE = 1_792_317_600
+
+
+def _push_minutes(aggregator, minutes, volume=1.0):
+    for minute in minutes:
+        aggregator.push(BASE + minute * 60, float(minute), volume)
+
+
+def test_partial_first_bar_is_dropped():
+    aggregator = TimeframeAggregator(["5m"])
+    # 10:02 에 시작: 10:00 ~ 10:05 봉은 3분만 있으므로 버림
+    _push_minutes(aggregator, range(2, 10))
+    t2_close, t1_close, t2_volume, t1_volume = aggregator.values("5m")[:4]
+    assert (t2_close, t1_close) == (None, 9.0)
+    assert t1_volume == 5.0
+
+
+def test_first_bar_starting_on_the_boundary_is_kept():
+    aggregator = TimeframeAggregator(["5m", "15m"])
+    _push_minutes(aggregator, range(0, 15))
+    assert aggregator.values("5m")[:2] == [9.0, 14.0]
+    assert aggregator.values("15m")[:2] == [None, 14.0]
+
+
+def test_bar_without_a_trade_in_its_last_minute_closes_on_the_next_bar():
+    aggregator = TimeframeAggregator(["5m"])
+    # 10:04, 10:05 에 체결 없음
+    _push_minutes(aggregator, [0, 1, 2, 3, 6])
+    assert aggregator.values("5m")[1] == 3.0
+    assert aggregator.values("5m")[3] == 4.0
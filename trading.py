@@ -1,14 +1,16 @@
 import asyncio
-import ssl
 import time
 import urllib
 import uuid
 from datetime import datetime
-import aiohttp
-import certifi
 import jwt
+from manager.burst_executor import BurstOrderExecutor
+from manager.coin_data_manager import fetch_wallet
+from manager.http_client import get_upbit_session, upbit_url, warm_up
+from manager.request_scheduler import PRIORITY_ORDER
 from manager.webhook_manager import send_webhook, send_error_webhook
-from shared_resources import PURCHASE_VOLUME, KST, last_buy_date, save_purchase, clear_purchase, persistent_purchases
+from shared_resources import PURCHASE_VOLUME, KST, last_buy_date, save_purchase, clear_purchase, persistent_purchases, \
+    request_scheduler, latency_metrics, BURST_ORDER_MODE, strategy_engine
 import shared_resources
 
 from zoneinfo import ZoneInfo
@@ -19,13 +21,18 @@ if not hasattr(shared_resources, "lasy_buy_date"):
 
 KST = ZoneInfo("Asia/Seoul")
 
-def _next_morning_9_kst(now: datetime):
-    target_today = now.replace(hour=9, minute=0, second=0, microsecond=0, tzinfo=KST)
+# 매도 요청이 예외(타임아웃, 연결 오류)로 실패했을 때 최대 시도 횟수
+SELL_RETRY_LIMIT = 5
+# 매수 후 체결 내역을 알 수 없을 때 REST 계좌 조회로 확인하는 최대 횟수 (1초부터 두 배씩, 최대 30초 간격)
+WALLET_CONFIRM_ATTEMPTS = 8
+
+def _next_entry_kst(now: datetime, entry_time: dtime = dtime(9, 0)):
+    target_today = now.replace(hour=entry_time.hour, minute=entry_time.minute, second=0, microsecond=0, tzinfo=KST)
     return target_today if now <= target_today else (target_today + timedelta(days=1))
 
-async def order(ACCESS_KEY, SECRET_KEY, coin, type, volume):
+def prepare_order(ACCESS_KEY, SECRET_KEY, coin, type, volume):
     """
-    Upbit 시장가 주문 함수.
+    Upbit 시장가 주문 요청을 전송 직전 상태(주소, 파라미터, 서명된 헤더)로 만듭니다.
 
     매개변수:
       - ACCESS_KEY: Upbit API Access Key
@@ -34,10 +41,10 @@ async def order(ACCESS_KEY, SECRET_KEY, coin, type, volume):
       - volume: 주문 금액(매수 시) 또는 코인 수량(매도 시)
 
     리턴:
-      - API 응답 JSON (dict)
+      - (url, data, headers)
     """
     # Upbit 주문 API 엔드포인트
-    url = "https://api.upbit.com/v1/orders"
+    url = upbit_url("/v1/orders")
     # nonce 생성 (고유값)
     nonce = str(uuid.uuid4())
     # 거래할 마켓 (필요에 따라 변경)
@@ -71,25 +78,94 @@ async def order(ACCESS_KEY, SECRET_KEY, coin, type, volume):
     }
 
     # JWT 토큰 생성 (HS256 알고리즘 사용)
+    sign_start = time.perf_counter()
     token = jwt.encode(payload, SECRET_KEY, algorithm="HS256")
     headers = {"Authorization": f"Bearer {token}"}
-    # ssl 적용
-    ssl_context = ssl.create_default_context(cafile=certifi.where())
-    # aiohttp를 사용하여 비동기로 POST 요청 전송
-    async with aiohttp.ClientSession() as session:
-        async with session.post(url, json=data, headers=headers, ssl=ssl_context) as response:
+    latency_metrics.observe_since("order_sign", sign_start)
+    return url, data, headers
+
+
+async def send_order(prepared):
+    """
+    prepare_order 로 준비된 주문을 전송하고 API 응답 JSON (dict)을 반환합니다.
+    """
+    url, data, headers = prepared
+    queued = time.perf_counter()
+    # 공유 aiohttp 세션으로 비동기 POST 요청 전송 (이미 맺어둔 TLS 연결 재사용)
+    # 주문은 계좌 조회, 캔들 조회보다 우선하여 요청 예산을 사용
+    async with request_scheduler.request("order", PRIORITY_ORDER):
+        sent = time.perf_counter()
+        latency_metrics.observe("order_queue", sent - queued)
+        async with get_upbit_session().post(url, json=data, headers=headers) as response:
+            # 응답 헤더 수신 시점을 주문 ack로 봄
+            latency_metrics.observe_since("order_roundtrip", sent)
+            request_scheduler.observe(response.headers)
+            if response.status == 429:
+                request_scheduler.penalize("order")
             # API 응답 JSON 반환
             return await response.json()
 
 
-async def process_trade(ACCESS_KEY, SECRET_KEY, coin, trading_dict, indicators_dict,
-                        active_trades, wallet_dict, trading_lock, active_lock):
+async def order(ACCESS_KEY, SECRET_KEY, coin, type, volume):
     """
-    변경 후 규칙:
-      • 매수: 매일 KST 09:00에 코인별 1회 매수
-      • 매도: 현재가 >= (매수가 * 1.03)일 때 전량 매도
+    Upbit 시장가 주문 함수. (prepare_order + send_order)
+
+    리턴:
+      - API 응답 JSON (dict)
     """
-    print(f"[{datetime.now()}] {coin} 거래 시작")
+    return await send_order(prepare_order(ACCESS_KEY, SECRET_KEY, coin, type, volume))
+
+
+# 09:00 매수 주문을 모아서 한 번에 보내는 실행기 (BURST_ORDER_MODE=1 일 때 사용)
+burst_executor = BurstOrderExecutor(send_order, warm_up, latency_metrics)
+
+
+async def sell(ACCESS_KEY, SECRET_KEY, coin, volume, attempts=SELL_RETRY_LIMIT):
+    """
+    시장가 전량 매도. 타임아웃, 연결 오류 등 예외가 발생하면 1초부터 두 배씩 늘려가며 최대 attempts번 재시도합니다.
+    (앞선 요청이 실제로는 체결된 경우 재시도 주문은 잔고 부족 오류로 끝나므로 중복 매도되지 않음)
+
+    리턴:
+      - 마지막 API 응답 JSON (dict), 모든 시도가 예외로 끝나면 None
+    """
+    delay = 1
+    for attempt in range(1, attempts + 1):
+        try:
+            return await order(ACCESS_KEY, SECRET_KEY, coin, "ask", volume)
+        except Exception as e:
+            print(f"[{datetime.now()}] {coin} 매도 요청 실패 ({attempt}/{attempts}): {e!r}")
+            if attempt < attempts:
+                await asyncio.sleep(delay)
+                delay *= 2
+    return None
+
+
+async def process_trade(ACCESS_KEY, SECRET_KEY, coin, trading_state, indicator_store,
+                        wallet_dict, order_fills, price_cache, price_triggers):
+    """
+    코인을 선택한 전략(trading_state.snapshot.strategies, 없으면 기본 전략)의 규칙으로 거래합니다.
+      • 매수: 코인별 하루 1회, 전략의 entry_time(KST, 기본 전략 09:00)에 매수 (None이면 즉시)
+      • 매도: 현재가 >= (매수가 * take_profit)일 때 (기본 전략 +3%),
+              또는 매 분 평가하는 전략의 청산 조건을 만족하면 전량 매도
+
+    거래가 어떻게 끝나든(예외 포함) trading_state에서 코인을 삭제해서 거래 자리를 반환합니다.
+    """
+    try:
+        await _run_trade(ACCESS_KEY, SECRET_KEY, coin, trading_state, indicator_store,
+                         wallet_dict, order_fills, price_cache, price_triggers)
+    except Exception as e:
+        msg = f"{coin} 거래 중 예외 발생: {e!r}, 코인 개별 확인 필요"
+        print(f"[{datetime.now()}] {msg}")
+        send_error_webhook(msg)
+    finally:
+        await trading_state.finish_trade(coin)
+        print(f"[{datetime.now()}] {coin} 거래 종료. trading, active 에서 삭제됨.")
+
+
+async def _run_trade(ACCESS_KEY, SECRET_KEY, coin, trading_state, indicator_store,
+                     wallet_dict, order_fills, price_cache, price_triggers):
+    strategy = strategy_engine.strategy(trading_state.snapshot.strategies.get(coin))
+    print(f"[{datetime.now()}] {coin} 거래 시작 (전략: {strategy.name})")
 
     purchase_volume = PURCHASE_VOLUME
     err_flag = False
@@ -99,14 +175,13 @@ async def process_trade(ACCESS_KEY, SECRET_KEY, coin, trading_dict, indicators_d
     today = now.date()
     if last_buy_date.get(coin) == today:
         print(f"[{datetime.now()}] {coin}는 이미 오늘({today}) 매수 완료. 거래 스킵.")
-        async with trading_lock, active_lock:
-            active_trades.discard(coin)
-            trading_dict.pop(coin, None)
         return
 
-    # 2) 09:00까지 대기(이미 지났으면 즉시 매수)
-    target_dt = _next_morning_9_kst(now)
-    if target_dt.date() == today and now < target_dt:
+    # 2) 전략의 매수 시각(기본 09:00)까지 대기(이미 지났거나 매수 시각이 없으면 즉시 매수)
+    entry_clock = strategy.entry_clock
+    target_dt = _next_entry_kst(now, entry_clock) if entry_clock is not None else now
+    wait_until_nine = target_dt.date() == today and now < target_dt
+    if wait_until_nine and not BURST_ORDER_MODE:
         while True:
             if datetime.now(KST) >= target_dt:
                 break
@@ -114,100 +189,108 @@ async def process_trade(ACCESS_KEY, SECRET_KEY, coin, trading_dict, indicators_d
 
     # 3) 매수 실행 (시장가, 금액 기준)
     try:
-        result = await order(ACCESS_KEY, SECRET_KEY, coin, "bid", purchase_volume)
+        if wait_until_nine and BURST_ORDER_MODE:
+            # 주문을 미리 서명해 두고, 매수 시각에 다른 코인의 매수 주문과 함께 동시에 전송
+            prepared = prepare_order(ACCESS_KEY, SECRET_KEY, coin, "bid", purchase_volume)
+            result = await burst_executor.submit(coin, prepared, target_dt)
+        else:
+            result = await order(ACCESS_KEY, SECRET_KEY, coin, "bid", purchase_volume)
         if "error" in result:
             err_flag = True
             print(f"[{datetime.now()}] {coin} 매수 실패, 서버 오류: {result.get('error')}")
         else:
             message = f"{coin} 매수 완료 (일 1회 규칙)"
             print(f"[{datetime.now()}]", message)
-            asyncio.create_task(send_webhook(message))
+            send_webhook(message)
     except Exception as e:
         err_flag = True
         print(f"[{datetime.now()}] {coin} 매수 실패, 예외: {e}")
 
     # 4) 매수 실패 시 종료
     if err_flag:
-        async with trading_lock, active_lock:
-            active_trades.discard(coin)
-            trading_dict.pop(coin, None)
         return
 
-    # 5) 지갑에서 평균매수가/수량 확보 (Upbit 계좌 동기화 딕셔너리)
-    #    실패/지연 대비: persistent_purchases fallback 사용
+    # 5) 평균매수가/수량 확보
+    #    private 웹소켓(myOrder)의 체결 완료 알림을 최대 30초 대기 (웹소켓이 끊겨 있으면 1초)
+    #    실패/지연 대비: 지갑(wallet_dict) → REST 계좌 조회 순으로 fallback
     avg_buy_price, balance = None, None
-    timeout = datetime.now().timestamp() + 30  # 최대 30초 대기
-    while datetime.now().timestamp() < timeout:
-        if coin in wallet_dict and wallet_dict[coin] is not None:
-            # shared wallet: { "KRW-ETH": [avg_buy_price(float), balance(str)] }
-            avg_buy_price = float(wallet_dict[coin][0])
-            balance = wallet_dict[coin][1]
+    fill_timeout = 30 if shared_resources.private_stream_connected else 1
+    fill = await order_fills.wait(result["uuid"], timeout=fill_timeout) if "uuid" in result else None
+    if fill is not None and fill["executed_volume"] > 0:
+        avg_buy_price = fill["avg_price"]
+        # shared wallet: { "KRW-ETH": [avg_buy_price(float), balance(str)] }
+        balance = wallet_dict[coin][1] if coin in wallet_dict else str(fill["executed_volume"])
+    elif coin in wallet_dict and wallet_dict[coin] is not None:
+        avg_buy_price = float(wallet_dict[coin][0])
+        balance = wallet_dict[coin][1]
+
+    # 5-1) fallback: 체결 알림, wallet_dict 모두 없으면 REST 계좌 조회로 직접 확인
+    #      (추정한 수량으로는 매도 주문을 보내지 않음)
+    delay = 1
+    for _ in range(WALLET_CONFIRM_ATTEMPTS if avg_buy_price is None else 0):
+        wallet = await fetch_wallet(ACCESS_KEY, SECRET_KEY)
+        if wallet is not None and coin in wallet:
+            wallet_dict[coin] = wallet[coin]
+            avg_buy_price, balance = wallet[coin]
             break
-        await asyncio.sleep(1)
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 30)
 
-    # 5-1) fallback: 방금 체결되었으나 API 반영 지연/에러 시, 현재가 기반 임시 저장
     if avg_buy_price is None:
-        # 티커 스냅샷에서 근사 (시장가 매수이므로 큰 오차는 없다고 가정)
-        approx_price = float(trading_dict.get(coin, 0.0))
-        if approx_price <= 0:
-            approx_price = 0.0
-        avg_buy_price = approx_price
-        # 매수 금액 / 가격 = 수량 추정
-        try:
-            est_qty = purchase_volume / approx_price if approx_price > 0 else 0.0
-        except Exception:
-            est_qty = 0.0
-        balance = str(est_qty)
+        send_error_webhook(f"{coin} 매수 체결 내역을 확인하지 못함. 매도하지 않고 거래 종료, 코인 개별 확인 필요")
+        return
 
     # 6) 구매 기록 영속 저장 (재시작 대비)
     save_purchase(coin, avg_buy_price, float(balance) if isinstance(balance, (int, float)) else float(balance))
 
-    # 7) +3% 익절 조건 모니터링
-    take_profit_price = avg_buy_price * 1.03
-    while True:
-        price = trading_dict.get(coin)
-        if price is not None and price >= take_profit_price:
-            result = await order(ACCESS_KEY, SECRET_KEY, coin, "ask", balance)
-            if "error" in result and "message" in result["error"]:
-                msg = f"Error: {result['error']['message']}, 코인 개별 매도 필요"
-                await send_error_webhook(msg)
-            else:
-                print(f"[{datetime.now()}] {coin} 매도 완료 (+3% 익절)")
-                # 매도 완료 시 로컬 구매 기록 정리(같은 날 재매수 금지 유지 원하면 주석 처리)
-                clear_purchase(coin)
-            break
-        await asyncio.sleep(1)
-
-    # 8) 종료 정리
-    async with trading_lock, active_lock:
-        active_trades.discard(coin)
-        trading_dict.pop(coin, None)
-        print(f"[{datetime.now()}] {coin} 거래 종료. trading_dict, active_trades 에서 삭제됨.")
+    # 7) 익절(매수가 x take_profit) 또는 청산 조건 대기
+    #    가격 수신 Task가 익절가 도달을, 지표 업데이트 Task가 청산 조건 충족을 알려줄 때까지 대기 (폴링 없음)
+    take_profit_price = avg_buy_price * strategy.take_profit if strategy.take_profit is not None else float("inf")
+    price_triggers.fired_at.pop(coin, None)
+    exit_price = await price_triggers.wait(coin, take_profit_price, price_cache.get(coin))
+    # 익절가에 도달한 틱의 수신 시각 (대기 없이 바로 통과한 경우 None)
+    tick_received = price_triggers.fired_at.pop(coin, None)
+    if tick_received is not None:
+        latency_metrics.observe_since("trigger_wake", tick_received)
+    result = await sell(ACCESS_KEY, SECRET_KEY, coin, balance)
+    if tick_received is not None:
+        latency_metrics.observe_since("tick_to_ack", tick_received)
+    if result is None:
+        send_error_webhook(f"{coin} 매도 요청 {SELL_RETRY_LIMIT}회 실패, 코인 개별 매도 필요")
+    elif "error" in result:
+        msg = f"Error: {result['error'].get('message', result['error'])}, 코인 개별 매도 필요"
+        send_error_webhook(msg)
+    else:
+        reason = "익절" if exit_price >= take_profit_price else "청산 조건"
+        print(f"[{datetime.now()}] {coin} 매도 완료 ({reason}, 전략: {strategy.name})")
+        # 매도 완료 시 로컬 구매 기록 정리(같은 날 재매수 금지 유지 원하면 주석 처리)
+        clear_purchase(coin)
 
 
-async def execute_trades(ACCESS_KEY, SECRET_KEY, trading_dict, active_trades, indicators_dict, wallet_dict
-                         , trading_lock, active_lock):
+async def execute_trades(ACCESS_KEY, SECRET_KEY, trading_state, indicator_store, wallet_dict
+                         , order_fills, price_cache, price_triggers):
     """
-    trading_dict에 존재하는 코인에 대해 개별 비동기 거래를 실행합니다.
-    이미 거래 중인 코인(active_trades에 포함된 코인)은 건너뛰며,
-    거래가 완료되면 각 작업이 trading_dict에서 해당 코인을 삭제합니다.
+    trading_state 의 거래 대상(trading) 코인에 대해 개별 비동기 거래를 실행합니다.
+    이미 거래 중인 코인(active에 포함된 코인)은 건너뛰며,
+    거래가 완료되면 각 작업이 trading_state에서 해당 코인을 삭제합니다.
 
     함수 동작 방식:
-      1. trading_dict는 외부에서 1초마다 업데이트됩니다.
-      2. trading_dict에 있는 코인에 대해 거래를 개별 비동기 작업(Task)으로 진행합니다.
-      3. 각 작업은 완료되면 trading_dict에서 자신의 코인을 삭제합니다.
-      4. 이후 trading_dict 업데이트 시, 삭제된 코인의 자리는 다시 채워져 추가 거래가 진행됩니다.
+      1. trading은 외부에서 3초마다 업데이트되며, 현재가는 price_cache에 실시간으로 기록됩니다.
+      2. 새 스냅샷이 발행될 때마다 trading에 있는 코인에 대해 거래를 개별 비동기 작업(Task)으로 진행합니다.
+         (시작 여부는 trading_state.start_trade()가 판단하므로 같은 코인이 두 번 시작되지 않음)
+      3. 각 작업은 완료되면 trading_state에서 자신의 코인을 삭제합니다.
+      4. 이후 trading 업데이트 시, 삭제된 코인의 자리는 다시 채워져 추가 거래가 진행됩니다.
     """
 
+    version = -1
     while True:
-        # trading_dict는 매 1초마다 업데이트되므로, 그 시점의 거래 대상 코인 목록을 확인
-        for coin in list(trading_dict.keys()):
-            async with active_lock:
-                # 거래중이 아닌, trading_dict에 존재하는 코인만 거래를 시작함
-                if coin not in active_trades:
-                    active_trades.add(coin)
-                    asyncio.create_task(
-                        process_trade(ACCESS_KEY, SECRET_KEY, coin, trading_dict, indicators_dict,
-                                      active_trades, wallet_dict, trading_lock, active_lock)
-                    )
-        await asyncio.sleep(1)
+        # 상태가 바뀔 때까지 대기한 뒤, 그 시점의 거래 대상 코인 목록을 확인
+        snapshot = await trading_state.changed(version)
+        version = snapshot.version
+        for coin in snapshot.trading:
+            # 거래중이 아닌, trading에 존재하는 코인만 거래를 시작함
+            if coin not in snapshot.active and await trading_state.start_trade(coin):
+                asyncio.create_task(
+                    process_trade(ACCESS_KEY, SECRET_KEY, coin, trading_state, indicator_store,
+                                  wallet_dict, order_fills, price_cache, price_triggers)
+                )